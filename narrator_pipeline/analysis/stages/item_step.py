@@ -4,6 +4,7 @@ import re
 from narrator_pipeline.common.llm_utils import generate_with_retry, parse_json_from_response
 from .prompt_loader import load_prompt, render_prompt
 from narrator_pipeline.common import split_text_to_content
+from narrator_pipeline.common.segmentation import first_misalignment
 
 def _default_group_key(order: int) -> str:
     return f"solo_{order}"
@@ -333,6 +334,11 @@ def analyze_items_for_scene(
             )
             print(f"      Scene {scene_id}: legacy→refine 完成 → {[it.get('template', '?') for it in matched_items]}")
 
+    # 按偏移逐段核对各 item.text 是否首尾相接覆盖场景原文（不拼接整串）
+    mismatch = first_misalignment([str(it.get("text", "")) for it in matched_items], str(scene.get("text", "")))
+    if mismatch is not None:
+        print(f"      ⚠️ Scene {scene.get('sceneId')}: item 文本与场景原文自第 {mismatch} 字起不一致，请人工复核")
+
     # 拆分字幕长度，并设置序号
     for idx, item in enumerate(matched_items):
         item["content"] = split_text_to_content(item.get("text", ""))
@@ -15,6 +15,7 @@ from narrator_pipeline.paths import PACKAGE_ROOT, resolve_video_paths
 from narrator_pipeline.common.pipeline_cleanup import cleanup_before_step0
 from narrator_pipeline.contracts.scene_split_draft import save_scene_split_draft
 from narrator_pipeline.analysis.stages import analyze_scenes
+from narrator_pipeline.common.cancellation import CancelToken, check_cancelled
 from narrator_pipeline.common.step_llm import create_llm_runtime
 from narrator_pipeline.common import AiLogger, load_config, load_env
 from narrator_pipeline.contracts.validation_errors import ScriptValidationError
@@ -50,9 +51,10 @@ def run_scene_split(
     *,
     llm_provider: str | None = None,
     llm_model: str | None = None,
+    cancel_token: CancelToken | None = None,
 ) -> dict:
     client, model, provider, _ = create_llm_runtime(
-        config, llm_provider=llm_provider, llm_model=llm_model
+        config, llm_provider=llm_provider, llm_model=llm_model, cancel_token=cancel_token
     )
     append_log = ai_logger.append if ai_logger else None
 
@@ -73,10 +75,12 @@ def run_step0_for_video(
     llm_provider: str | None = None,
     llm_model: str | None = None,
     print_continue_hint: bool = True,
+    cancel_token: CancelToken | None = None,
 ) -> dict:
     """
     读取口播稿 → cleanup → 场景拆分 → 写入 scene-split-draft.json。
     返回 scene_split 字典。口播稿或内容为空时抛 ValueError。
+    cancel_token 被取消时抛 JobCancelled（cleanup 之前 / 落盘之前均会检查，取消后不写草稿）。
     """
     script_dir = PACKAGE_ROOT
     paths = resolve_video_paths(video_name, config)
@@ -87,6 +91,7 @@ def run_step0_for_video(
     if not input_path.exists():
         raise ValueError(f"文案文件不存在: {input_path}")
 
+    check_cancelled(cancel_token)
     cleanup_before_step0(video_name, output_dir, config, script_dir)
 
     ai_logger = AiLogger(output_dir, video_name, step="step0")
@@ -105,7 +110,9 @@ def run_step0_for_video(
         ai_logger,
         llm_provider=llm_provider,
         llm_model=llm_model,
+        cancel_token=cancel_token,
     )
+    check_cancelled(cancel_token)
     save_scene_split_draft(scene_split, draft_path)
 
     print("\n✅ 场景拆分完成!")
@@ -18,6 +18,7 @@ import sys
 from pathlib import Path
 
 from narrator_pipeline.paths import PACKAGE_ROOT, resolve_video_paths
+from narrator_pipeline.contracts.scene_document import SceneDocument
 from narrator_pipeline.contracts.scene_script_validate import validate_and_normalize_scene_scripts
 from narrator_pipeline.contracts.scene_timing import finalize_step1_content_and_anchors
 from narrator_pipeline.common.pipeline_cleanup import cleanup_before_step1
@@ -27,6 +28,7 @@ from narrator_pipeline.analysis.stages import (
     analyze_param_for_item,
     gemini_fix_after_warnings,
 )
+from narrator_pipeline.common.cancellation import CancelToken, check_cancelled
 from narrator_pipeline.common.step_llm import create_llm_runtime
 from narrator_pipeline.contracts.template_registry import TEMPLATE_REGISTRY
 from narrator_pipeline.common import AiLogger, load_config, load_env
@@ -252,11 +254,13 @@ def _run_items_and_params_pipeline(
     要求 result 已含 topic 与 scenes（每项含 text，尚无 items）。
     """
     append_log = ai_logger.append if ai_logger else None
+    cancel_token = getattr(client, "cancel_token", None)
     scenes = result.get("scenes", [])
     topic = result.get("topic", "未命名主题")
 
     print("   [Step 2/3] 正在两阶段拆解 Items（2A 分镜 + 2B 模板匹配）...")
     for scene in scenes:
+        check_cancelled(cancel_token)
         analyze_items_for_scene(
             client, model, topic, scene, template_guide, append_ai_log=append_log
         )
@@ -292,6 +296,7 @@ def _run_items_and_params_pipeline(
             for rk in [k for k in list(item.keys()) if k not in allowed_keys]:
                 item.pop(rk)
 
+            check_cancelled(cancel_token)
             analyze_param_for_item(
                 client,
                 model,
@@ -432,13 +437,14 @@ def analyze_with_llm(
     llm_provider: str | None = None,
     llm_model: str | None = None,
     skip_validate: bool = False,
+    cancel_token: CancelToken | None = None,
 ) -> dict:
     """
     从场景草稿继续分析，返回 scene-scripts 字典。
     编排 _run_ai_analysis_pipeline → _cleanup_intermediate_fields → _validate_and_auto_fix。
     """
     client, model, provider, template_guide = create_llm_runtime(
-        config, llm_provider=llm_provider, llm_model=llm_model
+        config, llm_provider=llm_provider, llm_model=llm_model, cancel_token=cancel_token
     )
 
     fps = config.get("fps", 30)
@@ -482,10 +488,12 @@ def run_step1_for_video(
     llm_provider: str | None = None,
     llm_model: str | None = None,
     skip_validate: bool | None = None,
+    cancel_token: CancelToken | None = None,
 ) -> dict:
     """
     加载草稿 → cleanup → LLM 分析 → 后处理 → 写入 scene-scripts.json。
     返回 scene-scripts 字典。草稿缺失或对照文本为空时抛 ValueError。
+    cancel_token 被取消时抛 JobCancelled（取消后不写 scene-scripts.json）。
     """
     script_dir = PACKAGE_ROOT
     paths = resolve_video_paths(video_name, config)
@@ -495,6 +503,7 @@ def run_step1_for_video(
     if not draft_path.exists():
         raise ValueError(f"场景拆分草稿不存在: {draft_path}")
 
+    check_cancelled(cancel_token)
     cleanup_before_step1(video_name, output_dir, config, script_dir)
 
     ai_logger = AiLogger(output_dir, video_name, step="step1")
@@ -519,6 +528,7 @@ def run_step1_for_video(
         llm_provider=llm_provider,
         llm_model=llm_model,
         skip_validate=skip,
+        cancel_token=cancel_token,
     )
     _merge_dash_only_captions(result)
     finalize_step1_content_and_anchors(result)
@@ -527,16 +537,14 @@ def run_step1_for_video(
     output_dir.mkdir(parents=True, exist_ok=True)
     output_path = output_dir / "scene-scripts.json"
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    # 登记为进程内共享实例：同进程继续跑 Step2/3/4 时不再重复解析
+    doc = SceneDocument.from_dict(result)
+    check_cancelled(cancel_token)
+    doc.save(output_path)
 
-    scenes = result.get("scenes", [])
-    total_items = sum(len(s.get("items", [])) for s in scenes)
-    template_counts: dict[str, int] = {}
-    for s in scenes:
-        for it in s.get("items", []):
-            t = it.get("template", "?")
-            template_counts[t] = template_counts.get(t, 0) + 1
+    scenes = doc.scenes
+    total_items = sum(len(s.items) for s in scenes)
+    template_counts = doc.template_counts()
 
     print("\n✅ 文案分析完成!")
     print(f"   📦 视频名: {video_name}")
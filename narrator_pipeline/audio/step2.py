@@ -10,7 +10,6 @@ Step 2: Azure TTS 语音生成（模板驱动版）
 """
 
 import argparse
-import json
 import math
 import os
 import re
@@ -29,6 +28,8 @@ except ImportError:
     MP3 = None
 
 from narrator_pipeline.common import extract_content_text, load_config, load_env
+from narrator_pipeline.contracts.scene_document import load_scene_document
+from narrator_pipeline.contracts.script_store import update_json
 
 
 _PUNCT_TAIL = re.compile(r'[，。！？、；：…—,\.\!\?\;\:\-"\'」）\)】》]$')
@@ -274,6 +275,34 @@ def upgrade_content_with_timing(
     return upgraded
 
 
+def merge_scene_timings(scripts_data: dict, timed_scenes: dict) -> list[str]:
+    """
+    把本次合成得到的场景音频与 content 时间轴合并进 scripts_data（磁盘最新内容）。
+    timed_scenes: {sceneId: 已注入时间轴的 scene}。按 order 匹配 item；文案在合成期间被改动的 item 不写入，
+    返回这些 item 的标签。
+    """
+    stale = []
+    for scene in scripts_data.get("scenes", []):
+        scene_id = str(scene.get("sceneId"))
+        timed = timed_scenes.get(scene_id)
+        if timed is None:
+            continue
+        scene["audioSrc"] = timed["audioSrc"]
+        scene["totalDurationFrames"] = timed["totalDurationFrames"]
+        timed_items = {it.get("order"): it for it in timed.get("items", [])}
+        for item in scene.get("items", []):
+            src = timed_items.get(item.get("order"))
+            if src is None:
+                continue
+            if extract_texts_from_content(item.get("content", [])) != extract_texts_from_content(src.get("content", [])):
+                stale.append(f"[{scene_id}] item order={item.get('order')}")
+                continue
+            item["content"] = src.get("content", [])
+            if "totalDurationFrames" in src:
+                item["totalDurationFrames"] = src["totalDurationFrames"]
+    return stale
+
+
 def main():
     parser = argparse.ArgumentParser(description="Step 2: Azure TTS 语音生成（模板驱动版）")
     parser.add_argument(
@@ -307,8 +336,8 @@ def main():
         print(f"❌ 文件不存在: {input_path}")
         return False
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        scripts_data = json.load(f)
+    # 在副本上注入时间轴，结束时再与磁盘最新内容合并
+    scripts_data = load_scene_document(input_path).snapshot().to_dict()
 
     output_dir = paths.audio_dir
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -319,6 +348,7 @@ def main():
     print(f"   🚀 语速: {speech_rate}")
 
     success, fail = 0, 0
+    timed_scenes = {}
 
     for scene in scripts_data.get("scenes", []):
         scene_id = scene["sceneId"]
@@ -405,14 +435,18 @@ def main():
                     df = c.get("durationFrames", 0)
                     print(f"       句{start_idx + ci}: F{sf}~F{sf+df} ({df}帧) {text_preview}")
 
+            timed_scenes[scene_id_str] = scene
             success += 1
         else:
             fail += 1
 
-    # 回写 scene-scripts.json
-    with open(input_path, "w", encoding="utf-8") as f:
-        json.dump(scripts_data, f, ensure_ascii=False, indent=2)
-    print(f"\n📄 已更新 {input_path}")
+    # 回写 scene-scripts.json：锁内读取最新内容再合并，不覆盖合成期间 Studio 等其他写方的改动
+    if timed_scenes:
+        stale = []
+        update_json(input_path, lambda data: stale.extend(merge_scene_timings(data, timed_scenes)))
+        for label in stale:
+            print(f"  ⚠️ {label} 的文案在合成期间被修改，未写入时间轴，请重新运行 Step2")
+        print(f"\n📄 已更新 {input_path}")
 
     print(f"\n{'='*40}")
     print(f"✅ 成功: {success} 场景 | ❌ 失败: {fail} 场景")
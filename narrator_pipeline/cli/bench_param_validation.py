@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+param_schema 校验基准：对比原实现（逐次解析 schema）与预编译校验器的单文档耗时，并核对两者告警完全一致。
+
+用法（仓库根目录）:
+  python -m narrator_pipeline.cli.bench_param_validation                 # 默认取 src/remotions 下最大的 scene-scripts.json
+  python -m narrator_pipeline.cli.bench_param_validation <scene-scripts.json> --iterations 200
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from narrator_pipeline.contracts.param_schema_tools import validate_param_with_schema
+from narrator_pipeline.contracts.schema_compiler import compile_param_schema, validate_param_compiled
+from narrator_pipeline.contracts.template_registry import TEMPLATE_REGISTRY
+from narrator_pipeline.paths import REPO_ROOT
+
+
+def _largest_scene_scripts() -> Path | None:
+    candidates = list((REPO_ROOT / "src" / "remotions").glob("*/scenes/scene-scripts.json"))
+    return max(candidates, key=lambda p: p.stat().st_size) if candidates else None
+
+
+def _collect_items(data: dict) -> list[tuple[dict, dict, int]]:
+    """(param, schema, content_len)，与 validate_and_normalize_scene_scripts 的取值方式一致。"""
+    out = []
+    for scene in data.get("scenes", []):
+        for item in scene.get("items", []):
+            tmpl = TEMPLATE_REGISTRY.get(str(item.get("template") or "").strip())
+            param = item.get("param")
+            if tmpl is None or not isinstance(param, dict):
+                continue
+            schema = tmpl.get("param_schema") or {}
+            content = item.get("content")
+            out.append((param, schema, len(content) if isinstance(content, list) else 0))
+    return out
+
+
+def _run(validate, items, iterations: int) -> tuple[float, list[str]]:
+    warnings: list[str] = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        warnings = []
+        for param, schema, clen in items:
+            validate(param, schema, content_len=clen, warn=warnings.append)
+    return (time.perf_counter() - start) / iterations, warnings
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="param_schema 校验基准（原实现 vs 预编译）")
+    parser.add_argument("path", nargs="?", help="scene-scripts.json 路径（默认取最大的一份）")
+    parser.add_argument("--iterations", "-n", type=int, default=100, help="每种实现的重复次数")
+    args = parser.parse_args()
+
+    path = Path(args.path) if args.path else _largest_scene_scripts()
+    if path is None or not path.is_file():
+        print(f"❌ 未找到 scene-scripts.json: {path or 'src/remotions/*/scenes/'}")
+        return False
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = _collect_items(data)
+    if not items:
+        print("❌ 文档中没有可校验的 item")
+        return False
+
+    schemas = {id(schema): schema for _, schema, _ in items}
+    start = time.perf_counter()
+    for schema in schemas.values():
+        compile_param_schema(schema)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    iterations = max(1, args.iterations)
+    # 预热：填充编译缓存
+    _run(validate_param_compiled, items, 1)
+    legacy_s, legacy_warnings = _run(validate_param_with_schema, items, iterations)
+    compiled_s, compiled_warnings = _run(validate_param_compiled, items, iterations)
+
+    print(f"📄 {path}（{path.stat().st_size / 1024:.1f} KB，{len(items)} 个 item，{len(schemas)} 种模板）")
+    print(f"   编译全部模板 schema: {compile_ms:.2f} ms（每个注册表版本一次）")
+    print(f"   原实现:   {legacy_s * 1000:.3f} ms / 文档")
+    print(f"   预编译:   {compiled_s * 1000:.3f} ms / 文档（{legacy_s / compiled_s:.1f}×）")
+    if legacy_warnings != compiled_warnings:
+        print(f"❌ 告警不一致：原实现 {len(legacy_warnings)} 条，预编译 {len(compiled_warnings)} 条")
+        return False
+    print(f"✅ 两种实现告警一致（{len(legacy_warnings)} 条）")
+    return True
+
+
+if __name__ == "__main__":
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    success = main()
+    exit(0 if success else 1)
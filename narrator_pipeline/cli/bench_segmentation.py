@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+分句基准：在 narrations/ 全部口播文本上对比逐字符拼接的原实现与正则分句引擎，并核对切分结果。
+
+用法（仓库根目录）:
+  python -m narrator_pipeline.cli.bench_segmentation
+  python -m narrator_pipeline.cli.bench_segmentation --dir narrations --iterations 50
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from narrator_pipeline.common.segmentation import (
+    CLOSING_CHARS,
+    SPLIT_PUNCTUATIONS,
+    segment_text,
+    segments_contiguous,
+    split_pieces,
+)
+from narrator_pipeline.paths import REPO_ROOT
+
+
+def _split_legacy(text: str) -> list[str]:
+    """原 split_text_to_content：逐字符拼接 + 合并收尾片段 + 前移开头收尾符号（仅作对照）。"""
+    if not text:
+        return []
+    segments: list[str] = []
+    current = ""
+    for char in text:
+        current += char
+        if char in SPLIT_PUNCTUATIONS:
+            segments.append(current)
+            current = ""
+    if current:
+        segments.append(current)
+
+    merged: list[str] = segments[:1]
+    for seg in segments[1:]:
+        core = seg.strip()
+        if core and all(c in CLOSING_CHARS for c in core):
+            merged[-1] += seg
+        else:
+            merged.append(seg)
+
+    out: list[str] = merged[:1]
+    for seg in merged[1:]:
+        i = 0
+        while i < len(seg) and seg[i].isspace():
+            i += 1
+        j = i
+        while j < len(seg) and seg[j] in CLOSING_CHARS:
+            j += 1
+        if j > i:
+            out[-1] += seg[i:j]
+            seg = seg[:i] + seg[j:]
+        if seg:
+            out.append(seg)
+    if "".join(out) != text:
+        print("Warning: Content split mismatch.")
+    return out
+
+
+def _time(fn, texts: list[str], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for t in texts:
+            fn(t)
+    return (time.perf_counter() - start) / iterations
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="分句基准（原实现 vs 正则分句引擎）")
+    parser.add_argument("--dir", default=str(REPO_ROOT / "narrations"), help="口播文本目录（*.txt）")
+    parser.add_argument("--iterations", "-n", type=int, default=20, help="重复次数")
+    args = parser.parse_args()
+
+    files = sorted(Path(args.dir).glob("*.txt"))
+    if not files:
+        print(f"❌ 目录下没有 .txt: {args.dir}")
+        return False
+    texts = [f.read_text(encoding="utf-8") for f in files]
+    total_chars = sum(len(t) for t in texts)
+
+    mismatched = []
+    segment_count = 0
+    for f, t in zip(files, texts):
+        segs = segment_text(t)
+        segment_count += len(segs)
+        if not segments_contiguous(segs, 0, len(t)):
+            print(f"❌ {f.name}: 片段偏移不连续")
+            return False
+        if [s.text for s in segs] != _split_legacy(t) or split_pieces(t) != [s.text for s in segs]:
+            mismatched.append(f.name)
+
+    iterations = max(1, args.iterations)
+    legacy_s = _time(_split_legacy, texts, iterations)
+    engine_s = _time(segment_text, texts, iterations)
+    pieces_s = _time(split_pieces, texts, iterations)
+
+    print(f"📄 {len(files)} 个文件，{total_chars} 字，{segment_count} 个片段")
+    print(f"   原实现:   {legacy_s * 1000:.2f} ms / 全部文件")
+    print(f"   正则引擎: {engine_s * 1000:.2f} ms / 全部文件（{legacy_s / engine_s:.1f}×，含偏移）")
+    print(f"   仅文本:   {pieces_s * 1000:.2f} ms / 全部文件（{legacy_s / pieces_s:.1f}×，split_text_to_content 路径）")
+    if mismatched:
+        print(f"⚠️ {len(mismatched)} 个文件切分结果与原实现不同: {', '.join(mismatched)}")
+        return False
+    print("✅ 全部文件切分结果与原实现一致，且偏移首尾相接")
+    return True
+
+
+if __name__ == "__main__":
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    success = main()
+    exit(0 if success else 1)
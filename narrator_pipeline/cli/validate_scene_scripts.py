@@ -7,11 +7,11 @@
   python -m narrator_pipeline.cli.validate_scene_scripts <scene-scripts.json路径>
 """
 
-import json
 import sys
 from pathlib import Path
 
 from narrator_pipeline.contracts.scene_script_validate import validate_and_normalize_scene_scripts
+from narrator_pipeline.contracts.script_store import read_json
 from narrator_pipeline.contracts.template_registry import TEMPLATE_REGISTRY
 
 
@@ -25,8 +25,7 @@ def main():
         print(f"文件不存在: {json_path}")
         sys.exit(1)
 
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_json(json_path, copy=True)
 
     _, warnings = validate_and_normalize_scene_scripts(data, TEMPLATE_REGISTRY)
 
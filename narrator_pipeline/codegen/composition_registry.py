@@ -0,0 +1,139 @@
+"""
+Remotion Composition 注册表：每个视频一份 composition.manifest.json，汇总生成 src/remotions/registry.gen.tsx。
+
+Root.tsx 只 import 一次 GeneratedCompositions；注册 / 注销视频只需写（删）自己的 manifest 并重建注册表，
+不再用正则改写 Root.tsx。
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+MANIFEST_FILENAME = "composition.manifest.json"
+REGISTRY_FILENAME = "registry.gen.tsx"
+MANIFEST_VERSION = 1
+
+
+def build_manifest(name: str, pascal: str, *, fps: int, has_cover_still: bool) -> dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "name": name,
+        "pascal": pascal,
+        "durationToken": f"TOTAL_DURATION_{name.upper()}",
+        "fps": int(fps),
+        "coverStill": bool(has_cover_still),
+    }
+
+
+def manifest_text(manifest: dict) -> str:
+    return json.dumps(manifest, ensure_ascii=False, indent=2) + "\n"
+
+
+def manifest_path(remotions_dir: Path, name: str) -> Path:
+    return remotions_dir / name / MANIFEST_FILENAME
+
+
+def registry_path(remotions_dir: Path) -> Path:
+    return remotions_dir / REGISTRY_FILENAME
+
+
+def load_manifests(remotions_dir: Path, overrides: dict | None = None) -> list[dict]:
+    """读取全部 manifest，按视频名排序；overrides 中 name → manifest（None 表示注销）覆盖磁盘内容。"""
+    manifests: dict[str, dict] = {}
+    if remotions_dir.is_dir():
+        for path in remotions_dir.glob(f"*/{MANIFEST_FILENAME}"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"  ⚠️ 跳过无法解析的 {path}: {e}")
+                continue
+            if isinstance(data, dict) and data.get("pascal"):
+                manifests[path.parent.name] = {**data, "name": path.parent.name}
+    for name, manifest in (overrides or {}).items():
+        if manifest is None:
+            manifests.pop(name, None)
+        else:
+            manifests[name] = manifest
+    return [manifests[k] for k in sorted(manifests)]
+
+
+def _composition_jsx(
+    comp_id: str,
+    component: str,
+    duration: str,
+    fps: int,
+    width: int,
+    height: int,
+    comment: str,
+    schema: str | None = None,
+) -> str:
+    schema_line = f"\n        schema={{{schema}}}" if schema else ""
+    return f"""      {{/* {comp_id} - {comment} */}}
+      <Composition
+        id="{comp_id}"
+        component={{{component}}}
+        durationInFrames={{{duration}}}
+        fps={{{fps}}}
+        width={{{width}}}
+        height={{{height}}}{schema_line}
+        defaultProps={{{{}}}}
+      />"""
+
+
+def render_registry(manifests: list[dict]) -> str:
+    imports = []
+    blocks = []
+    for m in manifests:
+        name, pascal = m["name"], m["pascal"]
+        duration = m["durationToken"]
+        fps = int(m.get("fps", 30))
+        vert_id = f"{pascal}竖屏"
+        imports.append(
+            f'import {{ {pascal}, {vert_id}, {pascal}Schema, {duration} }} '
+            f'from "./{name}/{pascal}";'
+        )
+        blocks.append(_composition_jsx(
+            pascal, pascal, duration, fps, 1920, 1080, "横屏 1920×1080", schema=f"{pascal}Schema"
+        ))
+        blocks.append(_composition_jsx(
+            vert_id, vert_id, duration, fps, 1080, 1920, "竖屏 1080×1920", schema=f"{pascal}Schema"
+        ))
+        if m.get("coverStill"):
+            land_id, port_id = f"{pascal}封面横屏", f"{pascal}封面竖屏"
+            imports.append(
+                f'import {{ {land_id}, {port_id} }} from "./{name}/{pascal}CoverStills";'
+            )
+            blocks.append(_composition_jsx(land_id, land_id, "1", fps, 1920, 1080, "横屏封面 still 1920×1080"))
+            blocks.append(_composition_jsx(port_id, port_id, "1", fps, 1080, 1440, "3:4 封面 still 1080×1440"))
+
+    body = "\n\n".join(blocks) if blocks else "      {/* 暂无已注册视频 */}"
+    import_block = "\n".join(imports)
+    if import_block:
+        import_block += "\n"
+    return f"""/**
+ * 自动生成，请勿手改：由 narrator_pipeline.codegen.step4 根据 src/remotions/{{name}}/{MANIFEST_FILENAME} 汇总。
+ */
+import React from "react";
+import {{ Composition }} from "remotion";
+{import_block}
+export const GeneratedCompositions: React.FC = () => {{
+  return (
+    <>
+{body}
+    </>
+  );
+}};
+"""
+
+
+def write_registry(remotions_dir: Path) -> bool:
+    """按磁盘上的 manifest 重建注册表（内容不变则不写），返回是否写入。"""
+    content = render_registry(load_manifests(remotions_dir))
+    path = registry_path(remotions_dir)
+    if path.is_file() and path.read_text(encoding="utf-8") == content:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    return True
@@ -0,0 +1,78 @@
+"""
+Step4 `--data-mode json` 的场景数据去重：跨场景重复出现的字符串 / 对象 / 数组放入共享池 pool.json，
+原位置替换为 {"$ref": 下标}；渲染端由 src/components/SceneDataRenderer.tsx 还原。
+"""
+
+from __future__ import annotations
+
+import json
+from collections import Counter
+
+REF_MARKER = "$ref"
+STATIC_MARKER = "$static"
+
+# 一次 {"$ref":n} 引用的大致字节数；值只有在入池后总字节数下降时才入池
+REF_COST_BYTES = 12
+
+
+def static_ref(path: str) -> dict:
+    """需要 staticFile() 包装的路径。"""
+    return {STATIC_MARKER: path}
+
+
+def dumps_compact(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def _count(value, counts: Counter) -> None:
+    if isinstance(value, dict):
+        for v in value.values():
+            _count(v, counts)
+    elif isinstance(value, list):
+        for v in value:
+            _count(v, counts)
+    elif not isinstance(value, str):
+        return
+    counts[_canonical(value)] += 1
+
+
+def _worth_pooling(size: int, count: int) -> bool:
+    # 内联 count 次 vs 池中一份 + count 次引用
+    return count >= 2 and size * count > size + count * REF_COST_BYTES
+
+
+def dedupe_scene_data(scenes: list) -> tuple[list, list]:
+    """返回 (pool, 编码后的场景列表)；场景顶层对象本身不入池。"""
+    counts: Counter = Counter()
+    for scene in scenes:
+        _count(scene, counts)
+
+    pool: list = []
+    index: dict[str, int] = {}
+
+    def encode(value, top: bool = False):
+        if not isinstance(value, (dict, list, str)):
+            return value
+        if not top:
+            key = _canonical(value)
+            if _worth_pooling(len(key.encode("utf-8")), counts[key]):
+                if key not in index:
+                    index[key] = len(pool)
+                    pool.append(None)
+                    pool[index[key]] = _encode_children(value)
+                return {REF_MARKER: index[key]}
+        return _encode_children(value)
+
+    def _encode_children(value):
+        if isinstance(value, dict):
+            return {k: encode(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [encode(v) for v in value]
+        return value
+
+    encoded = [encode(scene, top=True) for scene in scenes]
+    return pool, encoded
@@ -10,23 +10,41 @@ Step 4: Remotion 动画代码生成（模板驱动版）
   生成 *Constants.ts、*MainBody.tsx、*Landscape.tsx、*Vertical.tsx、*VerticalChrome.tsx，
   入口 *.tsx 为双 Composition re-export。
   若 scene-scripts.json 含有效 cover（title/subtitle），另生成 *CoverProps.ts、*CoverStills.tsx，
-  并在 Root 注册「PascalCase封面横屏」「PascalCase封面竖屏」（横 1920×1080；竖 3:4 即 1080×1440，duration=1）。
+  并注册「PascalCase封面横屏」「PascalCase封面竖屏」（横 1920×1080；竖 3:4 即 1080×1440，duration=1）。
+  注册方式：写入 src/remotions/{name}/composition.manifest.json，并重建 src/remotions/registry.gen.tsx
+  （Root.tsx 只渲染其中的 GeneratedCompositions，不再被改写）。
+
+输出按内容比对后写入：与磁盘内容一致的文件不会被触碰（mtime 不变，Remotion Studio 不会重新打包）。
 
 用法（仓库根目录）:
   python -m narrator_pipeline.codegen.step4 --name video_name
+  python -m narrator_pipeline.codegen.step4 --name video_name --check   # 只检查，有过期文件时退出码非 0
+  python -m narrator_pipeline.codegen.step4 --name video_name --unregister   # 从注册表移除
 """
 
 import argparse
+import hashlib
 import json
 import re
-import shutil
 import sys
 from pathlib import Path
 
 from narrator_pipeline.paths import PACKAGE_ROOT, resolve_video_paths
 from narrator_pipeline.contracts.template_registry import TEMPLATE_REGISTRY, get_template_to_component_map
+from narrator_pipeline.contracts.scene_document import load_scene_document
 from narrator_pipeline.contracts.scene_timing import inject_text_length_content_timings, needs_text_length_timings_from_scripts
 from narrator_pipeline.common import load_config
+from narrator_pipeline.codegen.composition_registry import (
+    MANIFEST_FILENAME,
+    REGISTRY_FILENAME,
+    build_manifest,
+    load_manifests,
+    manifest_path,
+    manifest_text,
+    registry_path,
+    render_registry,
+)
+from narrator_pipeline.codegen.scene_data import dedupe_scene_data, dumps_compact, static_ref
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8", errors="replace")
@@ -80,7 +98,8 @@ def _param_to_jsx_props(
     """
     props = []
     for key, value in param.items():
-        if key in ("content", "totalDurationFrames"):
+        if key in ("content", "totalDurationFrames", "imageSizes"):
+            # imageSizes 为 Step3 记录的派生图尺寸，仅供排查与体积统计，不作为组件 props
             continue
         if key == "audioSrc":
             # audioSrc 已移到 scene 级别，不在 item props 中传递
@@ -301,6 +320,45 @@ def _param_to_jsx_props(
     return " ".join(props)
 
 
+# 嵌套字段中需要 staticFile 包装的子键（与 _param_to_jsx_props 保持一致）
+_NESTED_STATIC_KEYS = {
+    "images": "src",
+    "stages": "imageSrc",
+    "premises": "imageSrc",
+    "conclusion": "imageSrc",
+    "nodes": "imageSrc",
+    "panels": "src",
+    "left": "src",
+    "right": "src",
+}
+
+
+def _param_to_data(param: dict) -> dict:
+    """
+    将 param 转为 JSON 数据模式的 props（与 _param_to_jsx_props 同一套字段规则）。
+    需要 staticFile 的路径写成 {"$static": path}，由 SceneDataRenderer 在渲染时还原。
+    """
+    def _wrap(entry, sub_key: str):
+        if isinstance(entry, dict) and isinstance(entry.get(sub_key), str):
+            return {**entry, sub_key: static_ref(entry[sub_key])}
+        return entry
+
+    props = {}
+    for key, value in param.items():
+        if key in ("content", "totalDurationFrames", "imageSizes", "audioSrc"):
+            continue
+        sub_key = _NESTED_STATIC_KEYS.get(key)
+        if sub_key and isinstance(value, list):
+            props[key] = [_wrap(v, sub_key) for v in value if isinstance(v, dict)]
+        elif sub_key and isinstance(value, dict):
+            props[key] = _wrap(value, sub_key)
+        elif key in IMAGE_PARAM_FIELDS and isinstance(value, str):
+            props[key] = static_ref(value)
+        else:
+            props[key] = value
+    return props
+
+
 def normalize_cover(scripts_data: dict) -> dict | None:
     """
     从 scene-scripts.json 顶层读取可选 cover。
@@ -605,6 +663,57 @@ export const Scene{n}: React.FC = () => {{
 '''
 
 
+def build_scene_data(scene: dict) -> tuple[dict, list[str]]:
+    """JSON 数据模式：返回 (场景数据, 用到的组件名)。"""
+    items = []
+    used_components = set()
+    for item in scene.get("items", []):
+        template = item.get("template", "CENTER_FOCUS")
+        component = TEMPLATE_TO_COMPONENT.get(template, _COMPONENT_FALLBACK)
+        used_components.add(component)
+        total_frames = item.get("totalDurationFrames", 90)
+        props = {
+            "content": item.get("content", []),
+            "totalDurationFrames": total_frames,
+            **_param_to_data(item.get("param", {})),
+        }
+        items.append({"component": component, "durationFrames": total_frames, "props": props})
+
+    data = {"sceneName": scene.get("sceneName", ""), "items": items}
+    if scene.get("audioSrc"):
+        data["audioSrc"] = static_ref(scene["audioSrc"])
+    return data, sorted(used_components)
+
+
+def generate_data_scene_tsx(scene_index: int, scene: dict, used_components: list[str]) -> str:
+    """JSON 数据模式的薄场景组件：只 import 数据切片与所用模板组件。"""
+    n = scene_index + 1
+    scene_name = scene.get("sceneName", f"Scene {n}")
+    durations = [str(item.get("totalDurationFrames", 90)) for item in scene.get("items", [])]
+    total_duration_expr = " + ".join(durations) if durations else "90"
+    components = ", ".join(used_components)
+    component_import = f"{components}, DataScene" if components else "DataScene"
+
+    return f'''import React from "react";
+import {{ {component_import} }} from "../../../components";
+import pool from "./data/pool.json";
+import data from "./data/scene{n}.json";
+
+// {scene_name}
+const SCENE_DURATION = {total_duration_expr};
+
+export const calculateScene{n}Duration = (): number => {{
+    return SCENE_DURATION;
+}};
+
+const COMPONENTS = {{ {components} }};
+
+export const Scene{n}: React.FC = () => {{
+    return <DataScene data={{data}} pool={{pool}} components={{COMPONENTS}} />;
+}};
+'''
+
+
 def _build_scene_configs_lines(scenes: list) -> str:
     def _clean_label(t):
         return t.replace('"', '\\"') if t else ""
@@ -1294,6 +1403,66 @@ def generate_vertical_chrome_tsx(
     return head + prog
 
 
+class _OutputWriter:
+    """按 sha256 比对内存中的生成结果与磁盘文件，只写入内容变化的文件。
+
+    check=True 时不写任何文件，只记录过期（需写入或删除）的路径。
+    """
+
+    def __init__(self, check: bool = False) -> None:
+        self.check = check
+        self.written: list[Path] = []
+        self.unchanged: list[Path] = []
+        self.stale: list[Path] = []
+
+    @staticmethod
+    def _digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _is_current(self, path: Path, data: bytes) -> bool:
+        try:
+            if path.stat().st_size != len(data):
+                return False
+            return self._digest(path.read_bytes()) == self._digest(data)
+        except FileNotFoundError:
+            return False
+
+    def write_bytes(self, path: Path, data: bytes) -> bool:
+        """返回 True 表示文件内容有变化（check 模式下表示过期）。"""
+        if self._is_current(path, data):
+            self.unchanged.append(path)
+            return False
+        if self.check:
+            self.stale.append(path)
+            return True
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        self.written.append(path)
+        return True
+
+    def write_text(self, path: Path, content: str) -> bool:
+        return self.write_bytes(path, content.encode("utf-8"))
+
+    def copy_file(self, src: Path, dest: Path) -> bool:
+        return self.write_bytes(dest, src.read_bytes())
+
+    def remove(self, path: Path) -> bool:
+        if not path.exists():
+            return False
+        if self.check:
+            self.stale.append(path)
+        else:
+            path.unlink()
+            self.written.append(path)
+        return True
+
+    def summary(self) -> str:
+        if self.check:
+            return f"🔍 {len(self.stale)} 个文件已过期，{len(self.unchanged)} 个未变化"
+        return f"📝 {len(self.written)} 个文件已写入，{len(self.unchanged)} 个未变化"
+
+
 def generate_entry_tsx(name: str, pascal: str) -> str:
     td = f"TOTAL_DURATION_{name.upper()}"
     main_d = f"MAIN_DURATION_{name.upper()}"
@@ -1327,149 +1496,41 @@ export {{ {pascal}Vertical as {pascal}竖屏 }} from "./{pascal}Vertical";
 '''
 
 
-def update_root_tsx(
-    root_path: Path, name: str, pascal: str, config: dict, cover_still: dict | None
-):
-    """在 Root.tsx 注册横屏 + 竖屏 Composition；cover_still 有值时追加横/竖封面 still 与 import。"""
-    fps = config.get("fps", 30)
-    duration_token = f"TOTAL_DURATION_{name.upper()}"
-    vert_id = f"{pascal}竖屏"
-    cover_land_id = f"{pascal}封面横屏"
-    cover_vert_id = f"{pascal}封面竖屏"
-
-    with open(root_path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    for comp_id in (cover_land_id, cover_vert_id):
-        pattern = (
-            r"\n\s*(?:\{/\*[^\n]*\*/\}\s*\n)?\s*<Composition\b"
-            r"(?:(?!<Composition)[\s\S])*?\bid=\""
-            + re.escape(comp_id)
-            + r"\"[\s\S]*?/>"
-        )
-        content = re.sub(pattern, "\n", content, count=1)
-
-    cover_imp_line_re = re.compile(
-        r"^\s*import\s*\{[^}]+\}\s*from\s*[\"']\./remotions/"
-        + re.escape(name)
-        + "/"
-        + re.escape(pascal)
-        + r"CoverStills[\"'];\s*\n?",
-        re.MULTILINE,
-    )
-    content = cover_imp_line_re.sub("", content)
-
-    # 只删除「单个」Composition：从 <Composition 到目标 id 之间不能跨过另一个 <Composition，
-    # 否则会从文件里第一个 <Composition（如 TemplateShowcase）一直吞到目标 id，误删中间所有条目。
-    for comp_id in (pascal, vert_id):
-        pattern = (
-            r"\n\s*(?:\{/\*[^\n]*\*/\}\s*\n)?\s*<Composition\b"
-            r"(?:(?!<Composition)[\s\S])*?\bid=\""
-            + re.escape(comp_id)
-            + r"\"[\s\S]*?/>"
-        )
-        content = re.sub(pattern, "\n", content, count=1)
-
-    imp_line_re = re.compile(
-        r"^\s*import\s*\{[^}]+\}\s*from\s*[\"']\./remotions/"
-        + re.escape(name)
-        + "/"
-        + re.escape(pascal)
-        + r"[\"'];\s*\n?",
-        re.MULTILINE,
+def register_composition(
+    remotions_dir: Path,
+    name: str,
+    pascal: str,
+    config: dict,
+    cover_still: dict | None,
+    writer: _OutputWriter,
+) -> None:
+    """写入本视频的 composition.manifest.json，并据此重建 registry.gen.tsx。"""
+    manifest = build_manifest(
+        name, pascal, fps=config.get("fps", 30), has_cover_still=bool(cover_still)
     )
-    content = imp_line_re.sub("", content)
+    _sync_registry(remotions_dir, name, manifest, writer)
 
-    import_line = (
-        f'import {{ {pascal}, {vert_id}, {pascal}Schema, {duration_token} }} '
-        f'from "./remotions/{name}/{pascal}";'
-    )
-    cover_import_line = ""
-    if cover_still:
-        cover_import_line = (
-            f'import {{ {cover_land_id}, {cover_vert_id} }} '
-            f'from "./remotions/{name}/{pascal}CoverStills";'
-        )
 
-    cover_comp_block = ""
-    if cover_still:
-        cover_comp_block = f"""
-      {{/* {cover_land_id} - 横屏封面 still 1920×1080 */}}
-      <Composition
-        id="{cover_land_id}"
-        component={{{cover_land_id}}}
-        durationInFrames={{1}}
-        fps={{{fps}}}
-        width={{1920}}
-        height={{1080}}
-        defaultProps={{{{}}}}
-      />
-
-      {{/* {cover_vert_id} - 3:4 封面 still 1080×1440 */}}
-      <Composition
-        id="{cover_vert_id}"
-        component={{{cover_vert_id}}}
-        durationInFrames={{1}}
-        fps={{{fps}}}
-        width={{1080}}
-        height={{1440}}
-        defaultProps={{{{}}}}
-      />"""
-
-    composition_block = f"""
-      {{/* {pascal} - 横屏 1920×1080（自动生成） */}}
-      <Composition
-        id="{pascal}"
-        component={{{pascal}}}
-        durationInFrames={{{duration_token}}}
-        fps={{{fps}}}
-        width={{1920}}
-        height={{1080}}
-        schema={{{pascal}Schema}}
-        defaultProps={{{{}}}}
-      />
-
-      {{/* {vert_id} - 竖屏 1080×1920（自动生成） */}}
-      <Composition
-        id="{vert_id}"
-        component={{{vert_id}}}
-        durationInFrames={{{duration_token}}}
-        fps={{{fps}}}
-        width={{1080}}
-        height={{1920}}
-        schema={{{pascal}Schema}}
-        defaultProps={{{{}}}}
-      />{cover_comp_block}"""
-
-    lines = content.split("\n")
-    insert_at = None
-    for i, line in enumerate(lines):
-        if line.strip().startswith("import ") and "./remotions/" in line:
-            insert_at = i + 1
-    if insert_at is not None:
-        lines.insert(insert_at, import_line)
-        if cover_import_line:
-            lines.insert(insert_at + 1, cover_import_line)
-        content = "\n".join(lines)
-    else:
-        last_import = content.rfind("import ")
-        if last_import >= 0:
-            end_of_line = content.index("\n", last_import)
-            extra = import_line + ("\n" + cover_import_line if cover_import_line else "")
-            content = content[: end_of_line + 1] + extra + "\n" + content[end_of_line + 1 :]
+def unregister_composition(remotions_dir: Path, name: str, writer: _OutputWriter) -> None:
+    """删除本视频的 manifest 并重建注册表；生成的代码文件保留。"""
+    _sync_registry(remotions_dir, name, None, writer)
 
-    close_frag = content.rfind("\n    </>")
-    if close_frag >= 0:
-        content = content[:close_frag] + composition_block + content[close_frag:]
 
-    with open(root_path, "w", encoding="utf-8") as f:
-        f.write(content)
+def _sync_registry(
+    remotions_dir: Path, name: str, manifest: dict | None, writer: _OutputWriter
+) -> None:
+    m_path = manifest_path(remotions_dir, name)
+    if manifest is None:
+        changed = writer.remove(m_path)
+    else:
+        changed = writer.write_text(m_path, manifest_text(manifest))
+    if changed:
+        print(f"  {'⚠️' if writer.check else '✅'} {name}/{MANIFEST_FILENAME}")
 
-    root_msg = "  ✅ Root.tsx 已更新（横屏 + 竖屏双 Composition"
-    if cover_still:
-        root_msg += " + 横/竖封面 still"
-    root_msg += "）"
-    print(root_msg)
+    # check 模式下 manifest 未落盘，用 overrides 代入本视频的期望状态
+    registry = render_registry(load_manifests(remotions_dir, {name: manifest}))
+    if writer.write_text(registry_path(remotions_dir), registry):
+        print(f"  {'⚠️' if writer.check else '✅'} {REGISTRY_FILENAME}")
 
 
 def generate_scenes_index(scene_count: int) -> str:
@@ -1488,7 +1549,16 @@ def main():
         required=True,
         help="视频名称（推导 scene-scripts.json 与代码输出目录）",
     )
-    parser.add_argument("--skip-root", action="store_true", help="不更新 Root.tsx")
+    parser.add_argument(
+        "--skip-root",
+        action="store_true",
+        help="不更新 Composition 注册表（composition.manifest.json / registry.gen.tsx）",
+    )
+    parser.add_argument(
+        "--unregister",
+        action="store_true",
+        help="只从 Composition 注册表移除该视频（不生成代码、不删除已有文件）",
+    )
     parser.add_argument(
         "--preview-image",
         help="预览模式固定图片路径（例如 images/placeholder.png），会覆盖已有图片字段",
@@ -1498,6 +1568,18 @@ def main():
         action="store_true",
         help="预览模式：忽略场景音频（不渲染 Audio）",
     )
+    parser.add_argument(
+        "--data-mode",
+        choices=("jsx", "json"),
+        default=None,
+        help="场景数据形式：jsx=内联 JSX 字面量；json=每场景一份 JSON + 共享去重池，"
+        "由通用 DataScene 渲染（默认读 config.step4_data_mode，缺省 jsx）",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="只检查生成结果是否与磁盘一致，不写文件；有过期文件时返回非 0",
+    )
     args = parser.parse_args()
 
     script_dir = PACKAGE_ROOT
@@ -1507,14 +1589,22 @@ def main():
 
     name = args.name
     pascal = to_pascal_case(name)
+    remotions_dir = project_root / "src" / "remotions"
+    writer = _OutputWriter(check=args.check)
+
+    if args.unregister:
+        print(f"🗑️ 从 Composition 注册表移除: {name}")
+        unregister_composition(remotions_dir, name, writer)
+        print(f"\n{writer.summary()}")
+        return not (writer.check and writer.stale)
 
     input_path = paths.scene_scripts
     if not input_path.exists():
         print(f"❌ 文件不存在: {input_path}")
         return False
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        scripts_data = json.load(f)
+    # 副本：预览帧只注入内存，不污染进程内共享的文档实例
+    scripts_data = load_scene_document(input_path).snapshot().to_dict()
 
     scenes = scripts_data.get("scenes", [])
     if not scenes:
@@ -1539,7 +1629,7 @@ def main():
 
     cover_still = normalize_cover_still(scripts_data)
     if cover_still:
-        print("📎 封面 still：已检测到 cover 文案，将生成 CoverProps / CoverStills 并注册 Root")
+        print("📎 封面 still：已检测到 cover 文案，将生成 CoverProps / CoverStills 并注册封面 Composition")
 
     if args.preview_image or args.mute_audio:
         _apply_preview_overrides(
@@ -1553,88 +1643,110 @@ def main():
             f"静音音频={'是' if args.mute_audio else '否'}"
         )
 
-    remotion_dir = project_root / "src" / "remotions" / name
+    remotion_dir = remotions_dir / name
     scenes_dir = remotion_dir / "scenes"
-    scenes_dir.mkdir(parents=True, exist_ok=True)
+
+    def emit(path: Path, content: str, label: str) -> None:
+        if not writer.write_text(path, content):
+            return
+        print(f"  ⚠️ {label} 已过期" if writer.check else f"  ✅ {label}")
 
     # 复制 scene-scripts.json 到 scenes 目录
     scripts_dest = scenes_dir / "scene-scripts.json"
     if input_path.resolve() != scripts_dest.resolve():
-        shutil.copy2(input_path, scripts_dest)
-        print(f"📄 复制 scene-scripts.json → {scripts_dest}")
+        if writer.copy_file(input_path, scripts_dest) and not writer.check:
+            print(f"📄 复制 scene-scripts.json → {scripts_dest}")
 
     # 生成场景文件
-    print(f"\n🎬 生成场景代码 ({len(scenes)} 个场景)...")
-    for i, scene in enumerate(scenes):
-        scene_code = generate_scene_tsx(i, scene, name, config)
-        scene_path = scenes_dir / f"Scene{i+1}.tsx"
-        with open(scene_path, "w", encoding="utf-8") as f:
-            f.write(scene_code)
-        print(f"  ✅ Scene{i+1}.tsx ({scene.get('sceneName', '')})")
+    data_mode = args.data_mode or config.get("step4_data_mode", "jsx")
+    data_dir = scenes_dir / "data"
+    scene_bytes = 0
+    print(f"\n🎬 生成场景代码 ({len(scenes)} 个场景，数据模式 {data_mode})...")
+    if data_mode == "json":
+        built = [build_scene_data(scene) for scene in scenes]
+        raw_bytes = sum(len(dumps_compact(data).encode("utf-8")) for data, _ in built)
+        pool, encoded = dedupe_scene_data([data for data, _ in built])
+        pool_json = dumps_compact(pool) + "\n"
+        emit(data_dir / "pool.json", pool_json, f"data/pool.json（{len(pool)} 个共享值）")
+        scene_bytes += len(pool_json.encode("utf-8"))
+        data_bytes = len(pool_json.encode("utf-8"))
+        for i, (scene, (_, used), data) in enumerate(zip(scenes, built, encoded)):
+            data_json = dumps_compact(data) + "\n"
+            emit(data_dir / f"scene{i+1}.json", data_json, f"data/scene{i+1}.json")
+            scene_code = generate_data_scene_tsx(i, scene, used)
+            emit(scenes_dir / f"Scene{i+1}.tsx", scene_code, f"Scene{i+1}.tsx ({scene.get('sceneName', '')})")
+            data_bytes += len(data_json.encode("utf-8"))
+            scene_bytes += len(data_json.encode("utf-8")) + len(scene_code.encode("utf-8"))
+        stale_data = [
+            p for p in data_dir.glob("scene*.json")
+            if p.stem[len("scene"):].isdigit() and int(p.stem[len("scene"):]) > len(scenes)
+        ] if data_dir.is_dir() else []
+    else:
+        for i, scene in enumerate(scenes):
+            scene_code = generate_scene_tsx(i, scene, name, config)
+            emit(scenes_dir / f"Scene{i+1}.tsx", scene_code, f"Scene{i+1}.tsx ({scene.get('sceneName', '')})")
+            scene_bytes += len(scene_code.encode("utf-8"))
+        # 从 json 模式切回时清理数据文件
+        stale_data = sorted(data_dir.glob("*.json")) if data_dir.is_dir() else []
+    for path in stale_data:
+        if writer.remove(path) and not writer.check:
+            print(f"  🗑️ 已删除 data/{path.name}")
 
     # 生成 index.ts
-    index_code = generate_scenes_index(len(scenes))
-    with open(scenes_dir / "index.ts", "w", encoding="utf-8") as f:
-        f.write(index_code)
-    print("  ✅ index.ts")
+    emit(scenes_dir / "index.ts", generate_scenes_index(len(scenes)), "index.ts")
+
+    bundle_msg = f"📦 场景代码体积: {scene_bytes / 1024:.1f} KB（{data_mode}）"
+    if data_mode == "json":
+        bundle_msg += f"，其中 JSON 数据 {data_bytes / 1024:.1f} KB（去重前 {raw_bytes / 1024:.1f} KB）"
+    print(bundle_msg)
 
     # 横竖双入口：Constants / MainBody / Landscape / Vertical / Chrome / 入口 re-export
     const_code = generate_constants_tsx(name, pascal, scenes, config, cover)
-    with open(remotion_dir / f"{pascal}Constants.ts", "w", encoding="utf-8") as f:
-        f.write(const_code)
-    print(f"  ✅ {pascal}Constants.ts")
+    emit(remotion_dir / f"{pascal}Constants.ts", const_code, f"{pascal}Constants.ts")
 
     main_body = generate_main_body_tsx(name, pascal, cover)
-    with open(remotion_dir / f"{pascal}MainBody.tsx", "w", encoding="utf-8") as f:
-        f.write(main_body)
-    print(f"  ✅ {pascal}MainBody.tsx")
+    emit(remotion_dir / f"{pascal}MainBody.tsx", main_body, f"{pascal}MainBody.tsx")
 
     land = generate_landscape_tsx(pascal, mute_audio=args.mute_audio)
-    with open(remotion_dir / f"{pascal}Landscape.tsx", "w", encoding="utf-8") as f:
-        f.write(land)
-    print(f"  ✅ {pascal}Landscape.tsx")
+    emit(remotion_dir / f"{pascal}Landscape.tsx", land, f"{pascal}Landscape.tsx")
 
     vert = generate_vertical_tsx(pascal, mute_audio=args.mute_audio)
-    with open(remotion_dir / f"{pascal}Vertical.tsx", "w", encoding="utf-8") as f:
-        f.write(vert)
-    print(f"  ✅ {pascal}Vertical.tsx")
+    emit(remotion_dir / f"{pascal}Vertical.tsx", vert, f"{pascal}Vertical.tsx")
 
     chrome = generate_vertical_chrome_tsx(pascal, cover, cover_still, config)
-    with open(remotion_dir / f"{pascal}VerticalChrome.tsx", "w", encoding="utf-8") as f:
-        f.write(chrome)
-    print(f"  ✅ {pascal}VerticalChrome.tsx")
+    emit(remotion_dir / f"{pascal}VerticalChrome.tsx", chrome, f"{pascal}VerticalChrome.tsx")
 
     entry = generate_entry_tsx(name, pascal)
-    with open(remotion_dir / f"{pascal}.tsx", "w", encoding="utf-8") as f:
-        f.write(entry)
-    print(f"  ✅ {pascal}.tsx（双 export）")
+    emit(remotion_dir / f"{pascal}.tsx", entry, f"{pascal}.tsx（双 export）")
 
     cover_props_path = remotion_dir / f"{pascal}CoverProps.ts"
     cover_stills_path = remotion_dir / f"{pascal}CoverStills.tsx"
     if cover_still:
-        with open(cover_props_path, "w", encoding="utf-8") as f:
-            f.write(generate_cover_props_tsx(pascal, cover_still))
-        print(f"  ✅ {pascal}CoverProps.ts")
-        with open(cover_stills_path, "w", encoding="utf-8") as f:
-            f.write(generate_cover_stills_tsx(pascal))
-        print(f"  ✅ {pascal}CoverStills.tsx")
+        emit(cover_props_path, generate_cover_props_tsx(pascal, cover_still), f"{pascal}CoverProps.ts")
+        emit(cover_stills_path, generate_cover_stills_tsx(pascal), f"{pascal}CoverStills.tsx")
     else:
-        if cover_props_path.exists():
-            cover_props_path.unlink()
+        if writer.remove(cover_props_path) and not writer.check:
             print(f"  🗑️ 已删除 {pascal}CoverProps.ts（cover 无有效 title/subtitle）")
-        if cover_stills_path.exists():
-            cover_stills_path.unlink()
+        if writer.remove(cover_stills_path) and not writer.check:
             print(f"  🗑️ 已删除 {pascal}CoverStills.tsx")
 
-    # 更新 Root.tsx
+    # 注册 Composition（manifest + registry.gen.tsx）
     if not args.skip_root:
-        root_path = project_root / "src" / "Root.tsx"
-        if root_path.exists():
-            update_root_tsx(root_path, name, pascal, config, cover_still)
+        register_composition(remotions_dir, name, pascal, config, cover_still, writer)
+
+    print(f"\n{writer.summary()}")
+    if writer.check:
+        if writer.stale:
+            print("❌ 生成代码已过期，请重新运行 step4")
+            for path in writer.stale:
+                print(f"   - {path}")
+            return False
+        print("✅ 生成代码与 scene-scripts.json 一致")
+        return True
 
     print("\n✅ Remotion 代码生成完成（横屏 + 竖屏双入口）!")
     print(f"   📂 {remotion_dir}")
-    print(f"   Root：Composition「{pascal}」1920×1080、「{pascal}竖屏」1080×1920")
+    print(f"   注册表：Composition「{pascal}」1920×1080、「{pascal}竖屏」1080×1920")
     if cover_still:
         print(
             f"   封面 still：「{pascal}封面横屏」「{pascal}封面竖屏」"
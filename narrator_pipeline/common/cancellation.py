@@ -0,0 +1,123 @@
+"""
+协作式取消：Web 任务取消 / 超时时通知正在运行的 Step0/1 尽快停下。
+
+- CancelToken 由任务创建，经 run_step*_for_video → create_llm_runtime 挂到 LlmClient 上，
+  generate_with_retry 在每次请求前、重试等待中检查；各步骤在逐 scene / item 调用之间检查。
+- 进行中的 HTTP 请求：在辅助线程中发出，取消时立即放弃等待并关闭底层 client 断开连接。
+- JobCancelled 继承 BaseException（同 asyncio.CancelledError），不会被管线里的 `except Exception` 吞掉。
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+class JobCancelled(BaseException):
+    """任务已被取消（或超时）。"""
+
+
+class CancelToken:
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+        self.reason: str | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "任务已取消") -> bool:
+        """发出取消；返回是否为首次取消。已登记的中止回调（如关闭 HTTP client）随即执行。"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception:
+                pass
+        return True
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise JobCancelled(self.reason or "任务已取消")
+
+    def sleep(self, seconds: float) -> None:
+        """可被取消打断的 sleep。"""
+        if self._event.wait(seconds):
+            self.raise_if_cancelled()
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]) -> Iterator[None]:
+        """在 with 块内登记取消回调；进入时已取消则直接抛出 JobCancelled。"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                registered = True
+            else:
+                registered = False
+        if not registered:
+            self.raise_if_cancelled()
+        try:
+            yield
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+
+def check_cancelled(token: CancelToken | None) -> None:
+    """token 为 None（CLI 运行）时不做任何事。"""
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def run_cancellable(
+    fn: Callable[[], T],
+    token: CancelToken | None,
+    *,
+    abort: Callable[[], Any] | None = None,
+) -> T:
+    """
+    在辅助线程中执行阻塞调用 fn，调用方线程等待其完成或取消。
+    取消时调用 abort（如关闭 HTTP client）并抛 JobCancelled；fn 的迟到结果被丢弃。
+    """
+    if token is None:
+        return fn()
+    token.raise_if_cancelled()
+
+    done = threading.Event()
+    outcome: dict[str, Any] = {}
+    # 辅助线程沿用调用方上下文（如 Web 任务的日志路由）
+    ctx = contextvars.copy_context()
+
+    def target() -> None:
+        try:
+            outcome["value"] = ctx.run(fn)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    with token.on_cancel(done.set):
+        threading.Thread(target=target, name="llm-request", daemon=True).start()
+        done.wait()
+    if "value" not in outcome and "error" not in outcome:
+        if abort is not None:
+            try:
+                abort()
+            except Exception:
+                pass
+        token.raise_if_cancelled()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
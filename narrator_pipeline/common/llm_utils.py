@@ -5,6 +5,7 @@ from datetime import datetime
 from types import SimpleNamespace
 from typing import Any, Callable, Literal, Optional
 
+from .cancellation import CancelToken, check_cancelled, run_cancellable
 from .gemini_utils import parse_json_from_response  # re-export for compatibility
 
 LlmProvider = Literal["gemini", "deepseek", "mimo"]
@@ -15,6 +16,8 @@ class LlmClient:
     provider: LlmProvider
     raw: Any
     base_url: str | None = None
+    # Web 任务传入；generate_with_retry 据此中止请求与重试
+    cancel_token: CancelToken | None = None
 
 
 def _normalize_provider(value: Any) -> LlmProvider:
@@ -26,15 +29,26 @@ def _normalize_provider(value: Any) -> LlmProvider:
     return "gemini"
 
 
-def create_llm_client(config: dict, provider: Any | None = None) -> LlmClient:
+def resolve_llm_provider(config: dict, provider: Any | None = None) -> LlmProvider:
+    """显式 provider 优先，否则读 config.llm_provider（与 create_llm_client 的选择一致）。"""
+    return _normalize_provider(provider if provider is not None else config.get("llm_provider", "gemini"))
+
+
+def create_llm_client(
+    config: dict,
+    provider: Any | None = None,
+    *,
+    cancel_token: CancelToken | None = None,
+) -> LlmClient:
     """
     根据 config 创建 LLM Client（Gemini / DeepSeek）。
     - Gemini: 需要环境变量 GEMINI_API_KEY
     - DeepSeek(OpenAI兼容): 需要环境变量 DEEPSEEK_API_KEY
+    - cancel_token: 取消后该 client 发出的请求立即中止（client 随之关闭，不再复用）
     """
     import os
 
-    resolved = _normalize_provider(provider if provider is not None else config.get("llm_provider", "gemini"))
+    resolved = resolve_llm_provider(config, provider)
 
     if resolved == "deepseek":
         from openai import OpenAI
@@ -44,7 +58,7 @@ def create_llm_client(config: dict, provider: Any | None = None) -> LlmClient:
             raise ValueError("未设置 DEEPSEEK_API_KEY，请在 .env 中配置")
         base_url = str(config.get("deepseek_base_url", "https://api.deepseek.com")).strip() or "https://api.deepseek.com"
         client = OpenAI(api_key=api_key, base_url=base_url)
-        return LlmClient(provider="deepseek", raw=client, base_url=base_url)
+        return LlmClient(provider="deepseek", raw=client, base_url=base_url, cancel_token=cancel_token)
 
     if resolved == "mimo":
         from openai import OpenAI
@@ -54,7 +68,7 @@ def create_llm_client(config: dict, provider: Any | None = None) -> LlmClient:
             raise ValueError("未设置 MIMO_API_KEY，请在 .env 中配置")
         base_url = str(config.get("mimo_base_url", "https://api.xiaomimimo.com/v1")).strip() or "https://api.xiaomimimo.com/v1"
         client = OpenAI(api_key=api_key, base_url=base_url)
-        return LlmClient(provider="mimo", raw=client, base_url=base_url)
+        return LlmClient(provider="mimo", raw=client, base_url=base_url, cancel_token=cancel_token)
 
     # default: gemini
     from google import genai
@@ -63,7 +77,7 @@ def create_llm_client(config: dict, provider: Any | None = None) -> LlmClient:
     if not api_key:
         raise ValueError("未设置 GEMINI_API_KEY，请在 .env 中配置")
     client = genai.Client(api_key=api_key)
-    return LlmClient(provider="gemini", raw=client)
+    return LlmClient(provider="gemini", raw=client, cancel_token=cancel_token)
 
 
 def _log_request(
@@ -196,32 +210,49 @@ def generate_with_retry(
     *,
     deepseek_reasoning_effort: Optional[str] = None,
     deepseek_thinking_enabled: Optional[bool] = None,
+    cancel_token: CancelToken | None = None,
 ):
     """
     带指数退避的 LLM 请求重试封装。
     - 返回值需兼容旧代码：具有 `.text` 字段（供 parse_json_from_response 解析）
+    - cancel_token（缺省取 client.cancel_token）：每次请求前与重试等待中检查，进行中的请求随取消中止，
+      抛 JobCancelled
     """
     provider = getattr(client, "provider", "gemini")
+    token = cancel_token if cancel_token is not None else getattr(client, "cancel_token", None)
+    check_cancelled(token)
     _log_request(prompt, model, provider, retries, append_ai_log)
 
+    raw = client.raw
+    abort = getattr(raw, "close", None)
+
     for attempt in range(retries):
+        check_cancelled(token)
         try:
             if provider == "deepseek":
                 reasoning_effort = deepseek_reasoning_effort or "high"
                 thinking_enabled = True if deepseek_thinking_enabled is None else bool(deepseek_thinking_enabled)
-                result = _call_openai_compatible(
-                    provider, client.raw, model, prompt,
-                    reasoning_effort=reasoning_effort,
-                    thinking_enabled=thinking_enabled,
+                result = run_cancellable(
+                    lambda: _call_openai_compatible(
+                        provider, raw, model, prompt,
+                        reasoning_effort=reasoning_effort,
+                        thinking_enabled=thinking_enabled,
+                    ),
+                    token,
+                    abort=abort,
                 )
                 _log_response(result.text, attempt + 1, retries, append_ai_log)
                 return result
 
             if provider == "mimo":
-                result = _call_openai_compatible(
-                    provider, client.raw, model, prompt,
-                    reasoning_effort=None,
-                    thinking_enabled=None,
+                result = run_cancellable(
+                    lambda: _call_openai_compatible(
+                        provider, raw, model, prompt,
+                        reasoning_effort=None,
+                        thinking_enabled=None,
+                    ),
+                    token,
+                    abort=abort,
                 )
                 _log_response(result.text, attempt + 1, retries, append_ai_log)
                 return result
@@ -229,10 +260,14 @@ def generate_with_retry(
             # gemini
             from .gemini_utils import json_generate_config
 
-            resp = client.raw.models.generate_content(
-                model=model,
-                contents=prompt,
-                config=json_generate_config(),
+            resp = run_cancellable(
+                lambda: raw.models.generate_content(
+                    model=model,
+                    contents=prompt,
+                    config=json_generate_config(),
+                ),
+                token,
+                abort=abort,
             )
             response_text = getattr(resp, "text", "")
             _log_response(response_text, attempt + 1, retries, append_ai_log)
@@ -242,7 +277,10 @@ def generate_with_retry(
             _log_error(e, attempt + 1, retries, append_ai_log)
             if attempt < retries - 1:
                 print(f"   ⚠️ API请求异常 ({e})，2秒后进行第 {attempt + 1} 次重试...")
-                time.sleep(2 * (attempt + 1))
+                if token is not None:
+                    token.sleep(2 * (attempt + 1))
+                else:
+                    time.sleep(2 * (attempt + 1))
             else:
                 raise
 
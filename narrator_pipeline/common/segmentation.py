@@ -0,0 +1,95 @@
+"""
+口播文本分句引擎：一条预编译正则单遍切分，返回带绝对字符偏移的 Segment。
+
+规则（与历史 split_text_to_content 一致）：
+- 遇到分句标点结束当前片段，标点留在片段末尾；不按字数截断（可选 max_chars 硬切）。
+- 标点后紧跟的收尾符号（”、」、）等，允许前置空白）并入当前片段；
+  若其后直到文本末尾只剩空白，也一并并入，避免出现单独的 `”` 片段。
+- 与原实现唯一的差别：标点与收尾符号之间有空白时，空白随收尾符号并入上一片段（原实现把空白留在下一片段开头，
+  导致拼合后与原文不一致）。
+
+各片段首尾相接：segments[i].end == segments[i + 1].start，拼合等于原文。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import NamedTuple
+
+# 遇到下列字符时结束当前片段（字符保留在片段末尾）
+SPLIT_PUNCTUATIONS: frozenset[str] = frozenset("，,。！？!?;；…、：:—")
+
+# 收尾符号：片段开头的这些字符归入上一片段
+CLOSING_CHARS: frozenset[str] = frozenset(
+    "”’"  # ” ’
+    "」』"  # 」 』
+    "）)］]｝}】"  # 全角/ASCII 右括号、右方括号、右花括号、右白角括号
+)
+
+
+def _class_body(chars: frozenset[str]) -> str:
+    return "".join(re.escape(c) for c in sorted(chars))
+
+
+_P = _class_body(SPLIT_PUNCTUATIONS)
+_C = _class_body(CLOSING_CHARS)
+
+# 非标点串 + 标点 + 可选收尾符号（其后只剩空白时吞到末尾）；或末尾不带标点的尾段
+SEGMENT_PATTERN = re.compile(rf"[^{_P}]*[{_P}](?:\s*[{_C}]+(?:\s*\Z)?)?|[^{_P}]+\Z")
+
+
+class Segment(NamedTuple):
+    """text == source[start - base:end - base]；start/end 为在整段场景/口播文本中的绝对偏移。"""
+
+    text: str
+    start: int
+    end: int
+
+
+def split_pieces(text: str, *, max_chars: int | None = None) -> list[str]:
+    """只要片段文本时的快速路径（不构造 Segment）。"""
+    if not text:
+        return []
+    pieces = SEGMENT_PATTERN.findall(text)
+    if max_chars and max_chars > 0 and any(len(p) > max_chars for p in pieces):
+        pieces = [p[i:i + max_chars] for p in pieces for i in range(0, len(p), max_chars)]
+    return pieces
+
+
+def segment_text(text: str, *, base: int = 0, max_chars: int | None = None) -> list[Segment]:
+    """
+    切分 text；base 为 text 在所属整段文本中的起始偏移（如 item 在场景文本中的位置）。
+    max_chars 为正数时，超长片段按该长度硬切（默认不截断）。
+    """
+    out: list[Segment] = []
+    pos = base
+    for piece in split_pieces(text, max_chars=max_chars):
+        end = pos + len(piece)
+        out.append(Segment(piece, pos, end))
+        pos = end
+    return out
+
+
+def first_misalignment(texts: list[str], source: str) -> int | None:
+    """返回 texts 顺序拼合与 source 第一次不一致的字符偏移；完全一致返回 None。"""
+    pos = 0
+    for t in texts:
+        if source.startswith(t, pos):
+            pos += len(t)
+            continue
+        limit = min(len(t), len(source) - pos)
+        i = 0
+        while i < limit and t[i] == source[pos + i]:
+            i += 1
+        return pos + i
+    return None if pos == len(source) else pos
+
+
+def segments_contiguous(segments: list[Segment], start: int, end: int) -> bool:
+    """片段按偏移首尾相接且恰好覆盖 [start, end)：每段 O(1) 比较，无需重建字符串。"""
+    pos = start
+    for seg in segments:
+        if seg.start != pos or seg.end - seg.start != len(seg.text):
+            return False
+        pos = seg.end
+    return pos == end
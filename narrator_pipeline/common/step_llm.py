@@ -1,6 +1,7 @@
 """Step0 / Step1 共用的 LLM 运行时配置。"""
 
 from narrator_pipeline.contracts.template_registry import generate_ai_prompt_guide
+from narrator_pipeline.common.cancellation import CancelToken
 from narrator_pipeline.common.llm_utils import create_llm_client
 
 
@@ -9,9 +10,10 @@ def create_llm_runtime(
     *,
     llm_provider: str | None = None,
     llm_model: str | None = None,
+    cancel_token: CancelToken | None = None,
 ) -> tuple:
-    """返回 (client, model, provider, template_guide)。"""
-    client = create_llm_client(config, provider=llm_provider)
+    """返回 (client, model, provider, template_guide)。cancel_token 挂到 client 上，供 generate_with_retry 检查。"""
+    client = create_llm_client(config, provider=llm_provider, cancel_token=cancel_token)
 
     provider = str(getattr(client, "provider", "gemini")).lower().strip()
     if llm_model and str(llm_model).strip():
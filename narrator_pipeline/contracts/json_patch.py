@@ -0,0 +1,167 @@
+"""
+JSON Patch（RFC 6902）与 JSON Pointer（RFC 6901）：Studio 对 scene-scripts 的增量保存。
+
+apply_patch 不改动传入文档：只浅拷贝从根到被改节点路径上的容器，未触及的子树与原文档共享，
+因此可以直接作用在 script_store 的共享缓存对象上（不必整份 deepcopy）。
+被改动过的 item 在结果中一定是新对象，调用方可按 id 对比找出需要重新校验的 item。
+"""
+
+from __future__ import annotations
+
+import copy as _copy
+from typing import Any
+
+OPS = frozenset({"add", "remove", "replace", "move", "copy", "test"})
+
+
+class JsonPatchError(ValueError):
+    """补丁格式非法、路径不存在或 test 不通过。"""
+
+
+def parse_pointer(pointer: str) -> list[str]:
+    if not isinstance(pointer, str):
+        raise JsonPatchError(f"JSON Pointer 必须是字符串: {pointer!r}")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"JSON Pointer 必须以 / 开头: {pointer!r}")
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def format_pointer(tokens: list[str | int]) -> str:
+    return "".join("/" + str(t).replace("~", "~0").replace("/", "~1") for t in tokens)
+
+
+def _index(container: list, token: str, pointer: str, *, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise JsonPatchError(f"非法数组下标 {token!r}: {pointer}")
+    idx = int(token)
+    if idx > len(container) or (idx == len(container) and not allow_end):
+        raise JsonPatchError(f"数组下标越界 {idx}: {pointer}")
+    return idx
+
+
+def _get(node: Any, tokens: list[str], pointer: str) -> Any:
+    for token in tokens:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"路径不存在: {pointer}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_index(node, token, pointer, allow_end=False)]
+        else:
+            raise JsonPatchError(f"路径不存在: {pointer}")
+    return node
+
+
+class _Patcher:
+    def __init__(self, doc: Any):
+        self.root = doc
+        # 本次补丁新建的容器（可就地改写）；保留引用，避免 id 被回收复用
+        self._owned: dict[int, Any] = {}
+
+    def _own(self, node: Any) -> Any:
+        if id(node) in self._owned:
+            return node
+        node = dict(node) if isinstance(node, dict) else list(node)
+        self._owned[id(node)] = node
+        return node
+
+    def _parent(self, tokens: list[str], pointer: str) -> Any:
+        """返回 tokens[:-1] 指向的容器（路径上的容器均已替换为可写副本）。"""
+        if not isinstance(self.root, (dict, list)):
+            raise JsonPatchError(f"路径不存在: {pointer}")
+        self.root = node = self._own(self.root)
+        for token in tokens[:-1]:
+            if isinstance(node, dict):
+                if token not in node:
+                    raise JsonPatchError(f"路径不存在: {pointer}")
+                key: Any = token
+            else:
+                key = _index(node, token, pointer, allow_end=False)
+            child = node[key]
+            if not isinstance(child, (dict, list)):
+                raise JsonPatchError(f"路径不存在: {pointer}")
+            node[key] = child = self._own(child)
+            node = child
+        return node
+
+    def add(self, pointer: str, value: Any) -> None:
+        tokens = parse_pointer(pointer)
+        if not tokens:
+            self.root = value
+            return
+        parent = self._parent(tokens, pointer)
+        if isinstance(parent, dict):
+            parent[tokens[-1]] = value
+        else:
+            parent.insert(_index(parent, tokens[-1], pointer, allow_end=True), value)
+
+    def remove(self, pointer: str) -> Any:
+        tokens = parse_pointer(pointer)
+        if not tokens:
+            raise JsonPatchError("不能删除文档根节点")
+        parent = self._parent(tokens, pointer)
+        if isinstance(parent, dict):
+            if tokens[-1] not in parent:
+                raise JsonPatchError(f"路径不存在: {pointer}")
+            return parent.pop(tokens[-1])
+        return parent.pop(_index(parent, tokens[-1], pointer, allow_end=False))
+
+    def replace(self, pointer: str, value: Any) -> None:
+        tokens = parse_pointer(pointer)
+        if not tokens:
+            self.root = value
+            return
+        parent = self._parent(tokens, pointer)
+        if isinstance(parent, dict):
+            if tokens[-1] not in parent:
+                raise JsonPatchError(f"路径不存在: {pointer}")
+            parent[tokens[-1]] = value
+        else:
+            parent[_index(parent, tokens[-1], pointer, allow_end=False)] = value
+
+    def get(self, pointer: str) -> Any:
+        return _get(self.root, parse_pointer(pointer), pointer)
+
+    def apply(self, op: Any, position: int) -> None:
+        if not isinstance(op, dict):
+            raise JsonPatchError(f"第 {position} 个操作不是对象")
+        kind = op.get("op")
+        if kind not in OPS:
+            raise JsonPatchError(f"第 {position} 个操作的 op 非法: {kind!r}")
+        if "path" not in op:
+            raise JsonPatchError(f"第 {position} 个操作缺少 path")
+        path = op["path"]
+        if kind in ("add", "replace", "test") and "value" not in op:
+            raise JsonPatchError(f"第 {position} 个操作（{kind}）缺少 value")
+        if kind in ("move", "copy") and "from" not in op:
+            raise JsonPatchError(f"第 {position} 个操作（{kind}）缺少 from")
+
+        if kind == "add":
+            self.add(path, op["value"])
+        elif kind == "remove":
+            self.remove(path)
+        elif kind == "replace":
+            self.replace(path, op["value"])
+        elif kind == "move":
+            src = op["from"]
+            if path != src and path.startswith(src + "/"):
+                raise JsonPatchError(f"不能把 {src} 移动到其子路径 {path}")
+            self.add(path, self.remove(src))
+        elif kind == "copy":
+            self.add(path, _copy.deepcopy(self.get(op["from"])))
+        elif self.get(path) != op["value"]:
+            raise JsonPatchError(f"test 不通过: {path}")
+
+
+def apply_patch(doc: Any, ops: list[dict]) -> Any:
+    """按顺序应用 ops，返回新文档（doc 本身不变）；任一操作失败抛 JsonPatchError，整个补丁不生效。"""
+    if not isinstance(ops, list):
+        raise JsonPatchError("补丁必须是操作数组")
+    patcher = _Patcher(doc)
+    for i, op in enumerate(ops):
+        patcher.apply(op, i)
+    return patcher.root
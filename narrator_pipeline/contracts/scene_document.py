@@ -0,0 +1,270 @@
+"""
+scene-scripts.json 的内存文档模型：Scene / Item / ContentSegment 为 __slots__ 视图类，直接包装原始 dict，
+读写都落在原 dict 上，因此 to_dict() 与 JSON 契约逐字节往返（键顺序、未知字段均保留）。
+
+索引：
+- (sceneId, order) → Item
+- template → [Item]
+- task_key → [(Item, 图片任务)]（按模板 param_schema 遍历 image_prompt 叶子，首次访问时构建）
+
+同一进程内的各步骤通过 load_scene_document(path) 共享同一实例（按 mtime/size 校验磁盘是否变化）；
+只在内存中临时改写、不落盘的调用方（如 Step4 注入预览帧）应使用 snapshot() 的副本。
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import threading
+from pathlib import Path
+from typing import Any, Iterator
+
+from narrator_pipeline.contracts.param_schema_tools import iter_image_prompt_tasks
+from narrator_pipeline.contracts.script_store import SCRIPT_STORE, loads_script, read_json, write_json
+from narrator_pipeline.contracts.template_registry import get_template
+
+DEFAULT_TEMPLATE = "CENTER_FOCUS"
+
+
+class ContentSegment:
+    """item.content 中的一句口播。"""
+
+    __slots__ = ("raw", "index")
+
+    def __init__(self, raw: dict, index: int):
+        self.raw = raw
+        self.index = index
+
+    @property
+    def text(self) -> str:
+        return str(self.raw.get("text", ""))
+
+    @property
+    def start_frame(self) -> int | None:
+        return self.raw.get("startFrame")
+
+    @property
+    def duration_frames(self) -> int | None:
+        return self.raw.get("durationFrames")
+
+    def __repr__(self) -> str:
+        return f"ContentSegment({self.index}, {self.text[:20]!r})"
+
+
+class Item:
+    """场景中的一个模板 item。"""
+
+    __slots__ = ("raw", "scene", "index", "content", "_image_tasks")
+
+    def __init__(self, raw: dict, scene: Scene, index: int):
+        self.raw = raw
+        self.scene = scene
+        self.index = index
+        content = raw.get("content")
+        self.content = [
+            ContentSegment(c, i) for i, c in enumerate(content) if isinstance(c, dict)
+        ] if isinstance(content, list) else []
+        self._image_tasks: list[dict] | None = None
+
+    @property
+    def order(self) -> Any:
+        return self.raw.get("order")
+
+    @property
+    def key(self) -> tuple[str, Any]:
+        return (self.scene.scene_id, self.order)
+
+    @property
+    def template(self) -> str:
+        return self.raw.get("template", DEFAULT_TEMPLATE)
+
+    @property
+    def param(self) -> dict:
+        """param 非对象时返回空 dict（不写回 raw）。"""
+        param = self.raw.get("param")
+        return param if isinstance(param, dict) else {}
+
+    @property
+    def schema(self) -> dict:
+        schema = get_template(self.template).get("param_schema") or {}
+        return schema if isinstance(schema, dict) else {}
+
+    @property
+    def image_tasks(self) -> list[dict]:
+        """全部 image_prompt 叶子任务（含已生成的 images/ 路径），缓存到 param 被改写为止。"""
+        if self._image_tasks is None:
+            self._image_tasks = iter_image_prompt_tasks(
+                self.param,
+                self.schema,
+                scene_id=self.scene.scene_id,
+                order=self.order,
+                include_generated=True,
+            )
+        return self._image_tasks
+
+    def invalidate(self) -> None:
+        self._image_tasks = None
+
+    def __repr__(self) -> str:
+        return f"Item({self.scene.scene_id!r}, {self.order!r}, {self.template})"
+
+
+class Scene:
+    __slots__ = ("raw", "index", "items")
+
+    def __init__(self, raw: dict, index: int):
+        self.raw = raw
+        self.index = index
+        items = raw.get("items")
+        self.items = [
+            Item(it, self, i) for i, it in enumerate(items) if isinstance(it, dict)
+        ] if isinstance(items, list) else []
+
+    @property
+    def scene_id(self) -> str:
+        return str(self.raw.get("sceneId", ""))
+
+    @property
+    def scene_name(self) -> str:
+        return str(self.raw.get("sceneName", ""))
+
+    def __repr__(self) -> str:
+        return f"Scene({self.scene_id!r}, {len(self.items)} items)"
+
+
+class SceneDocument:
+    __slots__ = ("raw", "scenes", "_by_key", "_by_template", "_by_task_key")
+
+    def __init__(self, raw: dict):
+        if not isinstance(raw, dict):
+            raise ValueError("scene-scripts.json 根节点必须是对象")
+        self.raw = raw
+        self.reindex()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> SceneDocument:
+        return cls(data)
+
+    @classmethod
+    def load(cls, path: Path) -> SceneDocument:
+        """直接从磁盘解析（不经过进程内共享缓存）。"""
+        return cls(loads_script(Path(path).read_bytes()))
+
+    def reindex(self) -> None:
+        """场景 / item 结构变化（增删、改 order / template）后重建索引。"""
+        scenes = self.raw.get("scenes")
+        self.scenes = [
+            Scene(s, i) for i, s in enumerate(scenes) if isinstance(s, dict)
+        ] if isinstance(scenes, list) else []
+        self._by_key: dict[tuple[str, Any], Item] = {}
+        self._by_template: dict[str, list[Item]] = {}
+        for item in self.iter_items():
+            self._by_key.setdefault(item.key, item)
+            self._by_template.setdefault(item.template, []).append(item)
+        self._by_task_key: dict[str, list[tuple[Item, dict]]] | None = None
+
+    # ── 访问 ──
+
+    def iter_items(self, scene_filter: str | None = None) -> Iterator[Item]:
+        for scene in self.scenes:
+            if scene_filter and scene.scene_id != scene_filter:
+                continue
+            yield from scene.items
+
+    def item(self, scene_id: str, order: Any) -> Item | None:
+        return self._by_key.get((str(scene_id), order))
+
+    def items_by_template(self, template: str) -> list[Item]:
+        return list(self._by_template.get(template, ()))
+
+    def template_counts(self) -> dict[str, int]:
+        return {name: len(items) for name, items in self._by_template.items()}
+
+    def _task_index(self) -> dict[str, list[tuple[Item, dict]]]:
+        if self._by_task_key is None:
+            index: dict[str, list[tuple[Item, dict]]] = {}
+            for item in self.iter_items():
+                for task in item.image_tasks:
+                    index.setdefault(task["task_key"], []).append((item, task))
+            self._by_task_key = index
+        return self._by_task_key
+
+    def image_tasks(self, task_key: str) -> list[tuple[Item, dict]]:
+        return list(self._task_index().get(task_key, ()))
+
+    # ── 改写 ──
+
+    def set_image_result(self, task_key: str, value: str) -> int:
+        """把 task_key 对应的 image_prompt 叶子（尚未生成的）改写为图片路径，返回改写的字段数。"""
+        changed = 0
+        for item, task in self._task_index().get(task_key, ()):
+            if task["already_generated"] or not task["path"]:
+                continue
+            path = task["path"]
+            parent = item.param
+            for segment in path[:-1]:
+                parent = parent[segment] if isinstance(parent, (dict, list)) else None
+            if isinstance(path[-1], str) and isinstance(parent, dict):
+                parent[path[-1]] = value
+                changed += 1
+        return changed
+
+    def commit_image_results(self) -> None:
+        """set_image_result 一批后调用：丢弃旧的任务缓存，下次访问按新值重建。"""
+        for item in self.iter_items():
+            item.invalidate()
+        self._by_task_key = None
+
+    # ── 序列化 ──
+
+    def to_dict(self) -> dict:
+        """原始 dict（与本文档共享，改动会反映到索引视图上）。"""
+        return self.raw
+
+    def snapshot(self) -> SceneDocument:
+        """深拷贝出独立文档，供只在内存中改写、不落盘的调用方使用。"""
+        return SceneDocument(copy.deepcopy(self.raw))
+
+    def dumps(self) -> str:
+        return json.dumps(self.raw, ensure_ascii=False, indent=2)
+
+    def save(self, path: Path) -> str:
+        """经 script_store 原子落盘（格式同 json.dump(indent=2, ensure_ascii=False)），登记为该路径的共享实例，返回新版本。"""
+        version = write_json(Path(path), self.raw)
+        _remember(path, self)
+        return version
+
+
+# ─────────────────────────────────────────────────────────────
+# 进程内共享实例（解析缓存由 script_store 负责，这里只复用同一份数据上的索引）
+# ─────────────────────────────────────────────────────────────
+
+_shared: dict[str, SceneDocument] = {}
+_shared_lock = threading.Lock()
+
+
+def _remember(path: Path, doc: SceneDocument) -> None:
+    with _shared_lock:
+        _shared[str(Path(path).resolve())] = doc
+
+
+def load_scene_document(path: Path) -> SceneDocument:
+    """
+    读取 scene-scripts.json；同一进程内文件未变化时返回同一实例（Step1 写出后 Step2/3/4 不再重复解析）。
+    文件被外部改写（mtime/size 变化）时重新解析。返回的实例为共享只读，需改写时用 snapshot()。
+    """
+    path = Path(path)
+    data = read_json(path)
+    key = str(path.resolve())
+    with _shared_lock:
+        doc = _shared.get(key)
+        if doc is None or doc.raw is not data:
+            doc = SceneDocument(data)
+            _shared[key] = doc
+    return doc
+
+
+def forget_scene_document(path: Path) -> None:
+    with _shared_lock:
+        _shared.pop(str(Path(path).resolve()), None)
+    SCRIPT_STORE.invalidate(path)
@@ -1,8 +1,8 @@
 """场景拆分草稿（scene-split-draft.json）读写与校验。"""
 
-import json
 from pathlib import Path
 
+from narrator_pipeline.contracts.script_store import read_json, write_json
 from narrator_pipeline.contracts.validation_errors import ScriptValidationError
 
 SCENE_SPLIT_DRAFT_FILENAME = "scene-split-draft.json"
@@ -44,15 +44,12 @@ def validate_scene_split_draft(draft: dict, *, path: Path) -> None:
 
 
 def save_scene_split_draft(draft: dict, path: Path) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(draft, f, ensure_ascii=False, indent=2)
+    write_json(path, draft)
 
 
 def load_scene_split_draft(path: Path) -> dict:
     if not path.is_file():
         raise ScriptValidationError(f"场景拆分草稿不存在: {path}", path=str(path))
-    with open(path, "r", encoding="utf-8") as f:
-        draft = json.load(f)
+    draft = read_json(path, copy=True)
     validate_scene_split_draft(draft, path=path)
     return draft
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+param_schema 编译器：把模板的 param_schema 预先编译为校验节点树，校验时不再逐次解析 $ref、规范化节点。
+
+- $ref 在编译期解析（递归 $defs 通过按节点内容记忆化收敛）
+- required / enum / minItems / maxItems / content_index 等在编译期取出
+- 告警文本与顺序和 param_schema_tools.validate_param_with_schema 完全一致
+
+schema 中存在无法解析的 $ref 或非对象节点时，退回原实现（其告警依赖运行时逐次解析）。
+编译结果按模板注册表版本缓存，模板热更新后自动失效。
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from typing import Any, Callable
+
+from narrator_pipeline.contracts.param_schema_tools import (
+	CONTENT_INDEX_FORMAT,
+	_normalize_schema_node,
+	validate_param_with_schema,
+)
+
+Warn = Callable[[str], None]
+
+
+class _Unsupported(Exception):
+	"""schema 含编译期无法等价处理的结构，改用原实现。"""
+
+
+# ─────────────────────────────────────────────────────────
+# 值校验节点：validate(val, path_s, warn, content_len)，val 已保证非 None
+# ─────────────────────────────────────────────────────────
+
+
+class _StringNode:
+	__slots__ = ("enum", "enum_set")
+
+	def __init__(self, enum: list | None) -> None:
+		self.enum = enum
+		self.enum_set = None
+		if enum:
+			try:
+				self.enum_set = frozenset(enum)
+			except TypeError:
+				self.enum_set = None
+
+	def validate(self, val: Any, path_s: str, warn: Warn, content_len: int) -> None:
+		if not isinstance(val, str):
+			warn(f"`{path_s}` 期望 string，已忽略类型错误归一化")
+			return
+		enum = self.enum
+		if enum:
+			ok = val in self.enum_set if self.enum_set is not None else val in enum
+			if not ok:
+				warn(f"`{path_s}` 值 {val!r} 非法，期望为 {enum!r}")
+
+
+class _IntegerNode:
+	__slots__ = ("content_index",)
+
+	def __init__(self, content_index: bool) -> None:
+		self.content_index = content_index
+
+	def validate(self, val: Any, path_s: str, warn: Warn, content_len: int) -> None:
+		if not isinstance(val, int):
+			warn(f"`{path_s}` 期望 integer")
+			return
+		if self.content_index and content_len > 0 and (val < 0 or val >= content_len):
+			warn(f"`{path_s}`={val!r} 超出 content 索引范围 [0,{content_len})")
+
+
+class _NumberNode:
+	__slots__ = ()
+
+	def validate(self, val: Any, path_s: str, warn: Warn, content_len: int) -> None:
+		if not isinstance(val, (int, float)):
+			warn(f"`{path_s}` 期望 number")
+
+
+class _BooleanNode:
+	__slots__ = ()
+
+	def validate(self, val: Any, path_s: str, warn: Warn, content_len: int) -> None:
+		return
+
+
+class _ArrayNode:
+	__slots__ = ("min_items", "max_items", "items")
+
+	def validate(self, val: Any, path_s: str, warn: Warn, content_len: int) -> None:
+		if not isinstance(val, list):
+			warn(f"`{path_s}` 期望 array")
+			return
+		n = len(val)
+		if self.min_items is not None and n < self.min_items:
+			warn(f"`{path_s}` 长度 {n} 少于 minItems={self.min_items}")
+		if self.max_items is not None and n > self.max_items:
+			warn(f"`{path_s}` 长度 {n} 多于 maxItems={self.max_items}")
+		items = self.items
+		for i, elem in enumerate(val):
+			if elem is not None:
+				items.validate(elem, f"{path_s}.{i}", warn, content_len)
+
+
+class _ObjectNode:
+	__slots__ = ("required", "props")
+
+	def validate(self, val: Any, path_s: str, warn: Warn, content_len: int) -> None:
+		if not isinstance(val, dict):
+			warn(f"`{path_s}` 期望 object")
+			return
+		for rk, check in self.required:
+			if rk not in val or check.is_empty(val.get(rk)):
+				warn(f"`{path_s}.{rk}` 必填缺失或为空")
+		for key, node in self.props:
+			sub = val.get(key)
+			if sub is not None:
+				node.validate(sub, f"{path_s}.{key}", warn, content_len)
+
+
+class _OneOfNode:
+	__slots__ = ("branches",)
+
+	def validate(self, val: Any, path_s: str, warn: Warn, content_len: int) -> None:
+		for pytype, node in self.branches:
+			if isinstance(val, pytype):
+				node.validate(val, path_s, warn, content_len)
+				return
+		warn(f"`{path_s}` 不符合 schema oneOf 任一分支，实际为 {type(val).__name__}")
+
+
+class _MessageNode:
+	"""非法 oneOf / 未知 type：只输出固定告警。"""
+
+	__slots__ = ("suffix",)
+
+	def __init__(self, suffix: str) -> None:
+		self.suffix = suffix
+
+	def validate(self, val: Any, path_s: str, warn: Warn, content_len: int) -> None:
+		warn(f"`{path_s}` {self.suffix}")
+
+
+_ONEOF_PYTYPES = {"string": str, "array": list, "object": dict}
+
+
+# ─────────────────────────────────────────────────────────
+# 必填「空值」判定（对应 _is_empty_value / _nonempty_matches_oneof_branch）
+# ─────────────────────────────────────────────────────────
+
+
+class _EmptyCheck:
+	__slots__ = ("kind", "branches")
+
+	def is_empty(self, val: Any) -> bool:
+		if val is None:
+			return True
+		kind = self.kind
+		if kind == "string":
+			return isinstance(val, str) and not val.strip()
+		if kind == "never":
+			return False
+		if kind == "array":
+			return not isinstance(val, list) or len(val) == 0
+		if kind == "object":
+			return not isinstance(val, dict)
+		if kind == "oneOf":
+			return not any(br.nonempty(val) for br in self.branches)
+		if kind == "always":
+			return True
+		return val == "" or val == [] or val == {}
+
+
+class _NonEmptyBranch:
+	__slots__ = ("kind", "items_string", "required")
+
+	def nonempty(self, val: Any) -> bool:
+		kind = self.kind
+		if kind == "string":
+			return isinstance(val, str) and bool(val.strip())
+		if kind == "array":
+			if not isinstance(val, list) or len(val) == 0:
+				return False
+			if self.items_string:
+				return any(isinstance(x, str) and str(x).strip() for x in val)
+			return True
+		if kind == "object":
+			if not isinstance(val, dict):
+				return False
+			for rk, check in self.required:
+				if rk not in val or check.is_empty(val.get(rk)):
+					return False
+			return True
+		return False
+
+
+# ─────────────────────────────────────────────────────────
+# 编译
+# ─────────────────────────────────────────────────────────
+
+
+class _Compiler:
+	def __init__(self, root_schema: dict) -> None:
+		self.root = root_schema
+		self._nodes: dict[str, Any] = {}
+		self._empty: dict[tuple[str, bool], _EmptyCheck] = {}
+		self._branches: dict[str, _NonEmptyBranch] = {}
+
+	@staticmethod
+	def _key(schema: dict) -> str:
+		return json.dumps(schema, ensure_ascii=False, sort_keys=True, default=str)
+
+	def _resolve(self, schema: Any) -> dict:
+		"""与 _resolve_ref 相同的合并规则；无法解析即不支持编译。"""
+		if not isinstance(schema, dict):
+			raise _Unsupported("schema 节点不是对象")
+		ref = schema.get("$ref")
+		if not ref or not isinstance(ref, str):
+			return schema
+		if not ref.startswith("#/$defs/"):
+			raise _Unsupported(ref)
+		defs = self.root.get("$defs")
+		def_node = defs.get(ref[len("#/$defs/") :]) if isinstance(defs, dict) else None
+		if not isinstance(def_node, dict):
+			raise _Unsupported(ref)
+		rest = {k: v for k, v in schema.items() if k != "$ref"}
+		return {**def_node, **rest}
+
+	def node(self, schema: Any):
+		if not isinstance(schema, dict):
+			raise _Unsupported("schema 节点不是对象")
+		key = self._key(schema)
+		cached = self._nodes.get(key)
+		if cached is not None:
+			return cached
+		s = _normalize_schema_node(self._resolve(schema))
+
+		if "oneOf" in s:
+			branches = s.get("oneOf")
+			if not isinstance(branches, list) or not branches:
+				return self._remember(key, _MessageNode("schema oneOf 非法"))
+			node = self._remember(key, _OneOfNode())
+			compiled = []
+			for br in branches:
+				if not isinstance(br, dict):
+					continue
+				rb = _normalize_schema_node(self._resolve(br))
+				pytype = _ONEOF_PYTYPES.get(rb.get("type"))
+				if pytype is not None:
+					compiled.append((pytype, rb))
+			node.branches = tuple((pytype, self.node(rb)) for pytype, rb in compiled)
+			return node
+
+		st = s.get("type")
+		if st == "string":
+			enum = s.get("enum")
+			return self._remember(key, _StringNode(enum if enum and isinstance(enum, list) else None))
+		if st == "integer":
+			return self._remember(key, _IntegerNode(s.get("format") == CONTENT_INDEX_FORMAT))
+		if st == "number":
+			return self._remember(key, _NumberNode())
+		if st == "boolean":
+			return self._remember(key, _BooleanNode())
+		if st == "array":
+			node = self._remember(key, _ArrayNode())
+			mi, ma = s.get("minItems"), s.get("maxItems")
+			node.min_items = mi if isinstance(mi, int) else None
+			node.max_items = ma if isinstance(ma, int) else None
+			node.items = self.node(s.get("items") or {})
+			return node
+		if st == "object":
+			node = self._remember(key, _ObjectNode())
+			props = self._props(s)
+			node.required = self._required(s, props, normalized=True)
+			node.props = tuple((k, self.node(sub)) for k, sub in props.items())
+			return node
+		return self._remember(key, _MessageNode(f"未知 schema.type={st!r}"))
+
+	def _remember(self, key: str, node):
+		# 先登记再编译子节点，递归 $defs 可命中自身
+		self._nodes[key] = node
+		return node
+
+	@staticmethod
+	def _props(schema: dict) -> dict:
+		props = schema.get("properties") or {}
+		if not isinstance(props, dict):
+			raise _Unsupported("properties 不是对象")
+		return props
+
+	def _required(self, schema: dict, props: dict, *, normalized: bool) -> tuple:
+		out = []
+		for rk in schema.get("required") or []:
+			sub = props.get(rk, {}) if isinstance(props.get(rk), dict) else {}
+			out.append((rk, self.empty_check(sub, normalized=normalized)))
+		return tuple(out)
+
+	def empty_check(self, schema: dict, *, normalized: bool) -> _EmptyCheck:
+		"""normalized=True 表示 schema 来自已规范化的父节点（原实现中先规范化、再解析 $ref）。"""
+		key = (self._key(schema), normalized)
+		cached = self._empty.get(key)
+		if cached is not None:
+			return cached
+		check = _EmptyCheck()
+		self._empty[key] = check
+		check.branches = ()
+		s = self._resolve(_normalize_schema_node(schema) if normalized else schema)
+		if "oneOf" in s:
+			branches = s.get("oneOf")
+			if not isinstance(branches, list):
+				check.kind = "always"
+			else:
+				check.kind = "oneOf"
+				check.branches = tuple(
+					self._nonempty_branch(br) for br in branches if isinstance(br, dict)
+				)
+			return check
+		st = s.get("type")
+		if st == "string":
+			check.kind = "string"
+		elif st in ("number", "integer", "boolean"):
+			check.kind = "never"
+		elif st in ("array", "object"):
+			check.kind = st
+		else:
+			check.kind = "literal"
+		return check
+
+	def _nonempty_branch(self, br: dict) -> _NonEmptyBranch:
+		key = self._key(br)
+		cached = self._branches.get(key)
+		if cached is not None:
+			return cached
+		branch = _NonEmptyBranch()
+		self._branches[key] = branch
+		branch.items_string = False
+		branch.required = ()
+		s = _normalize_schema_node(self._resolve(br))
+		st = s.get("type")
+		branch.kind = st if st in ("string", "array", "object") else "other"
+		if st == "array":
+			items = s.get("items") or {}
+			if isinstance(items, dict):
+				items = self._resolve(items)
+			branch.items_string = items.get("type") == "string"
+		elif st == "object":
+			branch.required = self._required(s, self._props(s), normalized=True)
+		return branch
+
+
+class CompiledParamSchema:
+	"""单个模板 param_schema 的编译结果。"""
+
+	__slots__ = ("schema", "_required", "_props")
+
+	def __init__(self, schema: dict) -> None:
+		self.schema = schema
+		compiler = _Compiler(schema)
+		props = compiler._props(schema)
+		# 根节点 required 判定使用原始（未规范化）子 schema，与原实现一致
+		self._required = compiler._required(schema, props, normalized=False)
+		self._props = tuple((k, compiler.node(sub)) for k, sub in props.items())
+
+	def validate(self, param: dict, *, content_len: int, warn: Warn) -> None:
+		content_len = content_len or 0
+		for rk, check in self._required:
+			if rk not in param or check.is_empty(param.get(rk)):
+				warn(f"必填字段 `{rk}` 缺失或为空")
+		for key, node in self._props:
+			val = param.get(key)
+			if val is not None:
+				node.validate(val, key, warn, content_len)
+
+
+class _FallbackParamSchema:
+	"""无法编译的 schema：直接调用原实现。"""
+
+	__slots__ = ("schema",)
+
+	def __init__(self, schema: dict) -> None:
+		self.schema = schema
+
+	def validate(self, param: dict, *, content_len: int, warn: Warn) -> None:
+		validate_param_with_schema(param, self.schema, content_len=content_len, warn=warn)
+
+
+def compile_param_schema(schema: dict) -> CompiledParamSchema | _FallbackParamSchema:
+	if not isinstance(schema, dict) or schema.get("type") != "object":
+		return _FallbackParamSchema(schema)
+	try:
+		return CompiledParamSchema(schema)
+	except _Unsupported:
+		return _FallbackParamSchema(schema)
+
+
+# ─────────────────────────────────────────────────────────
+# 缓存：按 schema 对象身份缓存，注册表版本变化时整体清空
+# ─────────────────────────────────────────────────────────
+
+_CACHE_MAX = 256
+_cache: dict[int, CompiledParamSchema | _FallbackParamSchema] = {}
+_cache_version: str | None = None
+_cache_lock = threading.Lock()
+
+
+def _registry_version() -> str:
+	from narrator_pipeline.contracts.template_registry import registry_version
+
+	return registry_version()
+
+
+def get_compiled_validator(schema: dict) -> CompiledParamSchema | _FallbackParamSchema:
+	global _cache_version
+	version = _registry_version()
+	sid = id(schema)
+	with _cache_lock:
+		if version != _cache_version or len(_cache) >= _CACHE_MAX:
+			_cache.clear()
+			_cache_version = version
+		compiled = _cache.get(sid)
+		# 缓存项持有 schema 引用，id 不会被复用；身份校验防止外部构造的临时 schema 误命中
+		if compiled is not None and compiled.schema is schema:
+			return compiled
+	compiled = compile_param_schema(schema)
+	with _cache_lock:
+		_cache[sid] = compiled
+	return compiled
+
+
+def validate_param_compiled(
+	param: dict,
+	schema: dict,
+	*,
+	content_len: int,
+	warn: Warn,
+) -> None:
+	"""与 validate_param_with_schema 相同的告警，使用缓存的编译结果。"""
+	if not schema or schema.get("type") != "object":
+		if schema:
+			warn("param_schema 根节点应为 type=object")
+		return
+	get_compiled_validator(schema).validate(param, content_len=content_len, warn=warn)
@@ -0,0 +1,337 @@
+"""
+scene-scripts.json / scene-split-draft.json 的统一读写入口。
+
+- 写入：同目录临时文件 + fsync + os.replace 原子替换，读方不会看到半截文件。
+- 读取：进程内解析缓存，按 (路径, mtime_ns, size) 校验；命中时返回同一对象，调用方只读（需要改写时传 copy=True）。
+- 并发：按项目（文件所在目录）加锁——进程内 RLock + 目录下 .scripts.lock 文件锁（fcntl / msvcrt），
+  update_json() 在锁内重新读取磁盘最新内容再修改写回，两个写方（如 Step3 回写与 Studio 保存）互不覆盖。
+- 版本：内容 sha256 前 16 位；write_json(expected_version=...) 不一致时抛 ScriptVersionConflict。
+- 派生：derive_json() 把由内容计算出的只读结果（如 Studio 脚本大纲）记在缓存条目上，每个版本只算一次。
+- 装有 orjson 时用其解析（失败回退标准库）；写出格式始终与 json.dump(indent=2, ensure_ascii=False) 一致。
+"""
+
+from __future__ import annotations
+
+import copy as _copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+LOCK_FILENAME = ".scripts.lock"
+# 进程内最多缓存的文件数（web 端列出项目时会读到所有项目）
+MAX_CACHED_FILES = 128
+
+
+class ScriptVersionConflict(Exception):
+    """写入时磁盘内容已不是调用方读取时的版本。"""
+
+    def __init__(self, path: Path, expected: str, actual: str | None):
+        super().__init__(f"{path} 已被修改（期望版本 {expected}，当前 {actual}）")
+        self.path = path
+        self.expected = expected
+        self.actual = actual
+
+
+def loads_script(raw: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # NaN / 超 64 位整数等 orjson 不接受的输入交给标准库（也给出标准错误信息）
+            pass
+    return json.loads(raw.decode("utf-8"))
+
+
+def dumps_script(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def content_version(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def _stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _replace(tmp: str, path: Path) -> None:
+    # Windows 上目标文件正被读取时 os.replace 可能短暂失败
+    for attempt in range(5):
+        try:
+            os.replace(tmp, path)
+            return
+        except PermissionError:
+            if attempt == 4:
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> tuple[int, int]:
+    """原子写入，返回写入文件的 (mtime_ns, size)。"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            # 替换不改变 mtime：取临时文件自身的戳，替换后他人再改写时戳必然不同
+            st = os.fstat(f.fileno())
+        _replace(tmp, path)
+        return (st.st_mtime_ns, st.st_size)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class _ProjectLock:
+    """同一项目目录的可重入锁：最外层持有时才加文件锁（同进程内多次 flock 会互相阻塞）。"""
+
+    __slots__ = ("dir", "rlock", "depth", "fh")
+
+    def __init__(self, directory: Path):
+        self.dir = directory
+        self.rlock = threading.RLock()
+        self.depth = 0
+        self.fh = None
+
+    def acquire(self) -> None:
+        self.rlock.acquire()
+        self.depth += 1
+        if self.depth > 1:
+            return
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self.fh = open(self.dir / LOCK_FILENAME, "a+b")
+            if fcntl is not None:
+                fcntl.flock(self.fh.fileno(), fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                self.fh.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self.fh.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK 重试约 10 秒后仍未拿到锁，继续等待
+                        continue
+        except BaseException:
+            self._close()
+            self.depth -= 1
+            self.rlock.release()
+            raise
+
+    def release(self) -> None:
+        self.depth -= 1
+        if self.depth == 0:
+            self._close()
+        self.rlock.release()
+
+    def _close(self) -> None:
+        if self.fh is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.fh.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                self.fh.seek(0)
+                msvcrt.locking(self.fh.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        finally:
+            self.fh.close()
+            self.fh = None
+
+
+class _Entry:
+    __slots__ = ("stamp", "data", "version", "derived")
+
+    def __init__(self, stamp: tuple[int, int], data: Any, version: str):
+        self.stamp = stamp
+        self.data = data
+        self.version = version
+        # 由 data 派生的只读结果（大纲等），随条目一起失效
+        self.derived: dict[str, Any] = {}
+
+
+class ScriptStore:
+    def __init__(self, max_entries: int = MAX_CACHED_FILES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._locks: dict[str, _ProjectLock] = {}
+        self._mutex = threading.Lock()
+
+    # ── 锁 ──
+
+    @contextmanager
+    def lock(self, path: Path) -> Iterator[None]:
+        """按项目（文件所在目录）加锁；可重入。"""
+        directory = Path(path).resolve().parent
+        with self._mutex:
+            plock = self._locks.setdefault(str(directory), _ProjectLock(directory))
+        plock.acquire()
+        try:
+            yield
+        finally:
+            plock.release()
+
+    # ── 缓存 ──
+
+    def _cached(self, key: str, stamp: tuple[int, int] | None) -> _Entry | None:
+        with self._mutex:
+            entry = self._entries.get(key)
+            if entry is None or entry.stamp != stamp:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        with self._mutex:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, path: Path, key: str) -> _Entry:
+        """读取前后各取一次戳，一致才缓存：读取期间被其他进程替换时重读，避免旧内容挂在新戳下。"""
+        for _ in range(3):
+            before = _stamp(path)
+            if before is None:
+                raise FileNotFoundError(f"文件不存在: {path}")
+            raw = path.read_bytes()
+            entry = _Entry(before, loads_script(raw), content_version(raw))
+            if _stamp(path) == before:
+                self._remember(key, entry)
+                return entry
+        # 文件持续变化：本次结果不缓存
+        return entry
+
+    def invalidate(self, path: Path) -> None:
+        with self._mutex:
+            self._entries.pop(str(Path(path).resolve()), None)
+
+    # ── 读写 ──
+
+    def read_versioned(self, path: Path, *, copy: bool = False) -> tuple[Any, str]:
+        """返回 (内容, 版本)。copy=False 时内容为缓存共享对象，调用方不得改动。"""
+        path = Path(path)
+        key = str(path.resolve())
+        stamp = _stamp(path)
+        if stamp is None:
+            raise FileNotFoundError(f"文件不存在: {path}")
+        entry = self._cached(key, stamp) or self._load(path, key)
+        return (_copy.deepcopy(entry.data) if copy else entry.data), entry.version
+
+    def read(self, path: Path, *, copy: bool = False) -> Any:
+        return self.read_versioned(path, copy=copy)[0]
+
+    def derive(self, path: Path, key: str, fn: Callable[[Any], Any]) -> tuple[Any, str]:
+        """
+        返回 (fn(内容), 版本)：结果按缓存条目记忆，同一版本只计算一次，文件变化后重新计算。
+        fn 收到缓存共享对象，不得改动；返回值同样为共享对象。
+        """
+        path = Path(path)
+        key_path = str(path.resolve())
+        stamp = _stamp(path)
+        if stamp is None:
+            raise FileNotFoundError(f"文件不存在: {path}")
+        entry = self._cached(key_path, stamp) or self._load(path, key_path)
+        with self._mutex:
+            if key in entry.derived:
+                return entry.derived[key], entry.version
+        value = fn(entry.data)
+        with self._mutex:
+            entry.derived.setdefault(key, value)
+        return value, entry.version
+
+    def version(self, path: Path) -> str | None:
+        try:
+            return self.read_versioned(path)[1]
+        except FileNotFoundError:
+            return None
+
+    def write(self, path: Path, data: Any, *, expected_version: str | None = None) -> str:
+        """
+        原子写入并更新缓存，返回新版本。写入后 data 即为缓存对象，调用方不应再就地改动而不落盘。
+        expected_version 非空时在锁内核对磁盘版本，不一致抛 ScriptVersionConflict。
+        """
+        path = Path(path)
+        key = str(path.resolve())
+        raw = dumps_script(data)
+        with self.lock(path):
+            if expected_version is not None:
+                actual = self.version(path)
+                if actual != expected_version:
+                    raise ScriptVersionConflict(path, expected_version, actual)
+            stamp = atomic_write_bytes(path, raw)
+            version = content_version(raw)
+            self._remember(key, _Entry(stamp, data, version))
+        return version
+
+    def update(self, path: Path, fn: Callable[[Any], Any], *, default: Callable[[], Any] | None = None) -> Any:
+        """
+        锁内读取磁盘最新内容（独立副本），fn 就地修改或返回新对象后写回；返回写入的内容。
+        文件不存在时用 default() 的返回值作为初始内容（未提供则抛 FileNotFoundError）。
+        """
+        path = Path(path)
+        with self.lock(path):
+            if path.is_file():
+                data = loads_script(path.read_bytes())
+            elif default is not None:
+                data = default()
+            else:
+                raise FileNotFoundError(f"文件不存在: {path}")
+            result = fn(data)
+            if result is not None:
+                data = result
+            self.write(path, data)
+        return data
+
+
+SCRIPT_STORE = ScriptStore()
+
+
+def read_json(path: Path, *, copy: bool = False) -> Any:
+    return SCRIPT_STORE.read(path, copy=copy)
+
+
+def read_json_versioned(path: Path, *, copy: bool = False) -> tuple[Any, str]:
+    return SCRIPT_STORE.read_versioned(path, copy=copy)
+
+
+def derive_json(path: Path, key: str, fn: Callable[[Any], Any]) -> tuple[Any, str]:
+    return SCRIPT_STORE.derive(path, key, fn)
+
+
+def write_json(path: Path, data: Any, *, expected_version: str | None = None) -> str:
+    return SCRIPT_STORE.write(path, data, expected_version=expected_version)
+
+
+def update_json(path: Path, fn: Callable[[Any], Any], **kwargs) -> Any:
+    return SCRIPT_STORE.update(path, fn, **kwargs)
@@ -4,10 +4,18 @@
 
 从各模板 TSX 文件中的 templateMeta 导出动态扫描生成注册表。
 供 Step1 生成 AI 提示词、Step3 识别图片字段、Step2/Step4 读取默认值。
+
+注册表在首次访问时构建，并按文件 mtime/size/sha256 缓存到 .cache/template_registry.json；
+只有内容变化的 TSX 会被重新解析。
 """
 
+import hashlib
 import json
+import os
 import re
+import threading
+import time
+from collections.abc import Mapping
 from pathlib import Path
 
 from narrator_pipeline.paths import REPO_ROOT
@@ -67,45 +75,193 @@ def _strip_ts_assertions(s: str) -> str:
 	return re.sub(r"\s+as\s+[\w\[\]]+", "", s)
 
 
-def _build_registry() -> dict:
-	"""扫描 src/components/templates/*.tsx 中的 export const templateMeta，构建注册表。"""
-	project_root = REPO_ROOT
-	templates_dir = project_root / "src" / "components" / "templates"
-	if not templates_dir.is_dir():
+_TEMPLATES_DIR = REPO_ROOT / "src" / "components" / "templates"
+_CACHE_PATH = REPO_ROOT / ".cache" / "template_registry.json"
+_META_MARKER = "export const templateMeta = "
+# 解析逻辑（_parse_template_meta 及其辅助函数）变化时递增，使持久化缓存整体失效
+_PARSER_VERSION = 1
+
+
+def _parse_template_meta(content: str) -> tuple[str, dict] | None:
+	"""从单个 TSX 源码中提取 (模板名, 注册表条目)；无 templateMeta 或解析失败返回 None。"""
+	if _META_MARKER not in content:
+		return None
+	idx = content.find(_META_MARKER)
+	start_brace = content.find("{", idx + len(_META_MARKER))
+	if start_brace == -1:
+		return None
+	end_brace = _find_brace_match(content, start_brace)
+	if end_brace == -1:
+		return None
+	raw = content[start_brace : end_brace + 1]
+	raw = _strip_ts_assertions(raw)
+	raw = _strip_trailing_commas(raw)
+	try:
+		meta = json.loads(raw)
+	except json.JSONDecodeError:
+		return None
+	name = meta.get("name")
+	if not name or not isinstance(name, str):
+		return None
+	# 与旧版一致：注册表 value 不含 "name"，仅用 key 表示模板名
+	return name, {k: v for k, v in meta.items() if k != "name"}
+
+
+def _load_cache(cache_path: Path) -> dict:
+	try:
+		with open(cache_path, "r", encoding="utf-8") as f:
+			data = json.load(f)
+	except (OSError, json.JSONDecodeError):
+		return {}
+	if not isinstance(data, dict) or data.get("parser") != _PARSER_VERSION:
 		return {}
+	files = data.get("files")
+	return files if isinstance(files, dict) else {}
 
-	registry = {}
-	marker = "export const templateMeta = "
+
+def _save_cache(cache_path: Path, files: dict) -> None:
+	"""原子写入；缓存目录不可写时静默跳过（下次仍可从 TSX 重建）。"""
+	try:
+		cache_path.parent.mkdir(parents=True, exist_ok=True)
+		tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump({"parser": _PARSER_VERSION, "files": files}, f, ensure_ascii=False)
+		os.replace(tmp, cache_path)
+	except OSError:
+		pass
+
+
+def _scan_templates(templates_dir: Path, cached_files: dict) -> tuple[dict, bool]:
+	"""
+	逐个 TSX 校验缓存：mtime_ns + size 一致直接复用；否则读文件比对 sha256，内容未变也复用。
+	返回 (files 条目, 是否有变化)。
+	"""
+	files: dict = {}
+	changed = False
+	if not templates_dir.is_dir():
+		return files, bool(cached_files)
 	for tsx_path in sorted(templates_dir.glob("*.tsx")):
-		content = tsx_path.read_text(encoding="utf-8")
-		if marker not in content:
-			continue
-		idx = content.find(marker)
-		start_brace = content.find("{", idx + len(marker))
-		if start_brace == -1:
-			continue
-		end_brace = _find_brace_match(content, start_brace)
-		if end_brace == -1:
-			continue
-		raw = content[start_brace : end_brace + 1]
-		raw = _strip_ts_assertions(raw)
-		raw = _strip_trailing_commas(raw)
 		try:
-			meta = json.loads(raw)
-		except json.JSONDecodeError:
+			st = tsx_path.stat()
+		except OSError:
 			continue
-		name = meta.get("name")
-		if not name or not isinstance(name, str):
+		key = tsx_path.name
+		prev = cached_files.get(key)
+		if isinstance(prev, dict) and prev.get("mtime_ns") == st.st_mtime_ns and prev.get("size") == st.st_size:
+			files[key] = prev
 			continue
-		# 与旧版一致：注册表 value 不含 "name"，仅用 key 表示模板名
-		entry = {k: v for k, v in meta.items() if k != "name"}
-		registry[name] = entry
+		data = tsx_path.read_bytes()
+		digest = hashlib.sha256(data).hexdigest()
+		if isinstance(prev, dict) and prev.get("sha256") == digest:
+			entry = dict(prev)
+		else:
+			parsed = _parse_template_meta(data.decode("utf-8"))
+			entry = {
+				"sha256": digest,
+				"name": parsed[0] if parsed else None,
+				"meta": parsed[1] if parsed else None,
+			}
+		entry["mtime_ns"] = st.st_mtime_ns
+		entry["size"] = st.st_size
+		files[key] = entry
+		changed = True
+	if set(files) != set(cached_files):
+		changed = True
+	return files, changed
 
+
+def _registry_from_files(files: dict) -> dict:
+	registry = {}
+	for key in sorted(files):
+		entry = files[key]
+		if entry.get("name") and isinstance(entry.get("meta"), dict):
+			registry[entry["name"]] = entry["meta"]
 	return registry
 
 
-# 模块加载时构建一次
-TEMPLATE_REGISTRY = _build_registry()
+def _version_of(files: dict) -> str:
+	h = hashlib.sha256(f"parser:{_PARSER_VERSION}".encode("utf-8"))
+	for key in sorted(files):
+		h.update(f"\n{key}:{files[key].get('sha256')}".encode("utf-8"))
+	return h.hexdigest()[:16]
+
+
+class _LazyTemplateRegistry(Mapping):
+	"""
+	只读的模板注册表：首次访问时构建，并以各 TSX 的 mtime/size/sha256 为键持久化到 .cache/template_registry.json。
+	reload_if_changed() 只重新解析有变化的文件，供长驻进程（Web）热更新。
+	"""
+
+	def __init__(self, templates_dir: Path, cache_path: Path) -> None:
+		self._templates_dir = templates_dir
+		self._cache_path = cache_path
+		self._lock = threading.Lock()
+		self._files: dict | None = None
+		self._data: dict = {}
+		self._version = ""
+		self._checked_at = 0.0
+
+	def _refresh(self, cached_files: dict) -> bool:
+		"""返回注册表内容是否变化（仅 mtime 变化不算）。"""
+		files, changed = _scan_templates(self._templates_dir, cached_files)
+		if changed:
+			_save_cache(self._cache_path, files)
+		version = _version_of(files)
+		content_changed = version != self._version
+		if content_changed:
+			self._data = _registry_from_files(files)
+			self._version = version
+		self._files = files
+		self._checked_at = time.monotonic()
+		return content_changed
+
+	def _ensure_loaded(self) -> dict:
+		if self._files is None:
+			with self._lock:
+				if self._files is None:
+					self._refresh(_load_cache(self._cache_path))
+		return self._data
+
+	def reload_if_changed(self, min_interval: float = 0.0) -> bool:
+		"""重新校验模板文件；距上次校验不足 min_interval 秒时跳过。返回注册表是否有变化。"""
+		if self._files is not None and time.monotonic() - self._checked_at < min_interval:
+			return False
+		with self._lock:
+			if self._files is None:
+				return self._refresh(_load_cache(self._cache_path))
+			return self._refresh(self._files)
+
+	@property
+	def version(self) -> str:
+		self._ensure_loaded()
+		return self._version
+
+	def __getitem__(self, name: str) -> dict:
+		return self._ensure_loaded()[name]
+
+	def __iter__(self):
+		return iter(self._ensure_loaded())
+
+	def __len__(self) -> int:
+		return len(self._ensure_loaded())
+
+	def __repr__(self) -> str:
+		state = f"{len(self._data)} 个模板" if self._files is not None else "未加载"
+		return f"<TemplateRegistry {state}>"
+
+
+# 首次访问时构建（import 本模块不再扫描 TSX）
+TEMPLATE_REGISTRY = _LazyTemplateRegistry(_TEMPLATES_DIR, _CACHE_PATH)
+
+
+def registry_version() -> str:
+	"""模板注册表内容版本（各 TSX 的 sha256 汇总），供下游缓存作键。"""
+	return TEMPLATE_REGISTRY.version
+
+
+def reload_registry_if_changed(min_interval: float = 0.0) -> bool:
+	"""模板文件有变化时增量重建注册表；返回是否有变化。"""
+	return TEMPLATE_REGISTRY.reload_if_changed(min_interval)
 
 
 def get_template_to_component_map() -> dict:
@@ -122,8 +278,8 @@ def get_template_to_component_map() -> dict:
 
 
 def get_all_templates() -> dict:
-	"""返回全部模板注册表"""
-	return TEMPLATE_REGISTRY
+	"""返回全部模板注册表（当前内容的快照）"""
+	return dict(TEMPLATE_REGISTRY)
 
 
 def get_template(name: str) -> dict:
@@ -0,0 +1,92 @@
+"""
+Step3 跨运行、跨视频共享的图片缓存（内容寻址）。
+
+键 = sha256(prompt, image_style, model, image_size, 后处理参数)，值为处理完成的单格 PNG。
+缓存位于 {project_root}/.cache/narrator_images/（可用 config.image_cache_dir 覆盖），
+不受 cleanup_before_step0/1 清理 public/images/{name} 的影响。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+from narrator_pipeline.images.postprocess import CellPostProcess
+
+# 键格式变化（字段增删、后处理算法变更）时递增，使旧缓存自然失效
+CACHE_KEY_VERSION = 1
+
+
+def image_cache_key(
+    prompt: str,
+    *,
+    image_style: str,
+    model: str,
+    image_size: str,
+    post: CellPostProcess,
+    cell_shape: str = "square",
+) -> str:
+    payload = {
+        "v": CACHE_KEY_VERSION,
+        "prompt": prompt.strip(),
+        "image_style": image_style,
+        "model": model,
+        "image_size": image_size,
+        "post": asdict(post),
+    }
+    # 方形格沿用旧键，已有缓存继续有效
+    if cell_shape != "square":
+        payload["cell_shape"] = cell_shape
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def default_cache_dir(project_root: Path, config: dict) -> Path:
+    custom = config.get("image_cache_dir")
+    if custom:
+        return Path(custom)
+    return project_root / ".cache" / "narrator_images"
+
+
+def link_or_copy(src: Path, dest: Path) -> None:
+    """原子地把 src 放到 dest：优先硬链接，跨盘或不支持时退回复制。"""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=".tmp-", suffix=dest.suffix, dir=dest.parent)
+    os.close(fd)
+    tmp = Path(tmp_name)
+    try:
+        tmp.unlink()
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class ImageCache:
+    """按 key 前两位分目录存放 {key}.png。"""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.png"
+
+    def lookup(self, key: str) -> Path | None:
+        path = self.path_for(key)
+        return path if path.is_file() else None
+
+    def store(self, key: str, src: Path) -> None:
+        """把新生成的图片写入缓存；已存在则跳过。"""
+        target = self.path_for(key)
+        if target.is_file():
+            return
+        link_or_copy(src, target)
@@ -0,0 +1,101 @@
+"""
+Step3 网格批次的并发节流：按观测到的 429 与响应延迟自适应调整并发上限与请求间隔（AIMD）。
+
+- 成功且延迟未明显恶化：并发上限 +1（不超过 max_concurrency），请求间隔逐步回落到初始值
+- 命中限流（429 / RESOURCE_EXHAUSTED）：并发上限减半、请求间隔翻倍，下一次 acquire 自动按新间隔退避
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+# 延迟超过 EWMA 的该倍数视为「变慢」，此时不再放大并发
+_SLOW_LATENCY_FACTOR = 1.5
+_EWMA_ALPHA = 0.3
+
+
+class ImageRateLimited(Exception):
+    """生图接口返回限流（429 / RESOURCE_EXHAUSTED），应退避后重试。"""
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """识别 google-genai / HTTP 客户端抛出的限流异常。"""
+    for attr in ("code", "status_code", "status"):
+        if getattr(error, attr, None) == 429:
+            return True
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text or "rate limit" in text.lower()
+
+
+class AdaptivePacer:
+    """
+    线程安全的自适应节流器。
+    用法：acquire() → 发请求 → release(latency=..., rate_limited=...)。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        *,
+        min_interval: float = 0.0,
+        max_interval: float = 60.0,
+    ) -> None:
+        self._cond = threading.Condition()
+        self._max = max(1, int(max_concurrency))
+        self._limit = self._max
+        self._in_flight = 0
+        self._base_interval = max(0.0, float(min_interval))
+        self._interval = self._base_interval
+        self._max_interval = max(self._base_interval, float(max_interval))
+        self._next_start = 0.0
+        self._latency_ewma: float | None = None
+        self.rate_limited_count = 0
+
+    @property
+    def limit(self) -> int:
+        with self._cond:
+            return self._limit
+
+    @property
+    def interval(self) -> float:
+        with self._cond:
+            return self._interval
+
+    def acquire(self) -> None:
+        """阻塞直到有空闲并发槽位，并保证与上一次请求起点间隔不少于当前 interval。"""
+        with self._cond:
+            while self._in_flight >= self._limit:
+                self._cond.wait()
+            self._in_flight += 1
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + self._interval
+        wait = start_at - now
+        if wait > 0:
+            time.sleep(wait)
+
+    def release(self, *, latency: float, rate_limited: bool = False) -> None:
+        """归还槽位并根据本次结果调整节奏。"""
+        with self._cond:
+            self._in_flight -= 1
+            if rate_limited:
+                self.rate_limited_count += 1
+                self._limit = max(1, self._limit // 2)
+                self._interval = min(self._max_interval, max(self._interval * 2, 1.0))
+                self._next_start = max(self._next_start, time.monotonic() + self._interval)
+            else:
+                slow = (
+                    self._latency_ewma is not None
+                    and latency > self._latency_ewma * _SLOW_LATENCY_FACTOR
+                )
+                if self._latency_ewma is None:
+                    self._latency_ewma = latency
+                else:
+                    self._latency_ewma = (
+                        _EWMA_ALPHA * latency + (1 - _EWMA_ALPHA) * self._latency_ewma
+                    )
+                if not slow:
+                    self._limit = min(self._max, self._limit + 1)
+                    self._interval = max(self._base_interval, self._interval * 0.7)
+            self._cond.notify_all()
@@ -0,0 +1,196 @@
+"""
+Step3 网格打包规划：按任务数、目标单格分辨率与字段期望宽高比，选择网格布局组合，使 API 次数与空白格浪费最小。
+
+- 每个任务的期望宽高比来自模板 templateMeta.image_display_box，归入 方形 / 横向 / 竖向 三类单格形状
+- 同一形状的任务在候选布局（单格形状一致、单格短边不低于目标像素）中做完全背包式 DP：
+  每张网格成本 = 1（一次调用）+ waste_weight × 空白格占比
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+from narrator_pipeline.contracts.template_registry import get_template
+
+# image_size → 网格图大致边长基准（像素面积 ≈ base²）
+_IMAGE_SIZE_BASE_PX = {"1K": 1024, "2K": 2048, "4K": 4096}
+
+CELL_SHAPES = {"square": 1.0, "wide": 16 / 9, "tall": 9 / 16}
+CELL_SHAPE_LABELS = {"square": "方形格", "wide": "横向格", "tall": "竖向格"}
+
+# Imagen 系列支持的宽高比；Gemini 生图额外支持 3:2、21:9 等
+IMAGEN_ASPECT_RATIOS = frozenset({"1:1", "3:4", "4:3", "9:16", "16:9"})
+
+
+def _ratio_value(aspect_ratio: str) -> float:
+    w, h = aspect_ratio.split(":")
+    return float(w) / float(h)
+
+
+def nearest_cell_shape(aspect: float) -> str:
+    return min(CELL_SHAPES, key=lambda k: abs(math.log(aspect / CELL_SHAPES[k])))
+
+
+@dataclass(frozen=True)
+class GridLayout:
+    """rows × cols 的网格，以 aspect_ratio 请求整张图。"""
+
+    rows: int
+    cols: int
+    aspect_ratio: str
+
+    @property
+    def capacity(self) -> int:
+        return self.rows * self.cols
+
+    @property
+    def cell_aspect(self) -> float:
+        return _ratio_value(self.aspect_ratio) * self.rows / self.cols
+
+    @property
+    def cell_shape(self) -> str:
+        return nearest_cell_shape(self.cell_aspect)
+
+    @property
+    def label(self) -> str:
+        return f"{self.rows}×{self.cols} @{self.aspect_ratio}"
+
+    def cell_size_px(self, image_size: str) -> tuple[int, int]:
+        base = _IMAGE_SIZE_BASE_PX.get(str(image_size).upper(), 1024)
+        ratio = _ratio_value(self.aspect_ratio)
+        grid_w = base * math.sqrt(ratio)
+        grid_h = base / math.sqrt(ratio)
+        return int(grid_w / self.cols), int(grid_h / self.rows)
+
+
+GRID_LAYOUTS: tuple[GridLayout, ...] = (
+    # 方形格
+    GridLayout(2, 2, "1:1"),
+    GridLayout(2, 3, "3:2"),
+    GridLayout(3, 3, "1:1"),
+    GridLayout(4, 4, "1:1"),
+    # 横向格
+    GridLayout(2, 2, "16:9"),
+    GridLayout(2, 3, "21:9"),
+    GridLayout(3, 2, "4:3"),
+    GridLayout(3, 3, "16:9"),
+    GridLayout(4, 2, "1:1"),
+    # 竖向格
+    GridLayout(2, 2, "9:16"),
+    GridLayout(2, 4, "1:1"),
+    GridLayout(3, 3, "9:16"),
+)
+
+
+def template_display_box(template_name: str) -> tuple[int, int] | None:
+    box = get_template(template_name).get("image_display_box")
+    if not isinstance(box, dict):
+        return None
+    try:
+        w, h = int(box["width"]), int(box["height"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (w, h) if w > 0 and h > 0 else None
+
+
+def task_cell_shape(task: dict) -> str:
+    """任务期望的单格形状；模板未声明显示框时按方形。"""
+    box = template_display_box(task.get("template", ""))
+    return nearest_cell_shape(box[0] / box[1]) if box else "square"
+
+
+def task_min_cell_px(task: dict, min_cell_px: int) -> int:
+    """单格短边目标像素：不超过显示框短边（小图标无需大格），也不超过全局下限。"""
+    box = template_display_box(task.get("template", ""))
+    return min(min_cell_px, min(box)) if box else min_cell_px
+
+
+@dataclass
+class PlannedGrid:
+    layout: GridLayout
+    tasks: list
+
+    @property
+    def empty_cells(self) -> int:
+        return self.layout.capacity - len(self.tasks)
+
+
+def _candidate_layouts(
+    shape: str, required_px: int, image_size: str, allowed_aspects: frozenset | None
+) -> list[GridLayout]:
+    same_shape = [
+        l for l in GRID_LAYOUTS
+        if l.cell_shape == shape and (allowed_aspects is None or l.aspect_ratio in allowed_aspects)
+    ]
+    if not same_shape:
+        # 该形状无可用比例（如 Imagen 不支持 21:9）时退回方形
+        same_shape = [
+            l for l in GRID_LAYOUTS
+            if l.cell_shape == "square" and (allowed_aspects is None or l.aspect_ratio in allowed_aspects)
+        ]
+    fit = [l for l in same_shape if min(l.cell_size_px(image_size)) >= required_px]
+    if fit:
+        return fit
+    # 没有布局满足分辨率：只用单格最大的那一种
+    return [max(same_shape, key=lambda l: min(l.cell_size_px(image_size)))]
+
+
+def _pack_counts(n: int, layouts: list[GridLayout], waste_weight: float) -> list[GridLayout]:
+    """DP：用若干网格装下 n 个任务，最小化 Σ(1 + waste_weight × 空白占比)。"""
+    best = [0.0] + [math.inf] * n
+    choice: list[GridLayout | None] = [None] * (n + 1)
+    for k in range(1, n + 1):
+        for layout in layouts:
+            used = min(layout.capacity, k)
+            cost = best[k - used] + 1 + waste_weight * (layout.capacity - used) / layout.capacity
+            if cost < best[k] - 1e-9:
+                best[k] = cost
+                choice[k] = layout
+    picked = []
+    k = n
+    while k > 0:
+        layout = choice[k]
+        picked.append(layout)
+        k -= min(layout.capacity, k)
+    # 大网格在前，空白格只会出现在最后一张
+    picked.sort(key=lambda l: -l.capacity)
+    return picked
+
+
+def plan_grids(
+    tasks: list,
+    *,
+    image_size: str,
+    min_cell_px: int = 300,
+    waste_weight: float = 0.5,
+    allowed_aspects: frozenset | None = None,
+) -> list[PlannedGrid]:
+    """按单格形状分组后各自打包；组内保持任务原有顺序。"""
+    groups: dict[str, list] = {}
+    for task in tasks:
+        groups.setdefault(task_cell_shape(task), []).append(task)
+
+    plan: list[PlannedGrid] = []
+    for shape, group in groups.items():
+        required_px = max(task_min_cell_px(t, min_cell_px) for t in group)
+        layouts = _candidate_layouts(shape, required_px, image_size, allowed_aspects)
+        offset = 0
+        for layout in _pack_counts(len(group), layouts, waste_weight):
+            plan.append(PlannedGrid(layout, group[offset: offset + layout.capacity]))
+            offset += layout.capacity
+    return plan
+
+
+def format_plan(plan: list[PlannedGrid], image_size: str) -> list[str]:
+    """打包计划的逐行描述，供生成前打印。"""
+    total = sum(len(g.tasks) for g in plan)
+    empty = sum(g.empty_cells for g in plan)
+    lines = [f"📋 打包计划: {total} 张 → {len(plan)} 次 API（空白格 {empty}）"]
+    for i, grid in enumerate(plan):
+        cw, ch = grid.layout.cell_size_px(image_size)
+        lines.append(
+            f"   #{i + 1} {grid.layout.label} {CELL_SHAPE_LABELS[grid.layout.cell_shape]}"
+            f" {len(grid.tasks)}/{grid.layout.capacity}，单格约 {cw}×{ch}px"
+        )
+    return lines
@@ -0,0 +1,219 @@
+"""
+Step3 网格图后处理：内存解码 → 按格裁剪 → 亮度抠白底（NumPy 向量化）→ PNG 编码落盘。
+
+网格图直接从接口返回的字节解码，不再经过临时文件；
+逐格的抠图与编码在进程池中并行执行（worker 为模块级函数，可被 spawn 方式 pickle）。
+输出到 public/images 的是按模板显示框缩放的渲染派生图（RenderSpec），全分辨率单格只进缓存。
+"""
+
+from __future__ import annotations
+
+import io
+import os
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+
+from narrator_pipeline.images.quality import CellQualityThresholds, check_cell
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@dataclass(frozen=True)
+class CellPostProcess:
+    """
+    单格后处理参数。
+    - threshold: 亮度高于该值视为白底（alpha=0）
+    - soft_range: >0 时在 [threshold - soft_range, threshold] 区间线性过渡 alpha，边缘更柔和；0 为硬阈值
+    - png_compress_level: PNG zlib 压缩级别 0-9
+    - margin: 每格四周裁掉的像素，避开相邻格的渗色
+    """
+
+    threshold: int = 240
+    soft_range: int = 0
+    png_compress_level: int = 6
+    margin: int = 8
+
+
+def post_process_from_config(config: dict, png_level: int | None = None) -> CellPostProcess:
+    """从 config.json 读取后处理参数；命令行 --png-level 优先。"""
+    level = png_level if png_level is not None else config.get("image_png_compress_level", 6)
+    return CellPostProcess(
+        threshold=int(config.get("image_white_threshold", 240)),
+        soft_range=max(0, int(config.get("image_alpha_soft_range", 0))),
+        png_compress_level=min(9, max(0, int(level))),
+    )
+
+
+def decode_grid(data: bytes) -> "np.ndarray":
+    """接口返回的图片字节 → RGB uint8 数组 (H, W, 3)。"""
+    with Image.open(io.BytesIO(data)) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+def cell_boxes(width: int, height: int, rows: int, cols: int, margin: int) -> list[tuple[int, int, int, int]]:
+    """按行优先返回每格裁剪框 (left, top, right, bottom)。"""
+    cell_w, cell_h = width // cols, height // rows
+    boxes = []
+    for row in range(rows):
+        for col in range(cols):
+            boxes.append((
+                col * cell_w + margin,
+                row * cell_h + margin,
+                (col + 1) * cell_w - margin,
+                (row + 1) * cell_h - margin,
+            ))
+    return boxes
+
+
+def luminance_alpha(rgb: "np.ndarray", threshold: int, soft_range: int = 0) -> "np.ndarray":
+    """由亮度一次性计算 alpha 通道（ITU-R 601 权重，与 PIL 的 L 模式一致）。"""
+    # 与 PIL convert("L") 相同的 16 位定点取整，阈值边界上的像素与逐像素实现结果相同
+    c = rgb.astype(np.int32)
+    lum = (c[..., 0] * 19595 + c[..., 1] * 38470 + c[..., 2] * 7471 + 0x8000) >> 16
+    if soft_range <= 0:
+        return np.where(lum > threshold, 0, 255).astype(np.uint8)
+    alpha = (threshold - lum) * (255.0 / soft_range)
+    return np.clip(alpha, 0, 255).astype(np.uint8)
+
+
+def key_cell(rgb: "np.ndarray", opts: CellPostProcess) -> "np.ndarray":
+    """RGB 格子 → RGBA（白底透明）。"""
+    alpha = luminance_alpha(rgb, opts.threshold, opts.soft_range)
+    return np.dstack((rgb, alpha))
+
+
+def encode_png(rgba: "np.ndarray", compress_level: int) -> bytes:
+    buf = io.BytesIO()
+    Image.fromarray(rgba, "RGBA").save(buf, format="PNG", compress_level=compress_level)
+    return buf.getvalue()
+
+
+@dataclass(frozen=True)
+class RenderSpec:
+    """
+    渲染用派生图：等比缩放进 max_width×max_height（只缩不放），可选 WebP（保留 alpha）。
+    原始全分辨率单格另存，供缓存复用与重新派生。
+    """
+
+    max_width: int
+    max_height: int
+    fmt: str = "png"
+    webp_quality: int = 90
+
+    @property
+    def suffix(self) -> str:
+        return ".webp" if self.fmt == "webp" else ".png"
+
+
+def fit_within(width: int, height: int, max_width: int, max_height: int) -> tuple[int, int]:
+    scale = min(1.0, max_width / width, max_height / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # 先写临时文件再替换：目标可能是图片缓存的硬链接，不能原地覆盖
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _encode_derivative(img: "Image.Image", render: RenderSpec, png_compress_level: int) -> tuple[bytes, tuple[int, int]]:
+    size = fit_within(img.width, img.height, render.max_width, render.max_height)
+    if size != img.size:
+        img = img.resize(size, Image.LANCZOS)
+    buf = io.BytesIO()
+    if render.fmt == "webp":
+        img.save(buf, format="WEBP", quality=render.webp_quality, method=4)
+    else:
+        img.save(buf, format="PNG", compress_level=png_compress_level)
+    return buf.getvalue(), size
+
+
+def process_cell(
+    rgb: "np.ndarray",
+    out_path: str,
+    opts: CellPostProcess,
+    qc: CellQualityThresholds | None = None,
+    render: RenderSpec | None = None,
+    full_path: str | None = None,
+) -> tuple[list[str], tuple[int, int]]:
+    """
+    进程池 worker：抠白底 + 质检 + 编码 + 写文件。
+    render 为空时 out_path 即全分辨率 PNG；否则全分辨率写到 full_path（可选），out_path 为派生图。
+    返回 (质检未通过原因, out_path 的像素尺寸)。
+    """
+    rgba = key_cell(rgb, opts)
+    issues = check_cell(rgba, qc) if qc is not None else []
+    size = (rgba.shape[1], rgba.shape[0])
+    if render is None or full_path:
+        full_target = Path(full_path) if render is not None else Path(out_path)
+        full_target.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(full_target, encode_png(rgba, opts.png_compress_level))
+    if render is not None:
+        data, size = _encode_derivative(Image.fromarray(rgba, "RGBA"), render, opts.png_compress_level)
+        _write_atomic(Path(out_path), data)
+    return issues, size
+
+
+def render_file(src_path: str, out_path: str, opts: CellPostProcess, render: RenderSpec | None) -> tuple[int, int]:
+    """进程池 worker：由已有全分辨率单格（缓存或本次生成）派生渲染图，返回像素尺寸。"""
+    with Image.open(src_path) as img:
+        if render is None:
+            _write_atomic(Path(out_path), Path(src_path).read_bytes())
+            return img.size
+        data, size = _encode_derivative(img.convert("RGBA"), render, opts.png_compress_level)
+    _write_atomic(Path(out_path), data)
+    return size
+
+
+def process_grid(
+    pool: Executor,
+    grid_bytes: bytes,
+    out_paths: list[Path],
+    *,
+    rows: int,
+    cols: int,
+    opts: CellPostProcess,
+    qc: CellQualityThresholds | None = None,
+    renders: list[RenderSpec | None] | None = None,
+    full_paths: list[Path | None] | None = None,
+) -> list[tuple[list[str], tuple[int, int]]]:
+    """
+    解码整张网格并把每格派发到进程池；out_paths 按行优先对应各格，数量可少于 rows*cols。
+    renders / full_paths 与 out_paths 对齐（见 process_cell）。
+    返回与 out_paths 对齐的 (质检问题, 像素尺寸)。任一格失败会抛出异常，由调用方按整批失败处理。
+    """
+    grid = decode_grid(grid_bytes)
+    height, width = grid.shape[:2]
+    boxes = cell_boxes(width, height, rows, cols, opts.margin)
+    renders = renders or [None] * len(out_paths)
+    full_paths = full_paths or [None] * len(out_paths)
+    futures = []
+    for (left, top, right, bottom), out_path, render, full_path in zip(boxes, out_paths, renders, full_paths):
+        # 拷贝为连续数组，只把该格像素发送给子进程
+        cell = np.ascontiguousarray(grid[top:bottom, left:right])
+        futures.append(pool.submit(
+            process_cell, cell, str(out_path), opts, qc, render, str(full_path) if full_path else None
+        ))
+    return [f.result() for f in futures]
+
+
+def remove_white_background(img: "Image.Image", threshold: int = 240) -> "Image.Image":
+    """白底转透明，亮度 > threshold 的像素 alpha=0。"""
+    if Image is None:
+        return img
+    img = img.convert("RGBA")
+    if np is None:
+        img.putalpha(img.convert("L").point(lambda p: 0 if p > threshold else 255))
+        return img
+    rgb = np.asarray(img.convert("RGB"))
+    return Image.fromarray(key_cell(rgb, CellPostProcess(threshold=threshold)), "RGBA")
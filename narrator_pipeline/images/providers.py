@@ -0,0 +1,248 @@
+"""
+Step3 网格生图的 provider 抽象。
+
+- gemini：调用 Gemini / Imagen 生图接口（需要 GEMINI_API_KEY）
+- offline：本地按 prompt 哈希确定性绘制的程序化网格，无网络、无配额，
+  用于对裁剪 / 抠图 / 质检 / 回写全链路做压测与性能分析
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from narrator_pipeline.images.pacing import ImageRateLimited, is_rate_limit_error
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None
+    ImageDraw = None
+
+ImageProviderName = Literal["gemini", "offline"]
+
+
+@dataclass(frozen=True)
+class GridRequest:
+    """一次网格生图请求。cell_prompts 按行优先排列，可少于 rows*cols（其余格留白）。"""
+
+    prompt: str
+    rows: int
+    cols: int
+    cell_prompts: tuple[str, ...]
+    aspect_ratio: str = "1:1"
+    image_size: str = "1K"
+
+
+def is_imagen_model(model: str) -> bool:
+    """判断是否是 Imagen 模型"""
+    return "imagen" in model.lower()
+
+
+def generate_image_bytes(
+    client,
+    model: str,
+    prompt: str,
+    aspect_ratio: str = "1:1",
+    image_size: str = "1K",
+) -> bytes | None:
+    """根据模型类型自动选择 API 生成图片，直接返回图片字节；失败返回 None。"""
+    if is_imagen_model(model):
+        return _generate_with_imagen(client, model, prompt, aspect_ratio)
+    return _generate_with_gemini(client, model, prompt, aspect_ratio, image_size)
+
+
+def _generate_with_imagen(
+    client, model: str, prompt: str, aspect_ratio: str
+) -> bytes | None:
+    from google.genai import types
+
+    try:
+        response = client.models.generate_images(
+            model=model,
+            prompt=prompt,
+            config=types.GenerateImagesConfig(
+                number_of_images=1,
+                output_mime_type="image/png",
+                aspect_ratio=aspect_ratio,
+            ),
+        )
+        if response.generated_images:
+            return response.generated_images[0].image.image_bytes
+        print("  ⚠️ 未生成图片")
+        return None
+    except Exception as e:
+        if is_rate_limit_error(e):
+            raise ImageRateLimited(str(e)) from e
+        print(f"  ❌ Imagen API 失败: {e}")
+        return None
+
+
+def _generate_with_gemini(
+    client,
+    model: str,
+    prompt: str,
+    aspect_ratio: str = "1:1",
+    image_size: str = "1K",
+) -> bytes | None:
+    from google.genai import types
+
+    try:
+        response = client.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_modalities=["IMAGE"],
+                image_config=types.ImageConfig(
+                    aspect_ratio=aspect_ratio,
+                    image_size=image_size,
+                ),
+            ),
+        )
+        for part in response.candidates[0].content.parts:
+            if part.inline_data and part.inline_data.mime_type.startswith("image/"):
+                return part.inline_data.data
+            if hasattr(part, "as_image") and callable(part.as_image):
+                image = part.as_image()
+                if image is not None and getattr(image, "image_bytes", None):
+                    return image.image_bytes
+        print("  ⚠️ Gemini 未返回图片")
+        return None
+    except Exception as e:
+        if is_rate_limit_error(e):
+            raise ImageRateLimited(str(e)) from e
+        print(f"  ❌ Gemini 生图失败: {e}")
+        return None
+
+
+class GeminiImageProvider:
+    """Gemini / Imagen 在线生图。"""
+
+    name = "gemini"
+
+    def __init__(self, client: Any, model: str) -> None:
+        self.client = client
+        self.model = model
+
+    def generate_grid(self, request: GridRequest) -> bytes | None:
+        return generate_image_bytes(
+            self.client,
+            self.model,
+            request.prompt,
+            request.aspect_ratio,
+            request.image_size,
+        )
+
+
+class OfflineImageProvider:
+    """
+    程序化网格：白底上为每个有 prompt 的格子绘制若干几何形状与噪点，
+    形状、位置、灰度均由该格 prompt 的哈希决定，同一 prompt 每次结果一致。
+    """
+
+    name = "offline"
+
+    def __init__(
+        self,
+        *,
+        resolution: int = 1024,
+        latency: float = 0.0,
+        rate_limit_probability: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.resolution = max(64, int(resolution))
+        self.latency = max(0.0, float(latency))
+        self.rate_limit_probability = min(1.0, max(0.0, float(rate_limit_probability)))
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def _grid_size(self, aspect_ratio: str) -> tuple[int, int]:
+        w, h = (float(x) for x in aspect_ratio.split(":"))
+        if w >= h:
+            return self.resolution, max(1, round(self.resolution * h / w))
+        return max(1, round(self.resolution * w / h)), self.resolution
+
+    def generate_grid(self, request: GridRequest) -> bytes | None:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.rate_limit_probability:
+            with self._rng_lock:
+                limited = self._rng.random() < self.rate_limit_probability
+            if limited:
+                raise ImageRateLimited("offline provider: simulated 429 RESOURCE_EXHAUSTED")
+
+        width, height = self._grid_size(request.aspect_ratio)
+        img = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(img)
+        cell_w, cell_h = width // request.cols, height // request.rows
+        for i, cell_prompt in enumerate(request.cell_prompts[: request.rows * request.cols]):
+            row, col = divmod(i, request.cols)
+            _draw_procedural_cell(
+                draw, col * cell_w, row * cell_h, cell_w, cell_h, cell_prompt
+            )
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        return buf.getvalue()
+
+
+def _draw_procedural_cell(draw, left: int, top: int, w: int, h: int, prompt: str) -> None:
+    """在格子中心 60% 区域内绘制确定性图形，四周留白以免触发贴边质检。"""
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    rng = random.Random(int.from_bytes(digest[:8], "big"))
+    x0, y0 = left + w * 0.2, top + h * 0.2
+    x1, y1 = left + w * 0.8, top + h * 0.8
+    for _ in range(rng.randint(1, 3)):
+        ax, bx = sorted(rng.uniform(x0, x1) for _ in range(2))
+        ay, by = sorted(rng.uniform(y0, y1) for _ in range(2))
+        bx, by = max(bx, ax + w * 0.1), max(by, ay + h * 0.1)
+        gray = rng.randint(0, 120)
+        shape = rng.choice(("ellipse", "rectangle", "polygon"))
+        if shape == "ellipse":
+            draw.ellipse((ax, ay, bx, by), fill=(gray, gray, gray))
+        elif shape == "rectangle":
+            draw.rectangle((ax, ay, bx, by), outline=(gray, gray, gray), width=max(2, w // 60))
+        else:
+            points = [(rng.uniform(x0, x1), rng.uniform(y0, y1)) for _ in range(rng.randint(3, 6))]
+            draw.polygon(points, fill=(gray, gray, gray))
+    # 少量噪点，模拟真实图片的非纯色像素
+    for _ in range(w * h // 400):
+        px, py = rng.uniform(x0, x1), rng.uniform(y0, y1)
+        g = rng.randint(60, 200)
+        draw.point((px, py), fill=(g, g, g))
+
+
+def create_image_provider(
+    config: dict, provider: Any | None = None, *, model: str | None = None
+) -> GeminiImageProvider | OfflineImageProvider:
+    """
+    根据 config.image_provider（或显式参数）创建生图 provider。
+    - gemini：需要环境变量 GEMINI_API_KEY
+    - offline：读取 image_offline_resolution / image_offline_latency / image_offline_rate_limit
+    """
+    resolved = str(provider if provider is not None else config.get("image_provider", "gemini")).strip().lower()
+
+    if resolved == "offline":
+        return OfflineImageProvider(
+            resolution=int(config.get("image_offline_resolution", 1024)),
+            latency=float(config.get("image_offline_latency", 0.0)),
+            rate_limit_probability=float(config.get("image_offline_rate_limit", 0.0)),
+        )
+
+    if resolved != "gemini":
+        raise ValueError(f"未知的生图 provider: {resolved}（可选 gemini / offline）")
+
+    from google import genai
+
+    api_key = os.environ.get("GEMINI_API_KEY", "")
+    if not api_key:
+        raise ValueError("未设置 GEMINI_API_KEY，请在 .env 中配置")
+    client = genai.Client(api_key=api_key)
+    return GeminiImageProvider(
+        client, model or config.get("imagen_model", "gemini-3.1-flash-image-preview")
+    )
@@ -0,0 +1,67 @@
+"""
+Step3 单格质检：基于抠图后 alpha 通道的 NumPy 统计，廉价识别明显废图。
+
+- 近乎空白：不透明像素占比过低
+- 内容贴边：裁剪外圈的不透明像素占比过高（画面被裁断或渗入相邻格）
+- 边框线：靠近四边的某一行/列几乎整条不透明（模型画出了分隔线）
+
+文字检测不在此范围（需要 OCR），仍依赖 Prompt 约束。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@dataclass(frozen=True)
+class CellQualityThresholds:
+    min_coverage: float = 0.01
+    max_rim_coverage: float = 0.08
+    max_border_line: float = 0.6
+    # 外圈宽度占短边比例
+    rim_ratio: float = 0.03
+
+
+def thresholds_from_config(config: dict) -> CellQualityThresholds:
+    return CellQualityThresholds(
+        min_coverage=float(config.get("image_qc_min_coverage", 0.01)),
+        max_rim_coverage=float(config.get("image_qc_max_rim_coverage", 0.08)),
+        max_border_line=float(config.get("image_qc_max_border_line", 0.6)),
+    )
+
+
+def check_cell(rgba: "np.ndarray", thresholds: CellQualityThresholds) -> list[str]:
+    """返回未通过的原因列表；空列表表示通过。"""
+    opaque = rgba[..., 3] > 0
+    height, width = opaque.shape
+    if height == 0 or width == 0:
+        return ["空白格"]
+
+    issues = []
+    coverage = float(opaque.mean())
+    if coverage < thresholds.min_coverage:
+        issues.append(f"近乎空白（内容占比 {coverage:.1%}）")
+        return issues
+
+    rim = max(2, int(min(height, width) * thresholds.rim_ratio))
+    rim_mask = np.ones_like(opaque)
+    rim_mask[rim:-rim, rim:-rim] = False
+    rim_coverage = float(opaque[rim_mask].mean())
+    if rim_coverage > thresholds.max_rim_coverage:
+        issues.append(f"内容贴边（外圈占比 {rim_coverage:.1%}）")
+
+    band = rim * 2
+    line_density = max(
+        float(opaque[:band].mean(axis=1).max()),
+        float(opaque[-band:].mean(axis=1).max()),
+        float(opaque[:, :band].mean(axis=0).max()),
+        float(opaque[:, -band:].mean(axis=0).max()),
+    )
+    if line_density > thresholds.max_border_line:
+        issues.append(f"疑似边框线（边缘行/列占比 {line_density:.0%}）")
+    return issues
@@ -9,9 +9,10 @@ Step 3: AI 图片生成（模板驱动版）
 """
 
 import argparse
-import json
-import os
+import shutil
 import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from narrator_pipeline.paths import PACKAGE_ROOT, resolve_video_paths
@@ -19,150 +20,75 @@ try:
     from PIL import Image
 except ImportError:
     Image = None
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-from narrator_pipeline.contracts.param_schema_tools import apply_image_task_results, iter_image_prompt_tasks
-from narrator_pipeline.contracts.template_registry import get_template
+from narrator_pipeline.contracts.scene_document import SceneDocument, load_scene_document
+from narrator_pipeline.contracts.script_store import update_json
 from narrator_pipeline.common import load_config, load_env
-
-
-def remove_white_background(img: "Image.Image", threshold: int = 240) -> "Image.Image":
-    """白底转透明，亮度 > threshold 的像素 alpha=0。"""
-    if Image is None:
-        return img
-    img = img.convert("RGBA")
-    grayscale = img.convert("L")
-    alpha = grayscale.point(lambda p: 0 if p > threshold else 255)
-    img.putalpha(alpha)
-    return img
-
-
-def is_imagen_model(model: str) -> bool:
-    """判断是否是 Imagen 模型"""
-    return "imagen" in model.lower()
-
-
-def generate_image(
-    client,
-    model: str,
-    prompt: str,
-    output_path: Path,
-    aspect_ratio: str = "1:1",
-    image_size: str = "1K",
-) -> bool:
-    """根据模型类型自动选择 API 生成图片"""
-    if is_imagen_model(model):
-        return _generate_with_imagen(client, model, prompt, output_path, aspect_ratio)
-    return _generate_with_gemini(
-        client, model, prompt, output_path, aspect_ratio, image_size
-    )
-
-
-def _generate_with_imagen(
-    client, model: str, prompt: str, output_path: Path, aspect_ratio: str
-) -> bool:
-    from google.genai import types
-
-    try:
-        response = client.models.generate_images(
-            model=model,
-            prompt=prompt,
-            config=types.GenerateImagesConfig(
-                number_of_images=1,
-                output_mime_type="image/png",
-                aspect_ratio=aspect_ratio,
-            ),
-        )
-        if response.generated_images:
-            response.generated_images[0].image.save(str(output_path))
-            return True
-        print("  ⚠️ 未生成图片")
-        return False
-    except Exception as e:
-        print(f"  ❌ Imagen API 失败: {e}")
-        return False
-
-
-def _generate_with_gemini(
-    client,
-    model: str,
-    prompt: str,
-    output_path: Path,
-    aspect_ratio: str = "1:1",
-    image_size: str = "1K",
-) -> bool:
-    from google.genai import types
-
-    try:
-        response = client.models.generate_content(
-            model=model,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_modalities=["IMAGE"],
-                image_config=types.ImageConfig(
-                    aspect_ratio=aspect_ratio,
-                    image_size=image_size,
-                ),
-            ),
-        )
-        for part in response.candidates[0].content.parts:
-            if part.inline_data and part.inline_data.mime_type.startswith("image/"):
-                with open(output_path, "wb") as f:
-                    f.write(part.inline_data.data)
-                return True
-            if hasattr(part, "as_image") and callable(part.as_image):
-                if image := part.as_image():
-                    image.save(str(output_path))
-                    return True
-        print("  ⚠️ Gemini 未返回图片")
-        return False
-    except Exception as e:
-        print(f"  ❌ Gemini 生图失败: {e}")
-        return False
+from narrator_pipeline.images.cache import ImageCache, default_cache_dir, image_cache_key
+from narrator_pipeline.images.packing import (
+    IMAGEN_ASPECT_RATIOS,
+    GridLayout,
+    PlannedGrid,
+    format_plan,
+    plan_grids,
+    task_cell_shape,
+    template_display_box,
+)
+from narrator_pipeline.images.pacing import AdaptivePacer, ImageRateLimited
+from narrator_pipeline.images.postprocess import (
+    CellPostProcess,
+    RenderSpec,
+    post_process_from_config,
+    process_grid,
+    render_file,
+)
+from narrator_pipeline.images.providers import GridRequest, create_image_provider, is_imagen_model
+from narrator_pipeline.images.quality import CellQualityThresholds, thresholds_from_config
+
+# 派生图像素尺寸写入 param 的字段（step4 生成 props 时跳过）
+IMAGE_SIZES_PARAM_KEY = "imageSizes"
+# 输出派生图时，全分辨率单格在 images 目录下的暂存子目录
+FULL_RES_DIRNAME = ".full"
 
 
 # ─────────────────────────────────────────────────────────────
 # 从 param 中收集图片提示词
 # ─────────────────────────────────────────────────────────────
 
-def collect_image_tasks(scripts_data: dict, scene_filter: str = None) -> tuple[list, int]:
+def collect_image_tasks(scripts_data: dict | SceneDocument, scene_filter: str = None) -> tuple[list, int]:
     """
     按模板 param_schema 递归收集 format=image_prompt 的叶子，生成扁平任务列表。
     返回 (待生成任务列表, 已跳过的已生成图片数)。
     """
+    doc = _as_document(scripts_data)
     tasks = []
     skipped = 0
-    for scene in scripts_data.get("scenes", []):
-        scene_id = scene["sceneId"]
-        if scene_filter and scene_id != scene_filter:
-            continue
-        for item in scene.get("items", []):
-            template_name = item.get("template", "CENTER_FOCUS")
-            param = item.get("param", {})
-            tmpl = get_template(template_name)
-            schema = tmpl.get("param_schema") or {}
-            sub = iter_image_prompt_tasks(
-                param if isinstance(param, dict) else {},
-                schema if isinstance(schema, dict) else {},
-                scene_id=scene_id,
-                order=item["order"],
-                include_generated=True,
-            )
-            for t in sub:
-                if t["already_generated"]:
-                    skipped += 1
-                    continue
-                tasks.append({
-                    "scene_id": t["scene_id"],
-                    "order": t["order"],
-                    "field_name": t["field_name"],
-                    "prompt": t["prompt"],
-                    "array_index": t["array_index"],
-                    "position": t["position"],
-                    "task_key": t["task_key"],
-                })
+    for item in doc.iter_items(scene_filter):
+        for t in item.image_tasks:
+            if t["already_generated"]:
+                skipped += 1
+                continue
+            tasks.append({
+                "template": item.template,
+                "scene_id": t["scene_id"],
+                "order": t["order"],
+                "field_name": t["field_name"],
+                "prompt": t["prompt"],
+                "array_index": t["array_index"],
+                "position": t["position"],
+                "task_key": t["task_key"],
+            })
     return tasks, skipped
 
 
+def _as_document(scripts_data: dict | SceneDocument) -> SceneDocument:
+    return scripts_data if isinstance(scripts_data, SceneDocument) else SceneDocument.from_dict(scripts_data)
+
+
 def get_output_filename(task: dict) -> str:
     """根据任务生成输出文件名"""
     base = f"{task['scene_id']}_{task['order']}"
@@ -176,26 +102,241 @@ def get_output_filename(task: dict) -> str:
     return f"{base}.png"
 
 
-def apply_image_paths(scripts_data: dict, task_results: dict):
+def apply_image_paths(scripts_data: dict | SceneDocument, task_results: dict, task_sizes: dict | None = None):
     """
-    将生成的图片路径回写到 scene-scripts.json 的 param 中。
+    将生成的图片路径回写到 scene-scripts.json 的 param 中（按 task_key 索引直达对应 item，不再全量遍历）。
     task_results: {task_key: relative_path}
+    task_sizes: {task_key: (width, height)}，写入 param.imageSizes（键为字段路径，如 premises.0.imageSrc）
     """
-    for scene in scripts_data.get("scenes", []):
-        for item in scene.get("items", []):
-            param = item.get("param", {})
-            if not isinstance(param, dict):
-                continue
-            template_name = item.get("template", "CENTER_FOCUS")
-            tmpl = get_template(template_name)
-            schema = tmpl.get("param_schema") or {}
-            apply_image_task_results(
-                param,
-                schema if isinstance(schema, dict) else {},
-                task_results,
-                scene_id=scene["sceneId"],
-                order=item["order"],
+    doc = _as_document(scripts_data)
+    for key, rel_path in task_results.items():
+        doc.set_image_result(key, rel_path)
+    if task_sizes:
+        # 按文档顺序写入，imageSizes 键顺序与逐 item 遍历一致
+        items = {id(item): item for key in task_sizes for item, _ in doc.image_tasks(key)}
+        for item in sorted(items.values(), key=lambda it: (it.scene.index, it.index)):
+            for t in item.image_tasks:
+                size = task_sizes.get(t["task_key"])
+                if size is None:
+                    continue
+                field_path = ".".join(str(p) for p in t["path"])
+                item.param.setdefault(IMAGE_SIZES_PARAM_KEY, {})[field_path] = {"width": size[0], "height": size[1]}
+    doc.commit_image_results()
+
+
+# ─────────────────────────────────────────────────────────────
+# 渲染派生图
+# ─────────────────────────────────────────────────────────────
+
+def render_spec_for_template(template_name: str, *, fmt: str = "png", scale: float = 1.0) -> RenderSpec | None:
+    """按模板 image_display_box 生成派生图规格；模板未声明显示框时输出原图。"""
+    box = template_display_box(template_name)
+    if box is None:
+        return None
+    return RenderSpec(
+        max_width=max(1, round(box[0] * scale)),
+        max_height=max(1, round(box[1] * scale)),
+        fmt="webp" if fmt == "webp" else "png",
+    )
+
+
+def output_filename(task: dict) -> str:
+    """public/images 下的输出文件名：派生图按格式替换扩展名。"""
+    name = get_output_filename(task)
+    render = task.get("render")
+    return str(Path(name).with_suffix(render.suffix)) if render is not None else name
+
+
+# ─────────────────────────────────────────────────────────────
+# 网格批次：Prompt 构造 / 生成 / 裁剪（可并发执行）
+# ─────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class GridBatchContext:
+    """批次执行所需的共享只读参数。"""
+
+    # GeminiImageProvider / OfflineImageProvider
+    provider: object
+    output_dir: Path
+    rel_prefix: str
+    image_style: str
+    image_size: str
+    max_rate_limit_retries: int
+    post: CellPostProcess
+    # 逐格抠图/编码的进程池
+    cell_pool: Executor
+    # None 表示关闭单格质检
+    qc: CellQualityThresholds | None = None
+    # 输出渲染派生图时，全分辨率单格的暂存目录
+    full_dir: Path | None = None
+
+
+@dataclass
+class BatchOutcome:
+    """单个网格批次的结果。"""
+
+    # task_key → 相对路径（通过质检）
+    results: dict = field(default_factory=dict)
+    # 生成或裁剪失败的任务
+    failed: list = field(default_factory=list)
+    # 质检未通过但已落盘的 (task, 相对路径, 原因列表)
+    rejected: list = field(default_factory=list)
+    # task_key → 输出图像素尺寸 (width, height)
+    sizes: dict = field(default_factory=dict)
+
+
+_CELL_SHAPE_PROMPTS = {
+    "square": "",
+    "wide": " Each cell is a wide landscape frame; compose each picture horizontally.",
+    "tall": " Each cell is a tall portrait frame; compose each picture vertically.",
+}
+
+
+def build_grid_prompt(batch: list, layout: GridLayout, image_style: str = "") -> str:
+    """rows×cols 网格 Prompt：不足 capacity 的位置留白。"""
+    rows, cols = layout.rows, layout.cols
+    style_suffix = f" Style for ALL cells: {image_style}." if image_style else ""
+    lines = [
+        f"A {rows}x{cols} grid image ({rows} rows, {cols} columns) with exactly {layout.capacity} equal cells."
+        + _CELL_SHAPE_PROMPTS[layout.cell_shape],
+        "CRITICAL: absolutely NO borders, NO dividing lines, NO grid lines, NO separators, NO outlines between cells.",
+        "CRITICAL - NO TEXT: The image must contain ZERO text. No letters, no numbers, no words, no captions.",
+        "",
+    ]
+    for i in range(layout.capacity):
+        row, col = i // cols + 1, i % cols + 1
+        if i < len(batch):
+            cell_prompt = batch[i]["prompt"]
+            lines.append(f"Row {row}, Col {col}: {cell_prompt} (visual only, no text)")
+        else:
+            lines.append(f"Row {row}, Col {col}: (empty white cell, no content)")
+    lines.append(f"FINAL RULE: The entire {rows}x{cols} image must have no text anywhere. Pure pictures only.")
+    lines.append(style_suffix)
+    return "\n".join(lines)
+
+
+def _generate_grid_paced(
+    ctx: GridBatchContext, pacer: AdaptivePacer, request: GridRequest, label: str
+) -> bytes | None:
+    """经 pacer 节流调用生图；命中限流时退避重试，重试耗尽视为失败。"""
+    for attempt in range(ctx.max_rate_limit_retries + 1):
+        pacer.acquire()
+        started = time.monotonic()
+        try:
+            data = ctx.provider.generate_grid(request)
+        except ImageRateLimited as e:
+            pacer.release(latency=time.monotonic() - started, rate_limited=True)
+            if attempt >= ctx.max_rate_limit_retries:
+                print(f"  ❌ {label} 限流重试耗尽: {e}")
+                return None
+            # 退避由 pacer 的请求间隔承担：下一次 acquire 至少等待新的 interval
+            print(
+                f"  ⏳ {label} 触发限流，约 {pacer.interval:.1f}s 后重试"
+                f"（并发上限 → {pacer.limit}）"
             )
+            continue
+        pacer.release(latency=time.monotonic() - started)
+        return data
+    return None
+
+
+def run_grid_batch(
+    ctx: GridBatchContext, pacer: AdaptivePacer, batch_idx: int, total: int, grid: PlannedGrid
+) -> BatchOutcome:
+    """
+    按规划的网格布局生成、裁剪并质检单个批次。
+    不修改 scripts_data，由调用方统一回写。
+    """
+    batch, layout = grid.tasks, grid.layout
+    label = f"批次 {batch_idx + 1}/{total}"
+    preview = batch[0]["prompt"][:50] + "..." if batch else ""
+    print(f"\n📦 {label}（{layout.label}）: {len(batch)} 张 → 1 次 API")
+    print(f"    首条: {preview}")
+
+    request = GridRequest(
+        prompt=build_grid_prompt(batch, layout, ctx.image_style),
+        rows=layout.rows,
+        cols=layout.cols,
+        cell_prompts=tuple(task["prompt"] for task in batch),
+        aspect_ratio=layout.aspect_ratio,
+        image_size=ctx.image_size,
+    )
+    grid_bytes = _generate_grid_paced(ctx, pacer, request, label)
+    if not grid_bytes:
+        return BatchOutcome(failed=list(batch))
+
+    # 内存解码 → 进程池并行裁剪/去白底/质检/编码（渲染派生图 + 全分辨率暂存）
+    out_names = [output_filename(task) for task in batch]
+    full_paths = [
+        ctx.full_dir / get_output_filename(task) if ctx.full_dir and task["render"] else None
+        for task in batch
+    ]
+    try:
+        cell_results = process_grid(
+            ctx.cell_pool,
+            grid_bytes,
+            [ctx.output_dir / name for name in out_names],
+            rows=layout.rows,
+            cols=layout.cols,
+            opts=ctx.post,
+            qc=ctx.qc,
+            renders=[task["render"] for task in batch],
+            full_paths=full_paths,
+        )
+    except Exception as e:
+        print(f"     ❌ [{batch_idx + 1}] 裁剪/去背失败: {e}")
+        return BatchOutcome(failed=list(batch))
+
+    outcome = BatchOutcome()
+    for task, out_name, (issues, size) in zip(batch, out_names, cell_results):
+        rel_path = f"{ctx.rel_prefix}/{out_name}"
+        outcome.sizes[task["task_key"]] = size
+        if issues:
+            print(f"     ⚠️ [{batch_idx + 1}] {out_name} 质检未通过: {'；'.join(issues)}")
+            outcome.rejected.append((task, rel_path, issues))
+            continue
+        print(f"     ✅ [{batch_idx + 1}] {out_name}")
+        outcome.results[task["task_key"]] = rel_path
+    return outcome
+
+
+def _derive_from_sources(
+    pool: Executor,
+    output_dir: Path,
+    rel_prefix: str,
+    post: CellPostProcess,
+    sources: list[tuple[dict, Path]],
+    task_results: dict,
+) -> tuple[dict, int]:
+    """由已有全分辨率单格（缓存命中或同 prompt 的代表任务）并行派生渲染图，返回 (尺寸表, 失败数)。"""
+    futures = [
+        (task, pool.submit(render_file, str(src), str(output_dir / output_filename(task)), post, task["render"]))
+        for task, src in sources
+    ]
+    sizes = {}
+    failed = 0
+    for task, future in futures:
+        out_name = output_filename(task)
+        try:
+            sizes[task["task_key"]] = future.result()
+        except Exception as e:
+            print(f"     ❌ {out_name} 派生失败: {e}")
+            failed += 1
+            continue
+        task_results[task["task_key"]] = f"{rel_prefix}/{out_name}"
+    return sizes, failed
+
+
+def run_plan(
+    ctx: GridBatchContext, pacer: AdaptivePacer, plan: list, concurrency: int
+) -> list[BatchOutcome]:
+    """并发执行一轮打包计划，结果按计划顺序返回。"""
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="step3-grid") as pool:
+        futures = [
+            pool.submit(run_grid_batch, ctx, pacer, batch_idx, len(plan), grid)
+            for batch_idx, grid in enumerate(plan)
+        ]
+        return [f.result() for f in futures]
 
 
 def main():
@@ -210,7 +351,56 @@ def main():
     )
     parser.add_argument("--scene", "-s", help="只生成指定场景的图片")
     parser.add_argument(
-        "--delay", "-d", type=float, default=2.0, help="每批网格图间隔秒数（避免限流）"
+        "--delay",
+        "-d",
+        type=float,
+        default=0.0,
+        help="批次请求起点的初始最小间隔秒数；遇到限流会自动放大",
+    )
+    parser.add_argument(
+        "--concurrency",
+        "-j",
+        type=int,
+        default=0,
+        help="网格批次最大并发数（默认读 config.image_concurrency，缺省 3）",
+    )
+    parser.add_argument(
+        "--provider",
+        choices=["gemini", "offline"],
+        default=None,
+        help="生图 provider（默认读 config.image_provider）；offline 为本地程序化网格，无需 API Key",
+    )
+    parser.add_argument(
+        "--png-level",
+        type=int,
+        default=None,
+        help="PNG 压缩级别 0-9（默认读 config.image_png_compress_level，缺省 6）",
+    )
+    parser.add_argument(
+        "--render-format",
+        choices=["png", "webp"],
+        default=None,
+        help="渲染派生图格式（默认读 config.image_render_format，缺省 png）",
+    )
+    parser.add_argument(
+        "--full-res",
+        action="store_true",
+        help="不生成按模板显示框缩放的派生图，直接输出全分辨率 PNG",
+    )
+    parser.add_argument(
+        "--plan-only",
+        action="store_true",
+        help="只打印缓存命中与网格打包计划，不调用生图接口",
+    )
+    parser.add_argument(
+        "--no-qc",
+        action="store_true",
+        help="关闭单格质检（空白/贴边/边框线）与自动重试",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不读写共享图片缓存（仍会对本次运行内相同 prompt 去重）",
     )
     args = parser.parse_args()
 
@@ -218,37 +408,38 @@ def main():
     load_env(script_dir)
     config = load_config(script_dir)
 
-    api_key = os.environ.get("GEMINI_API_KEY", "")
-    if not api_key:
-        print("❌ 未设置 GEMINI_API_KEY")
-        return False
-
-    if Image is None:
-        print("❌ 请安装 Pillow: pip install Pillow")
+    if Image is None or np is None:
+        print("❌ 请安装 Pillow 与 NumPy: pip install Pillow numpy")
         return False
 
-    from google import genai
-
-    client = genai.Client(api_key=api_key)
-
     paths = resolve_video_paths(args.name, config)
     input_path = paths.scene_scripts
     if not input_path.exists():
         print(f"❌ 文件不存在: {input_path}")
         return False
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        scripts_data = json.load(f)
+    doc = load_scene_document(input_path)
 
     output_dir = paths.images_dir
     output_dir.mkdir(parents=True, exist_ok=True)
 
     image_style = config.get("image_style", "")
-    grid_aspect_ratio = "1:1"
     image_size = config.get("image_size", "1K")
+    provider_name = (args.provider or config.get("image_provider", "gemini")).strip().lower()
+    model = config.get("imagen_model", "gemini-3.1-flash-image-preview")
+    # 离线程序化图片使用独立的缓存命名空间，不会混入真实生图结果
+    cache_model = model if provider_name == "gemini" else provider_name
+    allowed_aspects = (
+        IMAGEN_ASPECT_RATIOS if provider_name == "gemini" and is_imagen_model(model) else None
+    )
+    post = post_process_from_config(config, args.png_level)
+
+    # 计算图片相对路径前缀（用于写入 JSON）
+    project_root = paths.project_root
+    rel_prefix = str(output_dir.relative_to(project_root / "public")).replace("\\", "/")
 
     # ① 收集图片任务
-    tasks, skipped = collect_image_tasks(scripts_data, args.scene)
+    tasks, skipped = collect_image_tasks(doc, args.scene)
 
     if skipped:
         print(f"⏭️  跳过 {skipped} 张已生成的图片（images/ 路径）")
@@ -257,104 +448,172 @@ def main():
         print("✅ 无图片需要生成" if skipped else "❌ 未找到任何图片字段")
         return skipped > 0
 
-    # ② 分批：每 9 个一批
-    batch_size = 9
-    chunks = [
-        tasks[i: i + batch_size]
-        for i in range(0, len(tasks), batch_size)
-    ]
-
-    print(f"🎨 开始生成场景配图（3×3 网格批量，共 {len(tasks)} 张 → {len(chunks)} 次 API）")
-    print(f"   📐 网格宽高比: {grid_aspect_ratio}")
-    print(f"   📂 输出: {output_dir}")
+    # ② 渲染派生图规格（按模板显示框缩放）；全分辨率单格暂存于 .full/，入缓存后删除
+    render_fmt = (args.render_format or config.get("image_render_format", "png")).lower()
+    render_enabled = not args.full_res and bool(config.get("image_render_derivatives", True))
+    render_scale = float(config.get("image_render_scale", 1.0))
+    for task in tasks:
+        task["render"] = (
+            render_spec_for_template(task["template"], fmt=render_fmt, scale=render_scale)
+            if render_enabled else None
+        )
+    full_dir = output_dir / FULL_RES_DIRNAME
 
-    success_count = 0
-    fail_count = 0
-    # task_key → relative_path
+    # ③ 查缓存 + 同 prompt 去重：只有未命中的唯一 prompt 进入网格批次
+    cache = None if args.no_cache else ImageCache(default_cache_dir(project_root, config))
+    # task_key → relative_path / (width, height)
     task_results = {}
-
-    # 计算图片相对路径前缀（用于写入 JSON）
-    project_root = paths.project_root
-    rel_prefix = str(output_dir.relative_to(project_root / "public")).replace("\\", "/")
-
-    for batch_idx, batch in enumerate(chunks):
-        # ③ 网格 Prompt
-        style_suffix = f" Style for ALL cells: {image_style}." if image_style else ""
-        lines = [
-            "A 3x3 grid image with exactly 9 equal cells.",
-            "CRITICAL: absolutely NO borders, NO dividing lines, NO grid lines, NO separators, NO outlines between cells.",
-            "CRITICAL - NO TEXT: The image must contain ZERO text. No letters, no numbers, no words, no captions.",
-            "",
-        ]
-        for i in range(9):
-            row, col = i // 3 + 1, i % 3 + 1
-            if i < len(batch):
-                cell_prompt = batch[i]["prompt"]
-                lines.append(f"Row {row}, Col {col}: {cell_prompt} (visual only, no text)")
-            else:
-                lines.append(f"Row {row}, Col {col}: (empty white cell, no content)")
-        lines.append("FINAL RULE: The entire 3x3 image must have no text anywhere. Pure pictures only.")
-        lines.append(style_suffix)
-        grid_prompt = "\n".join(lines)
-
-        grid_path = output_dir / f"_grid_{batch_idx}.png"
-        preview = batch[0]["prompt"][:50] + "..." if batch else ""
-        print(f"\n📦 批次 {batch_idx + 1}/{len(chunks)}: {len(batch)} 张 → 1 次 API")
-        print(f"    首条: {preview}")
-
-        if not generate_image(
-            client,
-            config.get("imagen_model", "gemini-3.1-flash-image-preview"),
-            grid_prompt,
-            grid_path,
-            grid_aspect_ratio,
-            image_size,
-        ):
-            fail_count += len(batch)
-            if grid_path.exists():
-                grid_path.unlink()
-            if args.delay > 0:
-                time.sleep(args.delay)
-            continue
-
-        # ④ 裁剪 + 去白底
+    task_sizes = {}
+    # cache_key → 代表任务（实际生成）与同 key 的其余任务（生成后派生）
+    pending: dict[str, dict] = {}
+    duplicates: dict[str, list[dict]] = {}
+    cache_hit_tasks: list[tuple[dict, Path]] = []
+    for task in tasks:
+        key = image_cache_key(
+            task["prompt"],
+            image_style=image_style,
+            model=cache_model,
+            image_size=image_size,
+            post=post,
+            cell_shape=task_cell_shape(task),
+        )
+        cached = cache.lookup(key) if cache is not None else None
+        if cached is not None:
+            cache_hit_tasks.append((task, cached))
+        elif key in pending:
+            duplicates.setdefault(key, []).append(task)
+        else:
+            pending[key] = task
+    dedup_count = sum(len(v) for v in duplicates.values())
+    if cache is not None:
+        print(f"🗃️  图片缓存: 命中 {len(cache_hit_tasks)} / {len(tasks)}（{cache.root}）")
+    if dedup_count:
+        print(f"🔁 相同 prompt 去重: {dedup_count} 张复用同批生成结果")
+
+    gen_tasks = list(pending.values())
+    plan = []
+    if gen_tasks:
+        # ④ 打包规划：按单格形状与分辨率选择网格布局
+        plan = plan_grids(
+            gen_tasks,
+            image_size=image_size,
+            min_cell_px=int(config.get("image_min_cell_px", 300)),
+            allowed_aspects=allowed_aspects,
+        )
+        print(f"🎨 开始生成场景配图（共 {len(gen_tasks)} 张 → {len(plan)} 次 API）")
+        for line in format_plan(plan, image_size):
+            print(f"   {line}")
+    if args.plan_only:
+        return True
+
+    provider = None
+    if gen_tasks:
         try:
-            img = Image.open(grid_path).convert("RGBA")
-            w, h = img.size
-            cell_w, cell_h = w // 3, h // 3
-            margin = 8
-            for i, task in enumerate(batch):
-                row, col = i // 3, i % 3
-                left = col * cell_w + margin
-                top = row * cell_h + margin
-                right = (col + 1) * cell_w - margin
-                bottom = (row + 1) * cell_h - margin
-                cell = img.crop((left, top, right, bottom))
-                cell = remove_white_background(cell, threshold=240)
-
-                out_name = get_output_filename(task)
-                out_path = output_dir / out_name
-                cell.save(out_path)
-                print(f"     ✅ {out_name}")
-                success_count += 1
-
-                task_results[task["task_key"]] = f"{rel_prefix}/{out_name}"
-
-        except Exception as e:
-            print(f"     ❌ 裁剪/去背失败: {e}")
-            fail_count += len(batch)
-        finally:
-            if grid_path.exists():
-                grid_path.unlink()
+            provider = create_image_provider(config, provider_name, model=model)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
 
-        if args.delay > 0:
-            time.sleep(args.delay)
-
-    # ⑤ 回写路径到 scene-scripts.json
+    success_count = 0
+    fail_count = 0
+    # 质检重试用尽后仍采用的 task_key（不入缓存）
+    qc_accepted: set[str] = set()
+    pacer = None
+    cell_pool = ProcessPoolExecutor(max_workers=config.get("image_postprocess_workers") or None)
+    try:
+        # ⑤ 缓存命中：由全分辨率缓存图派生渲染图
+        if cache_hit_tasks:
+            sizes, failed = _derive_from_sources(
+                cell_pool, output_dir, rel_prefix, post, cache_hit_tasks, task_results
+            )
+            task_sizes.update(sizes)
+            success_count += len(sizes)
+            fail_count += failed
+
+        if gen_tasks:
+            concurrency = args.concurrency or int(config.get("image_concurrency", 3))
+            concurrency = max(1, min(concurrency, len(plan)))
+            print(f"   🖼️  生图 provider: {provider.name}")
+            print(f"   🚦 最大并发: {concurrency}，初始间隔: {args.delay:.1f}s（按限流/延迟自适应）")
+            print(f"   📂 输出: {output_dir}")
+
+            ctx = GridBatchContext(
+                provider=provider,
+                output_dir=output_dir,
+                rel_prefix=rel_prefix,
+                image_style=image_style,
+                image_size=image_size,
+                max_rate_limit_retries=int(config.get("image_rate_limit_retries", 4)),
+                post=post,
+                cell_pool=cell_pool,
+                qc=None if args.no_qc else thresholds_from_config(config),
+                full_dir=full_dir if render_enabled else None,
+            )
+            pacer = AdaptivePacer(concurrency, min_interval=max(0.0, args.delay))
+
+            # ⑥ 并发执行批次；质检未通过的格子重新打包成更小的网格重试
+            qc_retries = 0 if ctx.qc is None else max(0, int(config.get("image_qc_retries", 1)))
+            for qc_round in range(qc_retries + 1):
+                retry_tasks = []
+                for outcome in run_plan(ctx, pacer, plan, concurrency):
+                    task_results.update(outcome.results)
+                    task_sizes.update(outcome.sizes)
+                    success_count += len(outcome.results)
+                    fail_count += len(outcome.failed)
+                    for task, rel_path, issues in outcome.rejected:
+                        if qc_round < qc_retries:
+                            retry_tasks.append(task)
+                            continue
+                        # 重试预算用尽：保留最后一次结果供人工复核，但不写入缓存
+                        print(f"   ⚠️ {get_output_filename(task)} 重试后仍未通过质检，保留最后结果，请人工复核")
+                        task_results[task["task_key"]] = rel_path
+                        qc_accepted.add(task["task_key"])
+                        success_count += 1
+                if not retry_tasks:
+                    break
+                plan = plan_grids(
+                    retry_tasks,
+                    image_size=image_size,
+                    min_cell_px=int(config.get("image_min_cell_px", 300)),
+                    allowed_aspects=allowed_aspects,
+                )
+                print(f"\n♻️  质检重试 {qc_round + 1}/{qc_retries}: {len(retry_tasks)} 张重新生成")
+                for line in format_plan(plan, image_size):
+                    print(f"   {line}")
+
+        # ⑦ 新图（全分辨率）入缓存，并为同 prompt 的重复任务派生各自的渲染图
+        dup_sources: list[tuple[dict, Path]] = []
+        for key, task in pending.items():
+            dups = duplicates.get(key, [])
+            if task["task_key"] not in task_results:
+                fail_count += len(dups)
+                continue
+            full_src = (
+                full_dir / get_output_filename(task) if task["render"] is not None
+                else output_dir / output_filename(task)
+            )
+            if cache is not None and task["task_key"] not in qc_accepted:
+                cache.store(key, full_src)
+            dup_sources.extend((dup, full_src) for dup in dups)
+        if dup_sources:
+            sizes, failed = _derive_from_sources(
+                cell_pool, output_dir, rel_prefix, post, dup_sources, task_results
+            )
+            task_sizes.update(sizes)
+            success_count += len(sizes)
+            fail_count += failed
+    finally:
+        cell_pool.shutdown()
+        if full_dir.is_dir():
+            shutil.rmtree(full_dir, ignore_errors=True)
+
+    if pacer is not None and pacer.rate_limited_count:
+        print(f"\n🚦 共触发限流 {pacer.rate_limited_count} 次，最终并发上限 {pacer.limit}")
+
+    # ⑧ 回写路径与像素尺寸到 scene-scripts.json
     if task_results:
-        apply_image_paths(scripts_data, task_results)
-        with open(input_path, "w", encoding="utf-8") as f:
-            json.dump(scripts_data, f, ensure_ascii=False, indent=2)
+        # 锁内按磁盘最新内容回写，不覆盖运行期间 Studio 等其他写方的改动
+        update_json(input_path, lambda data: apply_image_paths(data, task_results, task_sizes))
         print(f"\n📝 已将图片路径回写到 {input_path}")
 
     print(f"\n{'='*40}")
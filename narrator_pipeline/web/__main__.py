@@ -3,23 +3,69 @@
 from __future__ import annotations
 
 import os
+import signal
+import subprocess
+import sys
 
 import uvicorn
 
 from narrator_pipeline.common import load_env
 from narrator_pipeline.paths import PACKAGE_ROOT
+from narrator_pipeline.web.settings import api_workers, state_backend_url
+from narrator_pipeline.web.state_backend import parse_backend_url
 
 
 def main() -> None:
     load_env(PACKAGE_ROOT)
     host = os.environ.get("SCENE_STUDIO_HOST", "0.0.0.0")
     port = int(os.environ.get("SCENE_STUDIO_PORT", "21119"))
-    uvicorn.run(
-        "narrator_pipeline.web.app:app",
-        host=host,
-        port=port,
-        reload=False,
-    )
+    workers = api_workers()
+
+    # memory 后端无法跨进程：退回单个 API 进程并在其中执行任务
+    if parse_backend_url(state_backend_url())[0] == "memory":
+        if workers > 1:
+            print("⚠️ 状态后端为 memory，只能以单进程运行，忽略 SCENE_STUDIO_API_WORKERS")
+        uvicorn.run("narrator_pipeline.web.app:app", host=host, port=port, reload=False)
+        return
+
+    # 任务在独立进程中执行，API 进程只负责入队与查询
+    os.environ["SCENE_STUDIO_JOB_RUNNER"] = "external"
+    worker = _spawn_worker()
+    try:
+        uvicorn.run(
+            "narrator_pipeline.web.app:app",
+            host=host,
+            port=port,
+            reload=False,
+            workers=workers,
+        )
+    finally:
+        _stop_worker(worker)
+
+
+def _spawn_worker() -> subprocess.Popen:
+    kwargs = {}
+    if os.name == "nt":
+        # 独立进程组：之后才能向其单独发送 CTRL_BREAK_EVENT
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    return subprocess.Popen([sys.executable, "-m", "narrator_pipeline.web.worker"], **kwargs)
+
+
+def _stop_worker(worker: subprocess.Popen, timeout: float = 15.0) -> None:
+    """先请求任务进程自行退出（中止并结算运行中的任务），超时再强杀。"""
+    if worker.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            # terminate() 在 Windows 上是 TerminateProcess，任务进程来不及结算
+            worker.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            worker.send_signal(signal.SIGTERM)
+        worker.wait(timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        print("⚠️ 任务进程未能按时退出，强制结束；其运行中的任务将在心跳超时后标为 interrupted")
+        worker.kill()
+        worker.wait()
 
 
 if __name__ == "__main__":
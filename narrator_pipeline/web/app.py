@@ -2,18 +2,25 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 from dataclasses import asdict
 from urllib.parse import quote
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, Header, HTTPException, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 
+from narrator_pipeline.contracts.script_store import ScriptVersionConflict
+from narrator_pipeline.contracts.template_registry import reload_registry_if_changed
 from narrator_pipeline.contracts.validation_errors import ScriptValidationError
 from narrator_pipeline.web.auth import AuthDep, issue_token
 from narrator_pipeline.web import jobs as job_service
+from narrator_pipeline.web import template_catalog
 from narrator_pipeline.web import workspace
 from narrator_pipeline.web.schemas import (
+    ActiveJobParam,
     ConfirmSyncFromScriptsParam,
     ContinueStep1Param,
     CreateProjectParam,
@@ -22,23 +29,39 @@ from narrator_pipeline.web.schemas import (
     ExportProjectParam,
     GenerateParam,
     GetDraftParam,
+    GetDraftSceneParam,
+    GetScriptItemParam,
+    GetScriptSceneParam,
     GetScriptsParam,
     JobIdParam,
+    JobLogsParam,
+    ListProjectsParam,
     ListTemplatesParam,
     LoginParam,
+    PatchScriptsParam,
     PreviewSyncFromScriptsParam,
     ProjectNameParam,
     RegenParamParam,
+    RegenParamsParam,
     SaveDraftParam,
     SaveScriptsParam,
+    TemplateSchemaParam,
 )
-from narrator_pipeline.web.settings import workspace_root
+from narrator_pipeline.web.settings import job_runner, template_reload_interval, workspace_root
 from narrator_pipeline.web.workspace import ensure_workspace
 
 
+# 日志流：无新行时的轮询间隔与保活注释间隔（秒）
+LOG_STREAM_POLL_SEC = 0.5
+LOG_STREAM_KEEPALIVE_SEC = 15.0
+
+
 def create_app() -> FastAPI:
     ensure_workspace()
     job_service.recover_from_disk()
+    if job_runner() == "embedded":
+        # 单进程部署（如直接 uvicorn app:app）：在 API 进程内执行任务
+        job_service.start_worker()
     app = FastAPI(title="Scene Studio", version="0.1.0")
     app.add_middleware(
         CORSMiddleware,
@@ -46,8 +69,22 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # 模板目录等 ETag 缓存需要跨域读取响应头
+        expose_headers=["ETag"],
     )
 
+    reload_interval = template_reload_interval()
+    if reload_interval > 0:
+
+        @app.middleware("http")
+        async def hot_reload_templates(request: Request, call_next):
+            # 模板 TSX 有改动时增量重建注册表（按间隔节流，未变化时只做 stat）；
+            # 重建会读取解析 TSX 并写缓存文件，放到线程池执行，不阻塞事件循环上的其他请求
+            if request.url.path.startswith("/api/"):
+                if await run_in_threadpool(reload_registry_if_changed, min_interval=reload_interval):
+                    print("🔄 模板注册表已热更新")
+            return await call_next(request)
+
     @app.post("/api/login")
     def login(param: LoginParam):
         token = issue_token(param.password)
@@ -58,9 +95,11 @@ def create_app() -> FastAPI:
         return {"workspaceRoot": str(workspace_root())}
 
     @app.post("/api/projects/list")
-    def projects_list(_auth: AuthDep, _param: EmptyParam):
-        items = workspace.list_projects()
-        return {"projects": [asdict(p) for p in items]}
+    def projects_list(_auth: AuthDep, param: ListProjectsParam):
+        items, total = workspace.list_projects(
+            search=param.search, offset=param.offset, limit=param.limit
+        )
+        return {"projects": [asdict(p) for p in items], "total": total}
 
     @app.post("/api/projects/create")
     def projects_create(_auth: AuthDep, param: CreateProjectParam):
@@ -81,12 +120,12 @@ def create_app() -> FastAPI:
     @app.post("/api/projects/export")
     def projects_export(_auth: AuthDep, param: ExportProjectParam):
         try:
-            data = workspace.export_zip_bytes(param.name)
+            chunks = workspace.export_zip_stream(param.name, include_media=param.includeMedia)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e)) from e
         filename = f"{param.name}.zip"
-        return Response(
-            content=data,
+        return StreamingResponse(
+            chunks,
             media_type="application/zip",
             headers={
                 "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"
@@ -94,10 +133,12 @@ def create_app() -> FastAPI:
         )
 
     @app.post("/api/projects/import")
-    async def projects_import(_auth: AuthDep, file: UploadFile = File(...)):
-        raw = await file.read()
+    def projects_import(_auth: AuthDep, file: UploadFile = File(...)):
+        # 上传内容已由 multipart 解析器分块写入临时文件，这里直接按文件读取，不整体载入内存
         try:
-            name = workspace.import_zip_bytes(raw)
+            name = workspace.import_zip_stream(file.file)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e)) from e
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e)) from e
         return {"name": name}
@@ -112,6 +153,7 @@ def create_app() -> FastAPI:
                 llm_provider=param.llmProvider,
                 llm_model=param.llmModel,
                 force=param.force,
+                priority=param.priority,
             )
         except RuntimeError as e:
             raise HTTPException(status_code=409, detail=str(e)) from e
@@ -128,6 +170,7 @@ def create_app() -> FastAPI:
                 llm_provider=param.llmProvider,
                 llm_model=param.llmModel,
                 force=param.force,
+                priority=param.priority,
             )
         except RuntimeError as e:
             raise HTTPException(status_code=409, detail=str(e)) from e
@@ -135,6 +178,12 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=400, detail=str(e)) from e
         return {"jobId": job.jobId, "status": job.status, "phase": job.phase}
 
+    def _etag(version: str) -> str:
+        return f'"{version}"'
+
+    def _conflict_detail(e: ScriptVersionConflict) -> str:
+        return f"scene-scripts 已在别处被修改（当前版本 {e.actual}），请重新加载后再保存"
+
     def _job_payload(job: job_service.Job) -> dict:
         return {
             "jobId": job.jobId,
@@ -142,11 +191,16 @@ def create_app() -> FastAPI:
             "kind": job.kind,
             "status": job.status,
             "phase": job.phase,
-            "logs": job.logs[-200:],
+            "logs": job.logs[-job_service.LOG_TAIL_LINES:],
+            "logCount": job.logCount,
             "error": job.error,
             "createdAt": job.createdAt,
+            "startedAt": job.startedAt,
             "finishedAt": job.finishedAt,
             "timeoutSec": job_service.JOB_TIMEOUT_SEC,
+            "priority": job.priority,
+            "provider": job.provider,
+            "queuePosition": job_service.queue_position(job.jobId),
         }
 
     @app.post("/api/jobs/status")
@@ -156,11 +210,66 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=404, detail="job 不存在")
         return _job_payload(job)
 
+    @app.post("/api/jobs/logs")
+    def jobs_logs(_auth: AuthDep, param: JobLogsParam):
+        cursor = job_service.open_log_cursor(param.jobId, param.offset)
+        if cursor is None:
+            raise HTTPException(status_code=404, detail="job 不存在")
+        lines = cursor.read(param.limit)
+        return {"lines": lines, "nextOffset": cursor.offset}
+
+    @app.post("/api/jobs/logs/stream")
+    async def jobs_logs_stream(_auth: AuthDep, param: JobLogsParam, request: Request):
+        """SSE：从 offset 起推送日志行（id 为行号），任务结束且日志读完后发 end 事件。"""
+        # 状态查询（状态后端事务）与日志文件读取都是阻塞 I/O：放到线程池，不占用事件循环
+        cursor = await run_in_threadpool(job_service.open_log_cursor, param.jobId, param.offset)
+        if cursor is None:
+            raise HTTPException(status_code=404, detail="job 不存在")
+
+        def poll():
+            # 先取状态再读日志：终态之前写出的行必然在本轮读到
+            job = job_service.get_job(param.jobId)
+            return job, cursor.read(param.limit)
+
+        async def events():
+            idle = 0.0
+            while True:
+                job, lines = await run_in_threadpool(poll)
+                finished = job is None or job.status in job_service.TERMINAL_STATUSES
+                for record in lines:
+                    payload = json.dumps(record, ensure_ascii=False)
+                    yield f"id: {record.get('offset')}\ndata: {payload}\n\n"
+                if finished and not lines:
+                    status = None if job is None else job.status
+                    end = json.dumps({"status": status, "nextOffset": cursor.offset}, ensure_ascii=False)
+                    yield f"event: end\ndata: {end}\n\n"
+                    return
+                if await request.is_disconnected():
+                    return
+                if lines:
+                    idle = 0.0
+                    continue
+                idle += LOG_STREAM_POLL_SEC
+                if idle >= LOG_STREAM_KEEPALIVE_SEC:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+                await asyncio.sleep(LOG_STREAM_POLL_SEC)
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     @app.post("/api/jobs/active")
-    def jobs_active(_auth: AuthDep, _param: EmptyParam):
-        job = job_service.get_active_job()
+    def jobs_active(_auth: AuthDep, param: ActiveJobParam):
+        job = job_service.get_active_job(param.name)
         return {"job": None if job is None else _job_payload(job)}
 
+    @app.post("/api/jobs/list")
+    def jobs_list(_auth: AuthDep, _param: EmptyParam):
+        return {"jobs": [_job_payload(job) for job in job_service.list_active_jobs()]}
+
     @app.post("/api/draft/get")
     def draft_get(_auth: AuthDep, param: GetDraftParam):
         try:
@@ -169,6 +278,28 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=400, detail=str(e)) from e
         return {"draft": draft}
 
+    @app.post("/api/draft/outline")
+    def draft_outline(_auth: AuthDep, param: GetDraftParam, response: Response):
+        try:
+            outline, version = workspace.read_draft_outline(param.name)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        response.headers["ETag"] = _etag(version)
+        return {"outline": outline, "version": version}
+
+    @app.post("/api/draft/scene")
+    def draft_scene(_auth: AuthDep, param: GetDraftSceneParam, response: Response):
+        try:
+            scene, version = workspace.read_draft_scene(param.name, param.sceneIdx)
+        except (FileNotFoundError, IndexError) as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        response.headers["ETag"] = _etag(version)
+        return {"scene": scene, "version": version}
+
     @app.post("/api/draft/save")
     def draft_save(_auth: AuthDep, param: SaveDraftParam):
         try:
@@ -178,24 +309,86 @@ def create_app() -> FastAPI:
         return {"draft": draft}
 
     @app.post("/api/scripts/get")
-    def scripts_get(_auth: AuthDep, param: GetScriptsParam):
+    def scripts_get(_auth: AuthDep, param: GetScriptsParam, response: Response):
+        try:
+            scripts, version = workspace.read_scripts_versioned(param.name)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        response.headers["ETag"] = _etag(version)
+        return {"scripts": scripts, "version": version}
+
+    @app.post("/api/scripts/outline")
+    def scripts_outline(_auth: AuthDep, param: GetScriptsParam, response: Response):
         try:
-            scripts = workspace.read_scripts(param.name)
+            outline, version = workspace.read_scripts_outline(param.name)
         except FileNotFoundError as e:
             raise HTTPException(status_code=404, detail=str(e)) from e
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e)) from e
-        return {"scripts": scripts}
+        response.headers["ETag"] = _etag(version)
+        return {"outline": outline, "version": version}
+
+    @app.post("/api/scripts/scene")
+    def scripts_scene(_auth: AuthDep, param: GetScriptSceneParam, response: Response):
+        try:
+            scene, version = workspace.read_script_scene(param.name, param.sceneIdx)
+        except (FileNotFoundError, IndexError) as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        response.headers["ETag"] = _etag(version)
+        return {"scene": scene, "version": version}
+
+    @app.post("/api/scripts/item")
+    def scripts_item(_auth: AuthDep, param: GetScriptItemParam, response: Response):
+        try:
+            item, warnings, version = workspace.read_script_item(
+                param.name, param.sceneIdx, param.itemIdx
+            )
+        except (FileNotFoundError, IndexError) as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        response.headers["ETag"] = _etag(version)
+        return {"item": item, "warnings": warnings, "version": version}
 
     @app.post("/api/scripts/save")
-    def scripts_save(_auth: AuthDep, param: SaveScriptsParam):
+    def scripts_save(_auth: AuthDep, param: SaveScriptsParam, response: Response):
         try:
-            normalized, warnings = workspace.write_scripts(param.name, param.scripts)
+            normalized, warnings, version = workspace.write_scripts(
+                param.name, param.scripts, expected_version=param.version
+            )
+        except ScriptVersionConflict as e:
+            raise HTTPException(status_code=409, detail=_conflict_detail(e)) from e
         except ScriptValidationError as e:
             raise HTTPException(status_code=400, detail=str(e)) from e
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e)) from e
-        return {"scripts": normalized, "warnings": warnings}
+        response.headers["ETag"] = _etag(version)
+        return {"scripts": normalized, "warnings": warnings, "version": version}
+
+    @app.post("/api/scripts/patch")
+    def scripts_patch(
+        _auth: AuthDep,
+        param: PatchScriptsParam,
+        response: Response,
+        if_match: str | None = Header(None),
+    ):
+        version = param.version or (if_match.strip().strip('"') if if_match else None)
+        if not version:
+            raise HTTPException(status_code=428, detail="缺少版本：请在 version 或 If-Match 中提供")
+        try:
+            result = workspace.patch_scripts(param.name, param.ops, expected_version=version)
+        except ScriptVersionConflict as e:
+            raise HTTPException(status_code=409, detail=_conflict_detail(e)) from e
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        except ValueError as e:  # 含补丁非法（JsonPatchError）
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        response.headers["ETag"] = _etag(result["version"])
+        return result
 
     @app.post("/api/scripts/sync-preview")
     def scripts_sync_preview(_auth: AuthDep, param: PreviewSyncFromScriptsParam):
@@ -223,8 +416,8 @@ def create_app() -> FastAPI:
 
     @app.post("/api/scripts/regen-param")
     def scripts_regen_param(_auth: AuthDep, param: RegenParamParam):
-        if job_service.is_busy():
-            raise HTTPException(status_code=409, detail="已有生成任务在运行，请稍后再试")
+        if job_service.is_busy(param.name):
+            raise HTTPException(status_code=409, detail="该项目已有生成任务在运行，请稍后再试")
         try:
             result = workspace.regenerate_item_param(
                 param.name,
@@ -240,20 +433,63 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=400, detail=str(e)) from e
         return result
 
+    @app.post("/api/scripts/regen-params")
+    def scripts_regen_params(_auth: AuthDep, param: RegenParamsParam):
+        if job_service.is_busy(param.name):
+            raise HTTPException(status_code=409, detail="该项目已有生成任务在运行，请稍后再试")
+        try:
+            results = workspace.iter_regenerate_item_params(
+                param.name,
+                param.scripts,
+                [(t.sceneIdx, t.itemIdx) for t in param.targets],
+                llm_provider=param.llmProvider,
+                llm_model=param.llmModel,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+        def lines():
+            ok = failed = 0
+            try:
+                for result in results:
+                    if "error" in result:
+                        failed += 1
+                    else:
+                        ok += 1
+                    yield json.dumps(result, ensure_ascii=False) + "\n"
+            finally:
+                # 客户端断开时随即取消尚未完成的 LLM 请求
+                results.close()
+            yield json.dumps({"done": True, "ok": ok, "failed": failed}) + "\n"
+
+        return StreamingResponse(
+            lines(),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     @app.post("/api/templates/list")
-    def templates_list(_auth: AuthDep, _param: ListTemplatesParam):
-        return {"templates": workspace.template_catalog()}
+    def templates_list(_auth: AuthDep, param: ListTemplatesParam, request: Request):
+        return template_catalog.respond(
+            request, template_catalog.catalog_payload(compact=param.compact)
+        )
+
+    @app.post("/api/templates/schema")
+    def templates_schema(_auth: AuthDep, param: TemplateSchemaParam, request: Request):
+        try:
+            payload = template_catalog.schema_payload(param.name)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=f"模板不存在: {param.name}") from e
+        return template_catalog.respond(request, payload)
 
     @app.post("/api/projects/get")
     def projects_get(_auth: AuthDep, param: ProjectNameParam):
         try:
-            name = workspace.assert_valid_name(param.name)
+            info = workspace.get_project(param.name)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e)) from e
-        projects = {p.name: p for p in workspace.list_projects()}
-        info = projects.get(name)
         if info is None:
-            raise HTTPException(status_code=404, detail=f"工程不存在: {name}")
+            raise HTTPException(status_code=404, detail=f"工程不存在: {param.name}")
         return {"project": asdict(info)}
 
     return app
@@ -1,4 +1,4 @@
-"""单用户口令鉴权：登录发 opaque token，请求头 Bearer 校验。"""
+"""单用户口令鉴权：登录发 opaque token，请求头 Bearer 校验；token 存于共享状态后端，多个 API 进程通用。"""
 
 from __future__ import annotations
 
@@ -7,9 +7,8 @@ from typing import Annotated
 
 from fastapi import Depends, Header, HTTPException
 
-from narrator_pipeline.web.settings import auth_password
-
-_active_tokens: set[str] = set()
+from narrator_pipeline.web.settings import auth_password, auth_token_ttl
+from narrator_pipeline.web.state_backend import get_state_backend
 
 
 def issue_token(password: str) -> str:
@@ -20,7 +19,7 @@ def issue_token(password: str) -> str:
     if password != expected:
         raise HTTPException(status_code=401, detail="口令错误")
     token = secrets.token_urlsafe(32)
-    _active_tokens.add(token)
+    get_state_backend().add_token(token, auth_token_ttl())
     return token
 
 
@@ -30,7 +29,7 @@ def require_token(
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="缺少 Authorization Bearer")
     token = authorization[len("Bearer ") :].strip()
-    if token not in _active_tokens:
+    if not get_state_backend().token_valid(token):
         raise HTTPException(status_code=401, detail="无效或过期的 token")
     return token
 
@@ -1,24 +1,52 @@
-"""异步生成任务：全局单飞 + 进度日志 + 落盘状态。"""
+"""
+异步生成任务：任务队列与状态保存在共享状态后端（state_backend，默认 SQLite），
+可由多个 API 进程共同提交 / 查询，由任务进程（JobWorker）认领执行。
+
+- 队列按优先级（同优先级先进先出）认领；每个项目同一时刻至多一个排队中 / 运行中的任务，
+  force 取消该项目已有任务后重新排队；队列中被项目互斥或 provider 上限挡住的任务不阻塞其后可运行的任务。
+- 取消 / 超时为协作式：后端中置 cancelling，执行该任务的进程轮询到后触发其 CancelToken，Step0/1
+  在 LLM 调用之间与重试中检查、进行中的请求被中止；工作线程真正退出后才进入 cancelled / timed_out 终态。
+- cancelling 的任务在其线程退出前仍占用项目与 provider 名额，避免两个任务同时写同一项目。
+- 任务进程定期心跳；心跳中断的进程遗留的运行中任务标为 interrupted。
+- 日志：print 经 contextvar 路由到当前任务，逐行追加到 scenes/logs/generate-job-{jobId}.jsonl；
+  最近若干行与总行数定期同步到状态后端；generate-job.json 元数据只在状态 / 阶段变化时重写。
+"""
 
 from __future__ import annotations
 
 import json
+import os
+import socket
+import sys
 import threading
+import time
 import traceback
 import uuid
-from dataclasses import asdict, dataclass, field
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Callable, Literal
 
 from narrator_pipeline.analysis.step0 import run_step0_for_video
 from narrator_pipeline.analysis.step1 import run_step1_for_video
+from narrator_pipeline.common.cancellation import CancelToken, JobCancelled
+from narrator_pipeline.common.llm_utils import resolve_llm_provider
 from narrator_pipeline.paths import resolve_video_paths
-from narrator_pipeline.web.settings import pipeline_config_with_workspace, workspace_root
+from narrator_pipeline.web import project_index
+from narrator_pipeline.web.settings import (
+    job_workers,
+    pipeline_config_with_workspace,
+    provider_concurrency,
+    workspace_root,
+)
+from narrator_pipeline.web.state_backend import ACTIVE_STATUSES, get_state_backend
 
 JobStatus = Literal[
     "queued",
     "running",
+    "cancelling",
     "succeeded",
     "failed",
     "cancelled",
@@ -28,10 +56,16 @@ JobStatus = Literal[
 
 JOB_TIMEOUT_SEC = 600
 _DRAFT_PHASES = frozenset({"starting", "step0"})
-_TERMINAL = frozenset(
+TERMINAL_STATUSES = frozenset(
     {"succeeded", "failed", "cancelled", "timed_out", "interrupted"}
 )
 
+# 任务进程：空闲时认领新任务的轮询间隔、监控（取消 / 超时 / 日志同步）间隔、心跳间隔与判定退出的心跳超时（秒）
+CLAIM_POLL_SEC = 0.5
+MONITOR_SEC = 0.5
+HEARTBEAT_SEC = 2.0
+WORKER_STALE_SEC = 15.0
+
 
 @dataclass
 class Job:
@@ -40,46 +74,214 @@ class Job:
     kind: str
     status: JobStatus = "queued"
     phase: str = ""
+    # 最近若干行日志（完整日志见 log_path() 的 JSONL）；logCount 为总行数，即流式续读的下一个 offset
     logs: list[str] = field(default_factory=list)
+    logCount: int = 0
     error: str | None = None
     createdAt: str = field(
         default_factory=lambda: datetime.now(timezone.utc).isoformat()
     )
     finishedAt: str | None = None
+    startedAt: str | None = None
+    priority: int = 0
+    provider: str = ""
+    # 认领执行所需的启动参数
+    params: dict[str, Any] = field(default_factory=dict)
+
+
+_JOB_FIELDS = frozenset(f.name for f in fields(Job))
+
+# 本进程：日志捕获 / 路由流的锁，以及本进程正在执行的任务的取消令牌
+_lock = threading.RLock()
+_tokens: dict[str, CancelToken] = {}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _job_from_row(row: dict) -> Job:
+    return Job(**{k: v for k, v in row.items() if k in _JOB_FIELDS})
+
 
+# ─────────────────────────────────────────────────────────────
+# 日志：contextvar 路由 + 每任务追加写 JSONL
+# ─────────────────────────────────────────────────────────────
 
-_lock = threading.Lock()
-_jobs: dict[str, Job] = {}
-_running = False
-_active_job_id: str | None = None
+# 状态接口返回 / 内存保留的最近日志行数
+LOG_TAIL_LINES = 200
 
 
 class _LogCapture:
-    def __init__(self, job: Job):
+    """
+    单个任务的日志：按行切分（print 的多段 write 拼成一行），每行追加一条 JSONL 记录
+    {"offset", "ts", "text"} 并立即 flush，供流式接口按行号续读；内存只保留最近 LOG_TAIL_LINES 行。
+    只持有本任务的锁，不触发任务元数据落盘。
+    """
+
+    def __init__(self, job: Job, path: Path):
         self.job = job
-        self._since_flush = 0
+        self.path = path
+        self._lock = threading.Lock()
+        self._partial = ""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(path, "a", encoding="utf-8")
 
     def write(self, s: str) -> int:
-        text = s.rstrip("\n")
-        if text:
-            with _lock:
-                self.job.logs.append(text)
-                if len(self.job.logs) > 2000:
-                    self.job.logs = self.job.logs[-1500:]
-                self._since_flush += 1
-                should_flush = self._since_flush >= 20
-                if should_flush:
-                    self._since_flush = 0
-            if should_flush:
-                _persist_job(self.job)
+        with self._lock:
+            *lines, self._partial = (self._partial + s).split("\n")
+            for line in lines:
+                self._emit_locked(line)
         return len(s)
 
+    def append(self, line: str) -> None:
+        with self._lock:
+            self._emit_locked(line)
+
+    def _emit_locked(self, line: str) -> None:
+        text = line.rstrip("\r")
+        if not text.strip() or self._fh is None:
+            return
+        record = {"offset": self.job.logCount, "ts": _now(), "text": text}
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        self.job.logCount += 1
+        self.job.logs.append(text)
+        if len(self.job.logs) > 2 * LOG_TAIL_LINES:
+            del self.job.logs[:-LOG_TAIL_LINES]
+
     def flush(self) -> None:
         return None
 
+    def close(self) -> None:
+        with self._lock:
+            if self._partial:
+                self._emit_locked(self._partial)
+                self._partial = ""
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+_current_log: ContextVar[_LogCapture | None] = ContextVar("scene_studio_job_log", default=None)
+# 运行中任务的日志（jobId → capture），供 _set_phase / 取消等从其他线程追加
+_captures: dict[str, _LogCapture] = {}
+
+
+class _RoutedStream:
+    """并发任务各自捕获输出：当前上下文登记了任务日志时写入该任务，否则写原始流（服务自身输出不受影响）。"""
 
-def _active_pointer_path() -> Path:
-    return workspace_root() / ".scene-studio" / "active-job.json"
+    def __init__(self, original):
+        self.original = original
+
+    def write(self, s: str) -> int:
+        capture = _current_log.get()
+        if capture is not None:
+            return capture.write(s)
+        return self.original.write(s)
+
+    def flush(self) -> None:
+        if _current_log.get() is None:
+            self.original.flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self.original, name)
+
+
+_streams_installed = False
+
+
+def _install_routed_streams() -> None:
+    global _streams_installed
+    with _lock:
+        if _streams_installed:
+            return
+        sys.stdout = _RoutedStream(sys.stdout)  # type: ignore[assignment]
+        sys.stderr = _RoutedStream(sys.stderr)  # type: ignore[assignment]
+        _streams_installed = True
+
+
+def _with_stdout_capture(job: Job, fn: Callable[[], None]) -> None:
+    capture = _captures.get(job.jobId)
+    if capture is None:
+        fn()
+        return
+    _install_routed_streams()
+    token = _current_log.set(capture)
+    try:
+        fn()
+    finally:
+        _current_log.reset(token)
+
+
+def _append_log(job: Job, line: str) -> None:
+    capture = _captures.get(job.jobId)
+    if capture is not None:
+        capture.append(line)
+    else:
+        job.logs.append(line)
+        job.logCount += 1
+
+
+class LogCursor:
+    """从第 offset 行起增量读取任务日志文件；只返回已完整写出的行，记住文件位置，续读不重复扫描。"""
+
+    def __init__(self, path: Path, offset: int = 0):
+        self.path = path
+        self.offset = max(0, offset)
+        self._pos = 0
+        self._skip = self.offset
+
+    def read(self, max_lines: int = 500) -> list[dict]:
+        if not self.path.is_file():
+            return []
+        out: list[dict] = []
+        with open(self.path, "rb") as f:
+            f.seek(self._pos)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                self._pos += len(raw)
+                if self._skip:
+                    self._skip -= 1
+                    continue
+                # offset 按行计数（与 _read_log_tail 一致），无法解析的行也要计入
+                self.offset += 1
+                try:
+                    out.append(json.loads(raw))
+                except ValueError:
+                    continue
+                if len(out) >= max_lines:
+                    break
+        return out
+
+
+def _read_log_tail(path: Path, n: int = LOG_TAIL_LINES) -> tuple[list[str], int]:
+    """(最近 n 行文本, 总行数)；文件不存在返回 ([], 0)。"""
+    if not path.is_file():
+        return [], 0
+    tail: deque[str] = deque(maxlen=n)
+    count = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            count += 1
+            try:
+                tail.append(str(json.loads(raw).get("text", "")))
+            except (ValueError, AttributeError):
+                continue
+    return list(tail), count
+
+
+# ─────────────────────────────────────────────────────────────
+# 落盘
+# ─────────────────────────────────────────────────────────────
+
+def _legacy_pointer_paths() -> list[Path]:
+    """旧版进程内调度器保存未结束任务的指针文件（仅用于迁移）。"""
+    root = workspace_root() / ".scene-studio"
+    return [root / "active-jobs.json", root / "active-job.json"]
 
 
 def _job_path(name: str) -> Path:
@@ -87,13 +289,20 @@ def _job_path(name: str) -> Path:
     return resolve_video_paths(name, config).generate_job
 
 
+def log_path(job: Job) -> Path:
+    config = pipeline_config_with_workspace()
+    return resolve_video_paths(job.name, config).scenes_dir / "logs" / f"generate-job-{job.jobId}.jsonl"
+
+
 def _job_to_dict(job: Job) -> dict[str, Any]:
+    """元数据（不含日志行：日志在 JSONL 中追加写）。"""
     data = asdict(job)
-    data["logs"] = job.logs[-200:]
+    data.pop("logs", None)
     return data
 
 
 def _persist_job(job: Job) -> None:
+    """项目目录下的任务快照；仅在状态 / 阶段变化时调用。"""
     path = _job_path(job.name)
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(
@@ -102,20 +311,6 @@ def _persist_job(job: Job) -> None:
     )
 
 
-def _persist_active(job: Job | None) -> None:
-    pointer = _active_pointer_path()
-    if job is None:
-        if pointer.is_file():
-            pointer.unlink()
-        return
-    pointer.parent.mkdir(parents=True, exist_ok=True)
-    pointer.write_text(
-        json.dumps({"name": job.name, "jobId": job.jobId}, ensure_ascii=False, indent=2)
-        + "\n",
-        encoding="utf-8",
-    )
-
-
 def _load_job_file(name: str) -> Job | None:
     path = _job_path(name)
     if not path.is_file():
@@ -123,7 +318,7 @@ def _load_job_file(name: str) -> Job | None:
     raw = json.loads(path.read_text(encoding="utf-8"))
     if not isinstance(raw, dict):
         return None
-    return Job(
+    job = Job(
         jobId=str(raw["jobId"]),
         name=str(raw["name"]),
         kind=str(raw["kind"]),
@@ -131,152 +326,353 @@ def _load_job_file(name: str) -> Job | None:
         phase=str(raw.get("phase") or ""),
         logs=list(raw.get("logs") or []),
         error=raw.get("error"),
-        createdAt=str(raw.get("createdAt") or datetime.now(timezone.utc).isoformat()),
+        createdAt=str(raw.get("createdAt") or _now()),
         finishedAt=raw.get("finishedAt"),
+        startedAt=raw.get("startedAt"),
+        priority=int(raw.get("priority") or 0),
+        provider=str(raw.get("provider") or ""),
+        params=dict(raw.get("params") or {}),
     )
+    # 旧版元数据内嵌 logs；新版从 JSONL 读取最近若干行
+    tail, count = _read_log_tail(log_path(job))
+    if count:
+        job.logs, job.logCount = tail, count
+    else:
+        job.logCount = len(job.logs)
+    return job
 
 
-def _parse_created_at(job: Job) -> datetime:
-    try:
-        return datetime.fromisoformat(job.createdAt)
-    except ValueError:
-        return datetime.now(timezone.utc)
+def _persist_rows(rows: list[dict]) -> None:
+    """其他进程 / 后端改过状态的任务：同步项目目录下的快照。"""
+    for row in rows:
+        try:
+            _persist_job(_job_from_row(row))
+        except Exception:
+            traceback.print_exc()
+
+
+# ─────────────────────────────────────────────────────────────
+# 任务进程
+# ─────────────────────────────────────────────────────────────
+
+class JobWorker:
+    """
+    从共享队列认领并执行任务：每个工作线程认领 priority 最高（同级最早入队）、项目空闲且 provider 未满的任务；
+    监控线程心跳、把后端中的取消 / 超时转成本地 CancelToken、同步日志进度，并回收心跳中断的进程遗留的任务。
+    """
+
+    def __init__(self, workers: int, provider_caps: dict[str, int]):
+        self.workers = max(1, workers)
+        self.provider_caps = dict(provider_caps)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        # 本进程正在执行的任务，及已同步到后端的日志行数
+        self._running: dict[str, Job] = {}
+        self._synced: dict[str, int] = {}
+
+    def start(self) -> None:
+        with self._cond:
+            if self._threads:
+                return
+            get_state_backend().heartbeat(self.worker_id)
+            targets = [self._work_loop] * self.workers + [self._monitor_loop]
+            for i, target in enumerate(targets):
+                t = threading.Thread(target=target, name=f"scene-studio-job-{i}", daemon=True)
+                self._threads.append(t)
+                t.start()
+
+    def wake(self) -> None:
+        """有新任务入队或名额释放：唤醒空闲的工作线程立即认领。"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """停止认领并中止本进程的任务；未能及时退出的任务在后端标为 interrupted。"""
+        self._stop.set()
+        with _lock:
+            running = list(self._running.values())
+            for job in running:
+                job.status = "cancelling"
+        for job in running:
+            token = _tokens.get(job.jobId)
+            if token is not None:
+                token.cancel("任务进程退出")
+        self.wake()
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        _persist_rows(
+            get_state_backend().retire_worker(
+                self.worker_id, reason="任务进程退出，生成任务已中断，可重新生成"
+            )
+        )
+
+    def _work_loop(self) -> None:
+        backend = get_state_backend()
+        while not self._stop.is_set():
+            try:
+                row = backend.claim_job(self.worker_id, self.provider_caps, self.workers)
+            except Exception:
+                traceback.print_exc()
+                row = None
+            if row is None:
+                with self._cond:
+                    self._cond.wait(timeout=CLAIM_POLL_SEC)
+                continue
+            self._run(_job_from_row(row))
+
+    def _run(self, job: Job) -> None:
+        with _lock:
+            self._running[job.jobId] = job
+            _tokens[job.jobId] = CancelToken()
+        try:
+            _captures[job.jobId] = _LogCapture(job, log_path(job))
+        except OSError:
+            traceback.print_exc()
+        _persist_job(job)
+        try:
+            _RUNNERS[job.kind](job)
+        except JobCancelled:
+            pass
+        except Exception:
+            traceback.print_exc()
+        finally:
+            capture = _captures.pop(job.jobId, None)
+            if capture is not None:
+                capture.close()
+            try:
+                # Step0/1 写了草稿 / 脚本：更新工程列表索引
+                project_index.refresh(job.name)
+            except Exception:
+                traceback.print_exc()
+            try:
+                self._sync_logs(job)
+                settled = get_state_backend().settle_job(job.jobId)
+                if settled is not None:
+                    with _lock:
+                        job.status = settled["status"]
+                        job.finishedAt = settled["finishedAt"]
+                    _persist_job(job)
+            except Exception:
+                traceback.print_exc()
+            with _lock:
+                self._running.pop(job.jobId, None)
+                self._synced.pop(job.jobId, None)
+                _tokens.pop(job.jobId, None)
+            self.wake()
+
+    def _sync_logs(self, job: Job) -> None:
+        count = job.logCount
+        if self._synced.get(job.jobId) == count:
+            return
+        get_state_backend().update_job(
+            job.jobId, {"logs": job.logs[-LOG_TAIL_LINES:], "logCount": count}
+        )
+        self._synced[job.jobId] = count
+
+    def _apply_cancel(self, job: Job, reason: str) -> None:
+        with _lock:
+            if job.status != "running":
+                return
+            job.status = "cancelling"
+            job.error = reason
+            token = _tokens.get(job.jobId)
+        _append_log(job, f"[cancel] {reason}")
+        if token is not None:
+            token.cancel(reason)
+        _persist_job(job)
 
+    def _monitor_loop(self) -> None:
+        backend = get_state_backend()
+        last_beat = last_reap = 0.0
+        while not self._stop.wait(MONITOR_SEC):
+            try:
+                now = time.monotonic()
+                if now - last_beat >= HEARTBEAT_SEC:
+                    backend.heartbeat(self.worker_id)
+                    last_beat = now
+                _persist_rows(backend.expire_jobs(JOB_TIMEOUT_SEC))
+                with _lock:
+                    running = list(self._running.values())
+                if running:
+                    rows = {r["jobId"]: r for r in backend.list_jobs(job_ids=[j.jobId for j in running])}
+                    for job in running:
+                        row = rows.get(job.jobId)
+                        if row is not None and row["status"] == "cancelling":
+                            self._apply_cancel(job, row.get("error") or "已取消")
+                        self._sync_logs(job)
+                if now - last_reap >= WORKER_STALE_SEC / 3:
+                    reaped = backend.reap_orphans(WORKER_STALE_SEC)
+                    last_reap = now
+                    if reaped:
+                        _persist_rows(reaped)
+                        self.wake()
+            except Exception:
+                traceback.print_exc()
+
+
+_worker: JobWorker | None = None
+
+
+def start_worker() -> JobWorker:
+    """在本进程启动任务执行端（独立任务进程，或单进程部署时嵌入 API 进程）。"""
+    global _worker
+    with _lock:
+        if _worker is None:
+            _worker = JobWorker(job_workers(), provider_concurrency())
+            _worker.start()
+        return _worker
+
+
+def stop_worker(timeout: float = 10.0) -> None:
+    global _worker
+    with _lock:
+        worker, _worker = _worker, None
+    if worker is not None:
+        worker.stop(timeout)
+
+
+# ─────────────────────────────────────────────────────────────
+# 查询
+# ─────────────────────────────────────────────────────────────
 
 def _is_draft_generating(job: Job) -> bool:
     return job.kind == "generate" and job.phase in _DRAFT_PHASES
 
 
 def get_job(job_id: str) -> Job | None:
-    with _lock:
-        _expire_locked()
-        return _jobs.get(job_id)
+    row = get_state_backend().get_job(job_id)
+    return _job_from_row(row) if row is not None else None
 
 
-def is_busy() -> bool:
-    with _lock:
-        _expire_locked()
-        return _running
+def open_log_cursor(job_id: str, offset: int = 0) -> LogCursor | None:
+    """任务日志的增量读取游标；任务不存在返回 None。"""
+    job = get_job(job_id)
+    if job is None:
+        return None
+    return LogCursor(log_path(job), offset)
 
 
-def get_active_job() -> Job | None:
-    """返回当前进行中的全局单飞任务；无则 None。"""
-    with _lock:
-        _expire_locked()
-        if _active_job_id is None:
-            return None
-        job = _jobs.get(_active_job_id)
-        if job is None or job.status in _TERMINAL:
-            return None
-        return job
+def queue_position(job_id: str) -> int | None:
+    return get_state_backend().queue_position(job_id)
 
 
+def is_busy(name: str | None = None) -> bool:
+    """
+    name 给定时判断该项目是否有未结束任务（含线程尚未退出的 cancelling 任务，其仍可能写项目文件）；
+    否则判断是否有任何未结束任务。
+    """
+    return bool(get_state_backend().list_jobs(statuses=ACTIVE_STATUSES, name=name))
+
+
+def list_active_jobs() -> list[Job]:
+    """运行中的任务在前，其后按队列顺序。"""
+    rows = get_state_backend().list_jobs(statuses=ACTIVE_STATUSES)
+    running = sorted(
+        (r for r in rows if r["status"] != "queued"), key=lambda r: r.get("startedAt") or ""
+    )
+    # list_jobs 按入队顺序返回，稳定排序后即同优先级先进先出
+    queued = sorted((r for r in rows if r["status"] == "queued"), key=lambda r: -r["priority"])
+    return [_job_from_row(r) for r in running + queued]
+
+
+def get_active_job(name: str | None = None) -> Job | None:
+    """返回（该项目）最近创建的未结束任务；无则 None。"""
+    rows = get_state_backend().list_jobs(statuses=ACTIVE_STATUSES, name=name)
+    return _job_from_row(max(rows, key=lambda r: r["createdAt"])) if rows else None
+
+
+# ─────────────────────────────────────────────────────────────
+# 状态变更
+# ─────────────────────────────────────────────────────────────
+
 def recover_from_disk() -> None:
-    """进程启动时恢复落盘状态；running 任务因无线程标为 interrupted。"""
-    global _running, _active_job_id
-    with _lock:
-        pointer = _active_pointer_path()
+    """
+    迁移旧版落盘的未结束任务（active-jobs.json）到状态后端：running 因无线程标为 interrupted，
+    cancelling 标为 cancelled，queued 重新排队。已迁移过的任务（jobId 已存在）忽略。
+    """
+    refs: list[dict] = []
+    for pointer in _legacy_pointer_paths():
         if not pointer.is_file():
-            _running = False
-            _active_job_id = None
-            return
+            continue
         try:
             meta = json.loads(pointer.read_text(encoding="utf-8"))
-            name = str(meta["name"])
-            job_id = str(meta["jobId"])
-        except (OSError, KeyError, TypeError, json.JSONDecodeError):
-            pointer.unlink(missing_ok=True)
-            _running = False
-            _active_job_id = None
-            return
+        except (OSError, json.JSONDecodeError):
+            meta = []
+        refs.extend(meta if isinstance(meta, list) else [meta])
+        pointer.unlink(missing_ok=True)
 
+    backend = get_state_backend()
+    for ref in refs:
+        try:
+            name = str(ref["name"])
+            job_id = str(ref["jobId"])
+        except (KeyError, TypeError):
+            continue
         job = _load_job_file(name)
-        if job is None or job.jobId != job_id:
-            pointer.unlink(missing_ok=True)
-            _running = False
-            _active_job_id = None
-            return
-
-        _jobs[job.jobId] = job
-        if job.status == "running":
+        if job is None or job.jobId != job_id or job.status in TERMINAL_STATUSES:
+            continue
+        if job.status == "cancelling":
+            job.status = "cancelled"
+            job.finishedAt = _now()
+        elif job.status == "running":
             job.status = "interrupted"
             job.error = "服务重启，生成任务已中断，可重新生成"
-            job.finishedAt = datetime.now(timezone.utc).isoformat()
+            job.finishedAt = _now()
+        else:
+            job.status = "queued"
+        job.logs = job.logs[-LOG_TAIL_LINES:]
+        if backend.import_job(asdict(job)) and job.status != "queued":
             _persist_job(job)
-            pointer.unlink(missing_ok=True)
-            _running = False
-            _active_job_id = None
-            return
-
-        if job.status in _TERMINAL:
-            pointer.unlink(missing_ok=True)
-            _running = False
-            _active_job_id = None
-            return
-
-        _running = True
-        _active_job_id = job.jobId
-
-
-def _expire_locked() -> None:
-    global _running, _active_job_id
-    if _active_job_id is None:
-        return
-    job = _jobs.get(_active_job_id)
-    if job is None or job.status != "running":
-        return
-    created = _parse_created_at(job)
-    now = datetime.now(timezone.utc)
-    if created.tzinfo is None:
-        created = created.replace(tzinfo=timezone.utc)
-    if (now - created).total_seconds() < JOB_TIMEOUT_SEC:
-        return
-    job.status = "timed_out"
-    job.error = f"生成超时（{JOB_TIMEOUT_SEC // 60} 分钟），可重新生成"
-    job.finishedAt = now.isoformat()
-    _running = False
-    _active_job_id = None
-    _persist_job(job)
-    _persist_active(None)
-
-
-def _cancel_active_locked(*, reason: str) -> Job | None:
-    global _running, _active_job_id
-    if _active_job_id is None:
-        return None
-    job = _jobs.get(_active_job_id)
-    if job is None:
-        _running = False
-        _active_job_id = None
-        _persist_active(None)
-        return None
-    if job.status == "running":
-        job.status = "cancelled"
-        job.error = reason
-        job.finishedAt = datetime.now(timezone.utc).isoformat()
-        _persist_job(job)
-    _running = False
-    _active_job_id = None
-    _persist_active(None)
-    return job
 
 
 def _set_phase(job: Job, phase: str) -> None:
     with _lock:
-        if job.status != "running" or _active_job_id != job.jobId:
+        if job.status != "running":
             return
         job.phase = phase
-        job.logs.append(f"[phase] {phase}")
+    get_state_backend().update_job(job.jobId, {"phase": phase}, when_status=("running",))
+    _append_log(job, f"[phase] {phase}")
     _persist_job(job)
 
 
-def _begin_job(job: Job) -> None:
-    global _running, _active_job_id
-    _jobs[job.jobId] = job
-    _running = True
-    _active_job_id = job.jobId
+def _submit(
+    name: str,
+    kind: str,
+    *,
+    llm_provider: str | None,
+    params: dict[str, Any],
+    priority: int,
+    force: bool,
+    replaced_reason: str,
+) -> Job:
+    provider = resolve_llm_provider(pipeline_config_with_workspace(), llm_provider)
+    job = Job(
+        jobId=str(uuid.uuid4()),
+        name=name,
+        kind=kind,
+        status="queued",
+        phase="starting",
+        priority=int(priority),
+        provider=provider,
+        params=params,
+    )
+
+    def refuse(existing: dict) -> str | None:
+        if kind == "step1" and _is_draft_generating(_job_from_row(existing)):
+            return "正在生成草稿（Step0），不允许生成脚本"
+        return None
+
+    # 冲突时抛 JobConflict（RuntimeError）
+    get_state_backend().create_job(
+        asdict(job), force=force, replaced_reason=replaced_reason, refuse=refuse
+    )
     _persist_job(job)
-    _persist_active(job)
+    if _worker is not None:
+        _worker.wake()
+    return job
 
 
 def start_generate(
@@ -286,29 +682,21 @@ def start_generate(
     llm_provider: str | None,
     llm_model: str | None,
     force: bool = False,
+    priority: int = 0,
 ) -> Job:
-    with _lock:
-        _expire_locked()
-        if _running:
-            if not force:
-                raise RuntimeError("已有生成任务在运行（全局单飞）")
-            _cancel_active_locked(reason="被新的生成任务顶替")
-        job = Job(
-            jobId=str(uuid.uuid4()),
-            name=name,
-            kind="generate",
-            status="running",
-            phase="starting",
-        )
-        _begin_job(job)
-
-    thread = threading.Thread(
-        target=_run_generate,
-        args=(job.jobId, pause_after_step0, llm_provider, llm_model),
-        daemon=True,
+    return _submit(
+        name,
+        "generate",
+        llm_provider=llm_provider,
+        params={
+            "pause_after_step0": pause_after_step0,
+            "llm_provider": llm_provider,
+            "llm_model": llm_model,
+        },
+        priority=priority,
+        force=force,
+        replaced_reason="被新的生成任务顶替",
     )
-    thread.start()
-    return job
 
 
 def start_step1_only(
@@ -317,78 +705,61 @@ def start_step1_only(
     llm_provider: str | None,
     llm_model: str | None,
     force: bool = False,
+    priority: int = 0,
 ) -> Job:
-    with _lock:
-        _expire_locked()
-        if _running:
-            active = _jobs.get(_active_job_id) if _active_job_id else None
-            if active is not None and _is_draft_generating(active):
-                raise RuntimeError("正在生成草稿（Step0），不允许生成脚本")
-            if not force:
-                raise RuntimeError("已有生成任务在运行（全局单飞）")
-            _cancel_active_locked(reason="被新的脚本生成任务顶替")
-        job = Job(
-            jobId=str(uuid.uuid4()),
-            name=name,
-            kind="step1",
-            status="running",
-            phase="starting",
-        )
-        _begin_job(job)
-
-    thread = threading.Thread(
-        target=_run_step1_only,
-        args=(job.jobId, llm_provider, llm_model),
-        daemon=True,
+    return _submit(
+        name,
+        "step1",
+        llm_provider=llm_provider,
+        params={"llm_provider": llm_provider, "llm_model": llm_model},
+        priority=priority,
+        force=force,
+        replaced_reason="被新的脚本生成任务顶替",
     )
-    thread.start()
-    return job
 
 
 def _finish(job: Job, *, ok: bool, error: str | None = None) -> None:
-    global _running, _active_job_id
     with _lock:
-        if job.status in _TERMINAL:
-            return
-        if _active_job_id != job.jobId:
+        if job.status != "running":
             return
-        job.status = "succeeded" if ok else "failed"
+    status = "succeeded" if ok else "failed"
+    finished_at = _now()
+    # 后端中已被取消（尚未被监控线程同步到本地）时不覆盖，由 settle_job 结算
+    if not get_state_backend().update_job(
+        job.jobId,
+        {"status": status, "error": error, "finishedAt": finished_at},
+        when_status=("running",),
+    ):
+        return
+    with _lock:
+        job.status = status
         job.error = error
-        job.finishedAt = datetime.now(timezone.utc).isoformat()
-        _running = False
-        _active_job_id = None
+        job.finishedAt = finished_at
     _persist_job(job)
-    _persist_active(None)
 
 
-def _with_stdout_capture(job: Job, fn: Callable[[], None]) -> None:
-    import sys
-
-    capture = _LogCapture(job)
-    old_out, old_err = sys.stdout, sys.stderr
-    sys.stdout = capture  # type: ignore[assignment]
-    sys.stderr = capture  # type: ignore[assignment]
-    try:
-        fn()
-    finally:
-        sys.stdout = old_out
-        sys.stderr = old_err
+def _still_active(job: Job) -> bool:
+    with _lock:
+        return job.status == "running"
 
 
-def _still_active(job: Job) -> bool:
+def _cancel_token(job: Job) -> CancelToken:
     with _lock:
-        return _active_job_id == job.jobId and job.status == "running"
+        token = _tokens.get(job.jobId)
+        if token is None:
+            token = _tokens[job.jobId] = CancelToken()
+        return token
 
 
-def _run_generate(
-    job_id: str,
-    pause_after_step0: bool,
-    llm_provider: str | None,
-    llm_model: str | None,
-) -> None:
-    job = get_job(job_id)
-    if job is None:
-        return
+# ─────────────────────────────────────────────────────────────
+# 任务实现（在工作线程中执行）
+# ─────────────────────────────────────────────────────────────
+
+def _run_generate(job: Job) -> None:
+    pause_after_step0 = bool(job.params.get("pause_after_step0"))
+    llm_provider = job.params.get("llm_provider")
+    llm_model = job.params.get("llm_model")
+    token = _cancel_token(job)
     try:
         config = pipeline_config_with_workspace()
 
@@ -402,6 +773,7 @@ def _run_generate(
                 llm_provider=llm_provider,
                 llm_model=llm_model,
                 print_continue_hint=False,
+                cancel_token=token,
             )
             if not _still_active(job):
                 return
@@ -414,6 +786,7 @@ def _run_generate(
                 config,
                 llm_provider=llm_provider,
                 llm_model=llm_model,
+                cancel_token=token,
             )
             if not _still_active(job):
                 return
@@ -422,19 +795,17 @@ def _run_generate(
         _with_stdout_capture(job, work)
         if _still_active(job):
             _finish(job, ok=True)
+    except JobCancelled:
+        return
     except Exception as e:
         if _still_active(job):
             _finish(job, ok=False, error=f"{e}\n{traceback.format_exc()}")
 
 
-def _run_step1_only(
-    job_id: str,
-    llm_provider: str | None,
-    llm_model: str | None,
-) -> None:
-    job = get_job(job_id)
-    if job is None:
-        return
+def _run_step1_only(job: Job) -> None:
+    llm_provider = job.params.get("llm_provider")
+    llm_model = job.params.get("llm_model")
+    token = _cancel_token(job)
     try:
         config = pipeline_config_with_workspace()
 
@@ -447,6 +818,7 @@ def _run_step1_only(
                 config,
                 llm_provider=llm_provider,
                 llm_model=llm_model,
+                cancel_token=token,
             )
             if not _still_active(job):
                 return
@@ -455,6 +827,14 @@ def _run_step1_only(
         _with_stdout_capture(job, work)
         if _still_active(job):
             _finish(job, ok=True)
+    except JobCancelled:
+        return
     except Exception as e:
         if _still_active(job):
             _finish(job, ok=False, error=f"{e}\n{traceback.format_exc()}")
+
+
+_RUNNERS: dict[str, Callable[[Job], None]] = {
+    "generate": _run_generate,
+    "step1": _run_step1_only,
+}
@@ -0,0 +1,226 @@
+"""
+工程列表索引：.scene-studio/projects.sqlite3 缓存每个工程的 topic / 文件标志 / mtime，首页列表不再逐个解析 JSON。
+
+- 写路径（新建 / 删除 / 保存草稿与脚本 / 导入 / 任务结束）调用 refresh(name) 只更新该工程一行。
+- 工作区可能被 CLI 等外部进程改写：list / get 前按间隔惰性对账（reconcile），
+  只 stat 约定路径比对指纹，指纹变化的工程才重新读取 topic。
+- 索引是派生数据：schema 版本不符或库文件损坏时直接重建。
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from narrator_pipeline.contracts.script_store import loads_script
+from narrator_pipeline.paths import VideoPaths, resolve_video_paths
+from narrator_pipeline.web.settings import pipeline_config_with_workspace, workspace_root
+
+INDEX_FILENAME = "projects.sqlite3"
+SCHEMA_VERSION = 1
+# 两次对账的最小间隔（秒）；写路径自行 refresh，不依赖对账
+RECONCILE_INTERVAL_SEC = 10.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    name TEXT PRIMARY KEY,
+    topic TEXT,
+    has_narration INTEGER NOT NULL,
+    has_draft INTEGER NOT NULL,
+    has_scripts INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    stamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_mtime ON projects (mtime DESC, name);
+"""
+
+_lock = threading.Lock()
+_last_reconcile: dict[str, float] = {}
+
+
+def index_path() -> Path:
+    return workspace_root() / ".scene-studio" / INDEX_FILENAME
+
+
+def _open(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        conn.executescript("DROP TABLE IF EXISTS projects;" + _SCHEMA)
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.commit()
+    return conn
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    path = index_path()
+    try:
+        conn = _open(path)
+    except sqlite3.DatabaseError:
+        # 库文件损坏：删掉重建（下次对账会补齐全部工程）
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+        _last_reconcile.pop(str(path), None)
+        conn = _open(path)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+# ─────────────────────────────────────────────────────────────
+# 磁盘侧
+# ─────────────────────────────────────────────────────────────
+
+def _stat(path: Path) -> os.stat_result | None:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _fingerprint(paths: VideoPaths) -> tuple[str, float, tuple[bool, bool, bool]] | None:
+    """(指纹, 最近修改时间, (口播, 草稿, 脚本) 是否存在)；工程不存在返回 None。"""
+    files = (paths.narration_txt, paths.scene_split_draft, paths.scene_scripts)
+    dirs = (paths.scenes_dir, paths.scenes_dir.parent)
+    file_stats = [_stat(p) for p in files]
+    dir_stats = [_stat(p) for p in dirs]
+    existing = [st for st in file_stats + dir_stats if st is not None]
+    if not existing:
+        return None
+    stamp = "|".join(
+        f"{st.st_mtime_ns}:{st.st_size}" if st is not None else "-"
+        for st in file_stats + dir_stats
+    )
+    flags = tuple(st is not None for st in file_stats)
+    return stamp, max(st.st_mtime for st in existing), flags  # type: ignore[return-value]
+
+
+def _read_topic(path: Path) -> str | None:
+    try:
+        data = loads_script(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    topic = data.get("topic") if isinstance(data, dict) else None
+    return topic if isinstance(topic, str) else None
+
+
+def _scan_names() -> set[str]:
+    root = workspace_root()
+    names: set[str] = set()
+    try:
+        with os.scandir(root / "narrations") as it:
+            names.update(e.name[:-4] for e in it if e.name.endswith(".txt") and e.is_file())
+    except OSError:
+        pass
+    try:
+        with os.scandir(root / "src" / "remotions") as it:
+            names.update(e.name for e in it if e.is_dir())
+    except OSError:
+        pass
+    return names
+
+
+def _upsert(conn: sqlite3.Connection, name: str, paths: VideoPaths) -> None:
+    fp = _fingerprint(paths)
+    if fp is None:
+        conn.execute("DELETE FROM projects WHERE name = ?", (name,))
+        return
+    stamp, mtime, (has_narration, has_draft, has_scripts) = fp
+    if has_scripts:
+        topic = _read_topic(paths.scene_scripts)
+    elif has_draft:
+        topic = _read_topic(paths.scene_split_draft)
+    else:
+        topic = None
+    conn.execute(
+        "INSERT OR REPLACE INTO projects"
+        " (name, topic, has_narration, has_draft, has_scripts, mtime, stamp)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (name, topic, int(has_narration), int(has_draft), int(has_scripts), mtime, stamp),
+    )
+
+
+# ─────────────────────────────────────────────────────────────
+# 对外接口
+# ─────────────────────────────────────────────────────────────
+
+def refresh(name: str) -> None:
+    """写路径调用：按磁盘现状更新（或删除）单个工程的索引行。"""
+    config = pipeline_config_with_workspace()
+    with _lock, _connect() as conn:
+        _upsert(conn, name, resolve_video_paths(name, config))
+
+
+def reconcile(*, force: bool = False) -> int:
+    """
+    与磁盘对账：新增 / 删除工程，指纹变化的工程重读 topic；返回更新的行数。
+    非 force 时距上次对账不足 RECONCILE_INTERVAL_SEC 直接返回 0。
+    """
+    key = str(index_path())
+    now = time.monotonic()
+    if not force and now - _last_reconcile.get(key, float("-inf")) < RECONCILE_INTERVAL_SEC:
+        return 0
+    config = pipeline_config_with_workspace()
+    changed = 0
+    with _lock, _connect() as conn:
+        indexed = {row["name"]: row["stamp"] for row in conn.execute("SELECT name, stamp FROM projects")}
+        names = _scan_names()
+        for name in names:
+            paths = resolve_video_paths(name, config)
+            fp = _fingerprint(paths)
+            if fp is not None and indexed.get(name) == fp[0]:
+                continue
+            _upsert(conn, name, paths)
+            changed += 1
+        gone = [name for name in indexed if name not in names]
+        conn.executemany("DELETE FROM projects WHERE name = ?", [(n,) for n in gone])
+        changed += len(gone)
+        _last_reconcile[key] = time.monotonic()
+    return changed
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def query(
+    *,
+    search: str | None = None,
+    offset: int = 0,
+    limit: int | None = None,
+) -> tuple[list[sqlite3.Row], int]:
+    """按最近修改时间倒序分页；search 为工程名子串（不区分 ASCII 大小写）。返回 (当前页, 总数)。"""
+    reconcile()
+    where, args = "", []
+    if search and search.strip():
+        where = " WHERE name LIKE ? ESCAPE '\\'"
+        args.append(f"%{_escape_like(search.strip())}%")
+    with _connect() as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM projects{where}", args).fetchone()[0]
+        sql = f"SELECT * FROM projects{where} ORDER BY mtime DESC, name LIMIT ? OFFSET ?"
+        rows = conn.execute(sql, [*args, -1 if limit is None else limit, max(0, offset)]).fetchall()
+    return rows, total
+
+
+def get(name: str) -> sqlite3.Row | None:
+    """单个工程：先按磁盘刷新该行（只 stat，指纹未变不重读），保证详情页不受对账间隔影响。"""
+    config = pipeline_config_with_workspace()
+    paths = resolve_video_paths(name, config)
+    with _lock, _connect() as conn:
+        row = conn.execute("SELECT * FROM projects WHERE name = ?", (name,)).fetchone()
+        fp = _fingerprint(paths)
+        if row is None or fp is None or row["stamp"] != fp[0]:
+            _upsert(conn, name, paths)
+            row = conn.execute("SELECT * FROM projects WHERE name = ?", (name,)).fetchone()
+    return row
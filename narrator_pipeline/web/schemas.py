@@ -15,6 +15,14 @@ class EmptyParam(BaseModel):
     """无业务字段的 POST 占位。"""
 
 
+class ListProjectsParam(BaseModel):
+    """search 为工程名子串；limit 缺省返回全部。"""
+
+    search: str | None = None
+    offset: int = Field(0, ge=0)
+    limit: int | None = Field(None, ge=1, le=500)
+
+
 class ProjectNameParam(BaseModel):
     name: str = Field(..., min_length=1)
 
@@ -34,16 +42,36 @@ class GenerateParam(BaseModel):
     force: bool = False
     llmProvider: str | None = None
     llmModel: str | None = None
+    # 队列优先级：数值大的先运行，同优先级先进先出
+    priority: int = Field(0, ge=-10, le=10)
 
 
 class JobIdParam(BaseModel):
     jobId: str = Field(..., min_length=1)
 
 
+class JobLogsParam(BaseModel):
+    jobId: str = Field(..., min_length=1)
+    # 从第 offset 行（0 起）开始返回；断线重连时传已收到的行数
+    offset: int = Field(0, ge=0)
+    limit: int = Field(500, ge=1, le=5000)
+
+
+class ActiveJobParam(BaseModel):
+    """name 为空时返回最近创建的未结束任务。"""
+
+    name: str | None = None
+
+
 class GetDraftParam(BaseModel):
     name: str = Field(..., min_length=1)
 
 
+class GetDraftSceneParam(BaseModel):
+    name: str = Field(..., min_length=1)
+    sceneIdx: int = Field(..., ge=0)
+
+
 class SaveDraftParam(BaseModel):
     name: str = Field(..., min_length=1)
     draft: dict[str, Any]
@@ -54,15 +82,38 @@ class ContinueStep1Param(BaseModel):
     force: bool = False
     llmProvider: str | None = None
     llmModel: str | None = None
+    priority: int = Field(0, ge=-10, le=10)
 
 
 class GetScriptsParam(BaseModel):
     name: str = Field(..., min_length=1)
 
 
+class GetScriptSceneParam(BaseModel):
+    name: str = Field(..., min_length=1)
+    sceneIdx: int = Field(..., ge=0)
+
+
+class GetScriptItemParam(BaseModel):
+    name: str = Field(..., min_length=1)
+    sceneIdx: int = Field(..., ge=0)
+    itemIdx: int = Field(..., ge=0)
+
+
 class SaveScriptsParam(BaseModel):
     name: str = Field(..., min_length=1)
     scripts: dict[str, Any]
+    # 读取时的版本（/api/scripts/get 返回）；提供时磁盘已被改写则 409，缺省为无条件覆盖（兼容旧客户端）
+    version: str | None = None
+
+
+class PatchScriptsParam(BaseModel):
+    """以 JSON Patch（RFC 6902）增量保存 scene-scripts。"""
+
+    name: str = Field(..., min_length=1)
+    ops: list[dict[str, Any]]
+    # 补丁所基于的版本；也可用 If-Match 头传入 ETag
+    version: str | None = None
 
 
 class PreviewSyncFromScriptsParam(BaseModel):
@@ -79,11 +130,20 @@ class ConfirmSyncFromScriptsParam(BaseModel):
 
 class ExportProjectParam(BaseModel):
     name: str = Field(..., min_length=1)
+    # 附带 public/audio、public/images 下该工程的媒体文件
+    includeMedia: bool = False
 
 
 class ListTemplatesParam(BaseModel):
     """列出模板注册表。"""
 
+    # 不含各模板 paramSchema（用 /api/templates/schema 按需获取）
+    compact: bool = False
+
+
+class TemplateSchemaParam(BaseModel):
+    name: str = Field(..., min_length=1)
+
 
 class RegenParamParam(BaseModel):
     """对分镜脚本中单个 item 做局部参数重生（只重写 param）。"""
@@ -94,3 +154,18 @@ class RegenParamParam(BaseModel):
     itemIdx: int = Field(..., ge=0)
     llmProvider: str | None = None
     llmModel: str | None = None
+
+
+class RegenTarget(BaseModel):
+    sceneIdx: int = Field(..., ge=0)
+    itemIdx: int = Field(..., ge=0)
+
+
+class RegenParamsParam(BaseModel):
+    """批量局部参数重生：并发执行，按完成顺序以 NDJSON 流式返回每个 item 的结果。"""
+
+    name: str = Field(..., min_length=1)
+    scripts: dict[str, Any]
+    targets: list[RegenTarget] = Field(..., min_length=1, max_length=200)
+    llmProvider: str | None = None
+    llmModel: str | None = None
@@ -24,6 +24,83 @@ def auth_password() -> str:
     return password
 
 
+def template_reload_interval() -> float:
+    """模板热更新的最短检查间隔（秒）；<= 0 表示关闭。"""
+    raw = os.environ.get("SCENE_STUDIO_TEMPLATE_RELOAD_INTERVAL", "").strip()
+    try:
+        return float(raw) if raw else 2.0
+    except ValueError:
+        return 2.0
+
+
+def job_workers() -> int:
+    """生成任务工作线程数（同时运行的任务上限）。"""
+    raw = os.environ.get("SCENE_STUDIO_JOB_WORKERS", "").strip()
+    try:
+        return max(1, int(raw)) if raw else 2
+    except ValueError:
+        return 2
+
+
+def regen_concurrency() -> int:
+    """批量参数重生时单批同时进行的 LLM 请求数（另受 provider_concurrency 约束）。"""
+    raw = os.environ.get("SCENE_STUDIO_REGEN_CONCURRENCY", "").strip()
+    try:
+        return max(1, int(raw)) if raw else 4
+    except ValueError:
+        return 4
+
+
+def provider_concurrency() -> dict[str, int]:
+    """
+    各 LLM provider 同时运行的任务上限，如 `deepseek=2,gemini=1`；`*` 为未列出 provider 的默认值
+    （缺省时不额外限制，仅受工作线程数约束）。
+    """
+    raw = os.environ.get("SCENE_STUDIO_PROVIDER_CONCURRENCY", "").strip()
+    caps: dict[str, int] = {}
+    for part in raw.split(","):
+        key, sep, value = part.partition("=")
+        if not sep:
+            continue
+        try:
+            caps[key.strip().lower()] = max(1, int(value))
+        except ValueError:
+            continue
+    return caps
+
+
+def state_backend_url() -> str:
+    """共享状态后端：`sqlite`（默认，工作区 .scene-studio/state.sqlite3）、`sqlite:///路径` 或 `memory`（仅单进程）。"""
+    return os.environ.get("SCENE_STUDIO_STATE_BACKEND", "").strip() or "sqlite"
+
+
+def job_runner() -> str:
+    """
+    生成任务在哪里执行：`embedded`（默认，API 进程内起工作线程）或 `external`（由独立的任务进程
+    python -m narrator_pipeline.web.worker 认领；python -m narrator_pipeline.web 会自动设置）。
+    """
+    raw = os.environ.get("SCENE_STUDIO_JOB_RUNNER", "").strip().lower()
+    return "external" if raw == "external" else "embedded"
+
+
+def api_workers() -> int:
+    """python -m narrator_pipeline.web 启动的 uvicorn API 进程数。"""
+    raw = os.environ.get("SCENE_STUDIO_API_WORKERS", "").strip()
+    try:
+        return max(1, int(raw)) if raw else 1
+    except ValueError:
+        return 1
+
+
+def auth_token_ttl() -> float:
+    """登录 token 有效期（秒），默认 7 天。"""
+    raw = os.environ.get("SCENE_STUDIO_TOKEN_TTL", "").strip()
+    try:
+        return max(60.0, float(raw)) if raw else 7 * 24 * 3600.0
+    except ValueError:
+        return 7 * 24 * 3600.0
+
+
 def pipeline_config_with_workspace() -> dict:
     from narrator_pipeline.common import load_config, load_env
 
@@ -0,0 +1,573 @@
+"""
+Web 端共享状态：生成任务队列 / 状态与登录 token，供多个 API 进程与独立的任务进程共用。
+
+- 默认 SQLite（WAL）：工作区下 .scene-studio/state.sqlite3。入队、认领、取消、超时等状态迁移都在
+  BEGIN IMMEDIATE 事务内完成，多进程并发时由 SQLite 写锁串行，规则与原进程内调度一致：
+  每个项目至多一个排队中 / 运行中的任务，cancelling 的任务在线程退出前仍占用项目与 provider 名额。
+- SCENE_STUDIO_STATE_BACKEND 选择后端：`sqlite`（默认）、`sqlite:///绝对路径`、`memory`（进程内，仅限单进程）。
+  其他实现继承 StateBackend 并用 register_state_backend(scheme, factory) 注册。
+- provider 名额：任务与参数重生共用 SCENE_STUDIO_PROVIDER_CONCURRENCY；参数重生以带过期时间的租约占用名额
+  （进程异常退出时租约到期自动释放），claim_job 计入这些租约。
+- 任务以 dict 交换（字段同 jobs.Job，另有 seq / workerId / cancelOutcome）；params、logs 在库中存 JSON。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from narrator_pipeline.web.settings import state_backend_url, workspace_root
+
+STATE_FILENAME = "state.sqlite3"
+SCHEMA_VERSION = 2
+
+ACTIVE_STATUSES = ("queued", "running", "cancelling")
+# 占用项目与 provider 名额的状态
+OCCUPYING_STATUSES = ("running", "cancelling")
+
+
+class JobConflict(RuntimeError):
+    """该项目已有排队中 / 运行中的任务，或其状态不允许被顶替。"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _token_key(token: str) -> str:
+    # 库中只存 token 的摘要
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class StateBackend(ABC):
+    """共享状态后端接口。shared=False 的实现（如 memory）不能跨进程使用。"""
+
+    shared: bool = True
+
+    # ── 登录 token ──
+
+    @abstractmethod
+    def add_token(self, token: str, ttl_sec: float) -> None: ...
+
+    @abstractmethod
+    def token_valid(self, token: str) -> bool: ...
+
+    # ── 任务 ──
+
+    @abstractmethod
+    def create_job(
+        self,
+        job: dict,
+        *,
+        force: bool,
+        replaced_reason: str,
+        refuse: Callable[[dict], str | None] | None = None,
+    ) -> dict | None:
+        """
+        原子入队：该项目已有排队中 / 运行中的任务时，refuse(existing) 返回非空说明或 force=False 则抛 JobConflict，
+        否则先取消已有任务再插入。返回被顶替的任务（取消后的状态），无则 None。
+        """
+
+    @abstractmethod
+    def import_job(self, job: dict) -> bool:
+        """按原样插入（jobId 已存在时忽略），用于迁移旧版落盘任务；返回是否插入。"""
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> dict | None: ...
+
+    @abstractmethod
+    def list_jobs(
+        self,
+        *,
+        statuses: Iterable[str] | None = None,
+        name: str | None = None,
+        job_ids: Iterable[str] | None = None,
+    ) -> list[dict]:
+        """按入队顺序返回。"""
+
+    @abstractmethod
+    def queue_position(self, job_id: str) -> int | None:
+        """1 起的排队位置（priority 大者在前，同级先进先出）；不在排队中返回 None。"""
+
+    @abstractmethod
+    def claim_job(self, worker_id: str, provider_caps: dict[str, int], default_cap: int) -> dict | None:
+        """认领第一个项目空闲且 provider 未满的排队任务，置为 running；无可运行任务返回 None。"""
+
+    @abstractmethod
+    def update_job(self, job_id: str, fields: dict, *, when_status: Iterable[str] | None = None) -> bool:
+        """更新字段；when_status 给定时仅当当前状态在其中才更新。返回是否更新。"""
+
+    @abstractmethod
+    def cancel_job(self, job_id: str, *, reason: str, outcome: str = "cancelled") -> dict | None:
+        """排队中的任务直接进入 outcome 终态；运行中的任务置 cancelling（由执行它的进程结算）。返回更新后的任务。"""
+
+    @abstractmethod
+    def settle_job(self, job_id: str) -> dict | None:
+        """执行线程退出后调用：cancelling 的任务进入其取消终态；返回结算后的任务，无需结算返回 None。"""
+
+    @abstractmethod
+    def expire_jobs(self, timeout_sec: float) -> list[dict]:
+        """运行超过 timeout_sec 的任务置 cancelling（终态 timed_out）；返回这些任务。"""
+
+    @abstractmethod
+    def acquire_provider_slot(self, provider: str, cap: int, ttl_sec: float) -> str | None:
+        """该 provider 运行中任务与有效租约合计小于 cap 时登记一个租约并返回其 id，否则返回 None。"""
+
+    @abstractmethod
+    def release_provider_slot(self, lease_id: str) -> None: ...
+
+    @abstractmethod
+    def heartbeat(self, worker_id: str) -> None: ...
+
+    @abstractmethod
+    def retire_worker(self, worker_id: str, *, reason: str) -> list[dict]:
+        """任务进程退出：其运行中的任务标为 interrupted（cancelling 的按取消终态结算）；返回这些任务。"""
+
+    @abstractmethod
+    def reap_orphans(self, stale_sec: float) -> list[dict]:
+        """心跳超过 stale_sec 未更新的任务进程视为已退出，按 retire_worker 处理其任务；返回这些任务。"""
+
+
+# ─────────────────────────────────────────────────────────────
+# SQLite
+# ─────────────────────────────────────────────────────────────
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    jobId TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    phase TEXT NOT NULL DEFAULT '',
+    error TEXT,
+    createdAt TEXT NOT NULL,
+    startedAt TEXT,
+    finishedAt TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    provider TEXT NOT NULL DEFAULT '',
+    params TEXT NOT NULL DEFAULT '{}',
+    logs TEXT NOT NULL DEFAULT '[]',
+    logCount INTEGER NOT NULL DEFAULT 0,
+    cancelOutcome TEXT,
+    workerId TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, priority DESC, seq);
+CREATE INDEX IF NOT EXISTS jobs_name ON jobs (name, status);
+CREATE TABLE IF NOT EXISTS workers (
+    workerId TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    leaseId TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    expiresAt REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leases_provider ON leases (provider, expiresAt);
+CREATE TABLE IF NOT EXISTS tokens (
+    tokenHash TEXT PRIMARY KEY,
+    expiresAt REAL NOT NULL
+);
+"""
+
+_JOB_COLUMNS = (
+    "jobId", "name", "kind", "status", "phase", "error", "createdAt", "startedAt", "finishedAt",
+    "priority", "provider", "params", "logs", "logCount", "cancelOutcome", "workerId",
+)
+_JSON_COLUMNS = frozenset({"params", "logs"})
+
+
+def _encode(column: str, value: Any) -> Any:
+    if column in _JSON_COLUMNS:
+        return json.dumps(value if value is not None else ({} if column == "params" else []), ensure_ascii=False)
+    return value
+
+
+def _decode(row: sqlite3.Row | None) -> dict | None:
+    if row is None:
+        return None
+    job = dict(row)
+    for column in _JSON_COLUMNS:
+        try:
+            job[column] = json.loads(job[column] or "null")
+        except json.JSONDecodeError:
+            job[column] = None
+    job["params"] = job["params"] if isinstance(job["params"], dict) else {}
+    job["logs"] = job["logs"] if isinstance(job["logs"], list) else []
+    return job
+
+
+def _in(values: Iterable[str]) -> tuple[str, list[str]]:
+    values = list(values)
+    return ", ".join("?" for _ in values), values
+
+
+class SqliteStateBackend(StateBackend):
+    """文件库跨进程共享（每线程一个连接）；":memory:" 为进程内单连接（memory 后端）。"""
+
+    def __init__(self, path: Path | str):
+        self.path = str(path)
+        self.shared = self.path != ":memory:"
+        self._local = threading.local()
+        self._memory_conn: sqlite3.Connection | None = None
+        # memory 后端所有线程共用一个连接，须串行；文件库由 SQLite 自身的锁协调
+        self._mutex = threading.RLock() if not self.shared else None
+        with self._guard():
+            # 建表语句均为 IF NOT EXISTS，多个进程同时初始化也安全
+            self._connect().executescript(_SCHEMA + f"PRAGMA user_version={SCHEMA_VERSION};")
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self.shared:
+            if self._memory_conn is None:
+                self._memory_conn = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+                self._memory_conn.row_factory = sqlite3.Row
+            return self._memory_conn
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            # isolation_level=None：自动提交，写操作显式 BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _guard(self):
+        return self._mutex if self._mutex is not None else nullcontext()
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        with self._guard():
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        with self._guard():
+            yield self._connect()
+
+    # ── 登录 token ──
+
+    def add_token(self, token: str, ttl_sec: float) -> None:
+        now = time.time()
+        with self._tx() as conn:
+            conn.execute("DELETE FROM tokens WHERE expiresAt < ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO tokens (tokenHash, expiresAt) VALUES (?, ?)",
+                (_token_key(token), now + ttl_sec),
+            )
+
+    def token_valid(self, token: str) -> bool:
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT expiresAt FROM tokens WHERE tokenHash = ?", (_token_key(token),)
+            ).fetchone()
+        return row is not None and row[0] >= time.time()
+
+    # ── 任务：内部 ──
+
+    def _get(self, conn: sqlite3.Connection, job_id: str) -> dict | None:
+        return _decode(conn.execute("SELECT * FROM jobs WHERE jobId = ?", (job_id,)).fetchone())
+
+    def _insert(self, conn: sqlite3.Connection, job: dict, *, ignore: bool = False) -> bool:
+        columns = [c for c in _JOB_COLUMNS if c in job]
+        verb = "INSERT OR IGNORE" if ignore else "INSERT"
+        cur = conn.execute(
+            f"{verb} INTO jobs ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            [_encode(c, job[c]) for c in columns],
+        )
+        return cur.rowcount > 0
+
+    def _update(self, conn: sqlite3.Connection, job_id: str, fields: dict, when_status: Iterable[str] | None) -> bool:
+        unknown = set(fields) - set(_JOB_COLUMNS)
+        if unknown or "jobId" in fields:
+            raise ValueError(f"不可更新的任务字段: {sorted(unknown | ({'jobId'} & set(fields)))}")
+        if not fields:
+            return False
+        sql = f"UPDATE jobs SET {', '.join(f'{c} = ?' for c in fields)} WHERE jobId = ?"
+        args = [_encode(c, v) for c, v in fields.items()] + [job_id]
+        if when_status is not None:
+            marks, statuses = _in(when_status)
+            sql += f" AND status IN ({marks})"
+            args += statuses
+        return conn.execute(sql, args).rowcount > 0
+
+    def _cancel(self, conn: sqlite3.Connection, job: dict, reason: str, outcome: str) -> dict | None:
+        if job["status"] == "queued":
+            fields = {"status": outcome, "error": reason, "finishedAt": _now()}
+        elif job["status"] == "running":
+            fields = {"status": "cancelling", "error": reason, "cancelOutcome": outcome}
+        else:
+            return None
+        self._update(conn, job["jobId"], fields, (job["status"],))
+        return {**job, **fields}
+
+    def _retire(self, conn: sqlite3.Connection, worker_ids: list[str] | None, reason: str) -> list[dict]:
+        """worker_ids 为 None 时处理 workerId 为空的占用任务（无主任务）。"""
+        marks, statuses = _in(OCCUPYING_STATUSES)
+        if worker_ids is None:
+            rows = conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({marks}) AND workerId IS NULL", statuses
+            ).fetchall()
+        else:
+            wmarks, wids = _in(worker_ids)
+            rows = conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({marks}) AND workerId IN ({wmarks})", statuses + wids
+            ).fetchall()
+        out = []
+        now = _now()
+        for row in rows:
+            job = _decode(row)
+            if job["status"] == "cancelling":
+                fields = {"status": job.get("cancelOutcome") or "cancelled", "finishedAt": now}
+            else:
+                fields = {"status": "interrupted", "error": reason, "finishedAt": now}
+            self._update(conn, job["jobId"], fields, (job["status"],))
+            out.append({**job, **fields})
+        return out
+
+    # ── 任务：接口 ──
+
+    def create_job(
+        self,
+        job: dict,
+        *,
+        force: bool,
+        replaced_reason: str,
+        refuse: Callable[[dict], str | None] | None = None,
+    ) -> dict | None:
+        with self._tx() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE name = ? AND status IN ('queued', 'running') ORDER BY seq DESC LIMIT 1",
+                (job["name"],),
+            ).fetchone()
+            replaced = None
+            if row is not None:
+                existing = _decode(row)
+                message = refuse(existing) if refuse is not None else None
+                if message:
+                    raise JobConflict(message)
+                if not force:
+                    raise JobConflict("该项目已有生成任务在排队或运行")
+                replaced = self._cancel(conn, existing, replaced_reason, "cancelled")
+            self._insert(conn, job)
+        return replaced
+
+    def import_job(self, job: dict) -> bool:
+        with self._tx() as conn:
+            return self._insert(conn, job, ignore=True)
+
+    def get_job(self, job_id: str) -> dict | None:
+        with self._read() as conn:
+            return self._get(conn, job_id)
+
+    def list_jobs(
+        self,
+        *,
+        statuses: Iterable[str] | None = None,
+        name: str | None = None,
+        job_ids: Iterable[str] | None = None,
+    ) -> list[dict]:
+        where, args = [], []
+        if statuses is not None:
+            marks, values = _in(statuses)
+            where.append(f"status IN ({marks})")
+            args += values
+        if name is not None:
+            where.append("name = ?")
+            args.append(name)
+        if job_ids is not None:
+            marks, values = _in(job_ids)
+            where.append(f"jobId IN ({marks})")
+            args += values
+        sql = "SELECT * FROM jobs" + (f" WHERE {' AND '.join(where)}" if where else "") + " ORDER BY seq"
+        with self._read() as conn:
+            return [_decode(r) for r in conn.execute(sql, args).fetchall()]
+
+    def queue_position(self, job_id: str) -> int | None:
+        with self._read() as conn:
+            job = conn.execute("SELECT status, priority, seq FROM jobs WHERE jobId = ?", (job_id,)).fetchone()
+            if job is None or job["status"] != "queued":
+                return None
+            ahead = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued'"
+                " AND (priority > ? OR (priority = ? AND seq < ?))",
+                (job["priority"], job["priority"], job["seq"]),
+            ).fetchone()[0]
+        return ahead + 1
+
+    def claim_job(self, worker_id: str, provider_caps: dict[str, int], default_cap: int) -> dict | None:
+        with self._tx() as conn:
+            marks, statuses = _in(OCCUPYING_STATUSES)
+            busy = {
+                r[0] for r in conn.execute(f"SELECT DISTINCT name FROM jobs WHERE status IN ({marks})", statuses)
+            }
+            load = dict(
+                conn.execute(
+                    f"SELECT provider, COUNT(*) FROM jobs WHERE status IN ({marks}) GROUP BY provider", statuses
+                ).fetchall()
+            )
+            leased = self._lease_load(conn)
+            queued = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, seq"
+            ).fetchall()
+            for row in queued:
+                if row["name"] in busy:
+                    continue
+                provider = row["provider"]
+                cap = provider_caps.get(provider, provider_caps.get("*"))
+                # 显式配置的 provider 上限与参数重生共用；未配置时只受工作线程数约束
+                used = load.get(provider, 0) + (leased.get(provider, 0) if cap is not None else 0)
+                if used >= (cap if cap is not None else default_cap):
+                    continue
+                fields = {"status": "running", "startedAt": _now(), "workerId": worker_id}
+                self._update(conn, row["jobId"], fields, ("queued",))
+                return {**_decode(row), **fields}
+        return None
+
+    def update_job(self, job_id: str, fields: dict, *, when_status: Iterable[str] | None = None) -> bool:
+        with self._tx() as conn:
+            return self._update(conn, job_id, fields, when_status)
+
+    def cancel_job(self, job_id: str, *, reason: str, outcome: str = "cancelled") -> dict | None:
+        with self._tx() as conn:
+            job = self._get(conn, job_id)
+            return self._cancel(conn, job, reason, outcome) if job is not None else None
+
+    def settle_job(self, job_id: str) -> dict | None:
+        with self._tx() as conn:
+            job = self._get(conn, job_id)
+            if job is None or job["status"] != "cancelling":
+                return None
+            fields = {"status": job.get("cancelOutcome") or "cancelled", "finishedAt": _now()}
+            self._update(conn, job_id, fields, ("cancelling",))
+            return {**job, **fields}
+
+    def expire_jobs(self, timeout_sec: float) -> list[dict]:
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=timeout_sec)).isoformat()
+        reason = f"生成超时（{int(timeout_sec) // 60} 分钟），可重新生成"
+        with self._tx() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'running' AND startedAt < ?", (cutoff,)
+            ).fetchall()
+            return [self._cancel(conn, _decode(r), reason, "timed_out") for r in rows]
+
+    def _lease_load(self, conn: sqlite3.Connection) -> dict[str, int]:
+        return dict(
+            conn.execute(
+                "SELECT provider, COUNT(*) FROM leases WHERE expiresAt >= ? GROUP BY provider", (time.time(),)
+            ).fetchall()
+        )
+
+    def acquire_provider_slot(self, provider: str, cap: int, ttl_sec: float) -> str | None:
+        now = time.time()
+        with self._tx() as conn:
+            conn.execute("DELETE FROM leases WHERE expiresAt < ?", (now,))
+            marks, statuses = _in(OCCUPYING_STATUSES)
+            jobs = conn.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE provider = ? AND status IN ({marks})", [provider] + statuses
+            ).fetchone()[0]
+            if jobs + self._lease_load(conn).get(provider, 0) >= cap:
+                return None
+            lease_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO leases (leaseId, provider, expiresAt) VALUES (?, ?, ?)",
+                (lease_id, provider, now + ttl_sec),
+            )
+            return lease_id
+
+    def release_provider_slot(self, lease_id: str) -> None:
+        with self._tx() as conn:
+            conn.execute("DELETE FROM leases WHERE leaseId = ?", (lease_id,))
+
+    def heartbeat(self, worker_id: str) -> None:
+        with self._tx() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (workerId, heartbeat) VALUES (?, ?)", (worker_id, time.time())
+            )
+
+    def retire_worker(self, worker_id: str, *, reason: str) -> list[dict]:
+        with self._tx() as conn:
+            conn.execute("DELETE FROM workers WHERE workerId = ?", (worker_id,))
+            return self._retire(conn, [worker_id], reason)
+
+    def reap_orphans(self, stale_sec: float) -> list[dict]:
+        reason = "任务进程已退出，生成任务已中断，可重新生成"
+        with self._tx() as conn:
+            alive = {
+                r[0] for r in conn.execute(
+                    "SELECT workerId FROM workers WHERE heartbeat >= ?", (time.time() - stale_sec,)
+                )
+            }
+            conn.execute("DELETE FROM workers WHERE heartbeat < ?", (time.time() - stale_sec,))
+            marks, statuses = _in(OCCUPYING_STATUSES)
+            owners = {
+                r[0] for r in conn.execute(
+                    f"SELECT DISTINCT workerId FROM jobs WHERE status IN ({marks}) AND workerId IS NOT NULL", statuses
+                )
+            }
+            dead = sorted(owners - alive)
+            out = self._retire(conn, dead, reason) if dead else []
+            return out + self._retire(conn, None, reason)
+
+
+# ─────────────────────────────────────────────────────────────
+# 选择后端
+# ─────────────────────────────────────────────────────────────
+
+def _sqlite_factory(rest: str) -> StateBackend:
+    path = Path(rest) if rest else workspace_root() / ".scene-studio" / STATE_FILENAME
+    return SqliteStateBackend(path)
+
+
+_FACTORIES: dict[str, Callable[[str], StateBackend]] = {
+    "sqlite": _sqlite_factory,
+    "memory": lambda _rest: SqliteStateBackend(":memory:"),
+}
+_backend: StateBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def register_state_backend(scheme: str, factory: Callable[[str], StateBackend]) -> None:
+    """注册自定义后端：SCENE_STUDIO_STATE_BACKEND=`{scheme}` 或 `{scheme}://...` 时以 :// 之后的部分调用 factory。"""
+    _FACTORIES[scheme.lower()] = factory
+
+
+def parse_backend_url(url: str) -> tuple[str, str]:
+    scheme, sep, rest = url.strip().partition("://")
+    if not sep:
+        return scheme.lower() or "sqlite", ""
+    # sqlite:///abs/path → /abs/path；sqlite:///d:/x/state.sqlite3 → d:/x/state.sqlite3（Windows 盘符）
+    if re.match(r"/[A-Za-z]:", rest):
+        return scheme.lower(), rest[1:]
+    return scheme.lower(), rest[1:] if rest.startswith("/") and rest[1:2] == "/" else rest
+
+
+def get_state_backend() -> StateBackend:
+    """本进程的状态后端（首次调用时按 SCENE_STUDIO_STATE_BACKEND 创建）。"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            scheme, rest = parse_backend_url(state_backend_url())
+            factory = _FACTORIES.get(scheme)
+            if factory is None:
+                raise RuntimeError(f"未知的状态后端: {scheme!r}（可选: {', '.join(sorted(_FACTORIES))}）")
+            _backend = factory(rest)
+        return _backend
@@ -0,0 +1,134 @@
+"""
+模板目录响应缓存：每个注册表版本只序列化一次，预先压缩 gzip / brotli，并以注册表 hash 作 ETag。
+
+- full：含各模板完整 param_schema（Studio 编辑器使用）。
+- compact：不含 param_schema，按需再用 schema_payload(name) 取单个模板的 schema。
+- API 全为 POST，浏览器不会自动带 If-None-Match：客户端自行保存 ETag 与上次内容，命中时服务端回 304。
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+
+from narrator_pipeline.contracts.template_registry import TEMPLATE_REGISTRY, registry_version
+from narrator_pipeline.web.workspace import template_catalog
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 响应结构变化时递增，使旧 ETag 失效
+CATALOG_FORMAT = 1
+# 小于该字节数不压缩（压缩头开销大于收益）
+MIN_COMPRESS_BYTES = 1024
+
+
+@dataclass(frozen=True)
+class CatalogPayload:
+    etag: str
+    body: bytes
+    gzip: bytes | None
+    br: bytes | None
+
+
+_lock = threading.Lock()
+_cache: dict[str, CatalogPayload] = {}
+_cache_version = ""
+
+
+def _build(key: str, version: str, data: dict) -> CatalogPayload:
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    small = len(body) < MIN_COMPRESS_BYTES
+    return CatalogPayload(
+        etag=f'W/"{version}-{CATALOG_FORMAT}-{key}"',
+        body=body,
+        gzip=None if small else gzip.compress(body, compresslevel=9, mtime=0),
+        br=None if small or brotli is None else brotli.compress(body, quality=11),
+    )
+
+
+def _cached(key: str, make) -> CatalogPayload:
+    """按当前注册表版本缓存；版本变化（模板热更新）时整体丢弃旧条目。"""
+    global _cache_version
+    version = registry_version()
+    with _lock:
+        if version != _cache_version:
+            _cache.clear()
+            _cache_version = version
+        payload = _cache.get(key)
+    if payload is None:
+        payload = _build(key, version, make())
+        with _lock:
+            if _cache_version == version:
+                _cache[key] = payload
+    return payload
+
+
+def catalog_payload(*, compact: bool = False) -> CatalogPayload:
+    def make() -> dict:
+        templates = template_catalog()
+        if compact:
+            templates = [{k: v for k, v in t.items() if k != "paramSchema"} for t in templates]
+        return {"templates": templates, "version": registry_version()}
+
+    return _cached("compact" if compact else "full", make)
+
+
+def schema_payload(name: str) -> CatalogPayload:
+    """单个模板的 param_schema；模板不存在抛 KeyError。"""
+    meta = TEMPLATE_REGISTRY[name]
+
+    def make() -> dict:
+        schema = meta.get("param_schema") if isinstance(meta, dict) else None
+        return {"name": name, "paramSchema": schema or {"type": "object", "properties": {}}}
+
+    return _cached(f"schema:{name}", make)
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match 用弱比较：忽略 W/ 前缀
+    bare = etag.removeprefix("W/")
+    return any(
+        tag.strip() == "*" or tag.strip().removeprefix("W/") == bare for tag in header.split(",")
+    )
+
+
+def respond(request: Request, payload: CatalogPayload) -> Response:
+    """按 If-None-Match 回 304，否则按 Accept-Encoding 选择 br / gzip / 原文。"""
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    body = payload.body
+    if payload.br is not None and "br" in accepted:
+        body, headers["Content-Encoding"] = payload.br, "br"
+    elif payload.gzip is not None and ("gzip" in accepted or "*" in accepted):
+        body, headers["Content-Encoding"] = payload.gzip, "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
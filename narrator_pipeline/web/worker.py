@@ -0,0 +1,39 @@
+"""python -m narrator_pipeline.web.worker：独立的生成任务进程，从共享状态后端认领并执行任务。"""
+
+from __future__ import annotations
+
+import signal
+import threading
+
+from narrator_pipeline.common import load_env
+from narrator_pipeline.paths import PACKAGE_ROOT
+from narrator_pipeline.web import jobs as job_service
+from narrator_pipeline.web.state_backend import get_state_backend
+from narrator_pipeline.web.workspace import ensure_workspace
+
+
+def main() -> None:
+    load_env(PACKAGE_ROOT)
+    if not get_state_backend().shared:
+        raise SystemExit("❌ 当前状态后端不能跨进程共享（memory），无法单独运行任务进程")
+    ensure_workspace()
+    job_service.recover_from_disk()
+
+    stop = threading.Event()
+    # Windows 上父进程以 CTRL_BREAK_EVENT 请求退出（SIGBREAK）；TerminateProcess 无法被捕获
+    for name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+        sig = getattr(signal, name, None)
+        if sig is not None:
+            signal.signal(sig, lambda *_: stop.set())
+
+    worker = job_service.start_worker()
+    print(f"🛠️ 任务进程已启动：{worker.worker_id}（{worker.workers} 个工作线程）")
+    # 带超时轮询：无超时的 wait 在部分 Windows Python 上不响应 Ctrl+C
+    while not stop.wait(1.0):
+        pass
+    print("🛑 任务进程退出，中止运行中的任务…")
+    job_service.stop_worker()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,24 +2,54 @@
 
 from __future__ import annotations
 
+import copy
 import io
 import json
+import os
 import re
+import shutil
+import stat
+import tempfile
+import time
 import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, BinaryIO, Generator, Iterator
 
+from narrator_pipeline.codegen.composition_registry import write_registry
+from narrator_pipeline.common.cancellation import CancelToken, check_cancelled
+from narrator_pipeline.common.llm_utils import resolve_llm_provider
+from narrator_pipeline.contracts.json_patch import apply_patch, format_pointer
+from narrator_pipeline.contracts.scene_document import SceneDocument
 from narrator_pipeline.contracts.scene_script_validate import (
+    validate_and_normalize_item,
     validate_and_normalize_scene_scripts,
 )
+from narrator_pipeline.contracts.script_store import (
+    SCRIPT_STORE,
+    ScriptVersionConflict,
+    derive_json,
+    read_json_versioned,
+    write_json,
+)
 from narrator_pipeline.contracts.scene_split_draft import (
     load_scene_split_draft,
     save_scene_split_draft,
     validate_scene_split_draft,
 )
-from narrator_pipeline.contracts.template_registry import TEMPLATE_REGISTRY
-from narrator_pipeline.paths import VideoPaths, resolve_video_paths
-from narrator_pipeline.web.settings import pipeline_config_with_workspace, workspace_root
+from narrator_pipeline.contracts.template_registry import TEMPLATE_REGISTRY, registry_version
+from narrator_pipeline.contracts.validation_errors import ScriptValidationError
+from narrator_pipeline.paths import resolve_video_paths
+from narrator_pipeline.web import project_index
+from narrator_pipeline.web.settings import (
+    pipeline_config_with_workspace,
+    provider_concurrency,
+    regen_concurrency,
+    workspace_root,
+)
+from narrator_pipeline.web.state_backend import ACTIVE_STATUSES, get_state_backend
 
 _NAME_RE = re.compile(r"^[\w\u4e00-\u9fff][\w\u4e00-\u9fff\- ]{0,63}$")
 
@@ -53,62 +83,33 @@ def ensure_workspace() -> Path:
     return root
 
 
-def _project_mtime(paths: VideoPaths) -> float:
-    """工程最近修改时间：取口播 / 草稿 / 脚本 / 场景目录中已存在路径的最大 mtime。"""
-    candidates = (
-        paths.narration_txt,
-        paths.scene_split_draft,
-        paths.scene_scripts,
-        paths.scenes_dir,
-        paths.scenes_dir.parent,
+def _info_from_row(row) -> ProjectInfo:
+    return ProjectInfo(
+        name=row["name"],
+        hasNarration=bool(row["has_narration"]),
+        hasDraft=bool(row["has_draft"]),
+        hasScripts=bool(row["has_scripts"]),
+        topic=row["topic"],
     )
-    return max(p.stat().st_mtime for p in candidates if p.exists())
 
 
-def list_projects() -> list[ProjectInfo]:
+def list_projects(
+    *,
+    search: str | None = None,
+    offset: int = 0,
+    limit: int | None = None,
+) -> tuple[list[ProjectInfo], int]:
+    """按最近修改时间倒序；读 .scene-studio 下的工程索引（惰性与磁盘对账）。返回 (当前页, 总数)。"""
     ensure_workspace()
-    config = _config()
-    names: set[str] = set()
-    narrations = workspace_root() / "narrations"
-    if narrations.is_dir():
-        for p in narrations.glob("*.txt"):
-            names.add(p.stem)
-    remotions = workspace_root() / "src" / "remotions"
-    if remotions.is_dir():
-        for d in remotions.iterdir():
-            if d.is_dir():
-                names.add(d.name)
-
-    result: list[tuple[float, ProjectInfo]] = []
-    for name in names:
-        paths = resolve_video_paths(name, config)
-        topic = None
-        if paths.scene_scripts.is_file():
-            with open(paths.scene_scripts, encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, dict):
-                t = data.get("topic")
-                topic = t if isinstance(t, str) else None
-        elif paths.scene_split_draft.is_file():
-            with open(paths.scene_split_draft, encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, dict):
-                t = data.get("topic")
-                topic = t if isinstance(t, str) else None
-        result.append(
-            (
-                _project_mtime(paths),
-                ProjectInfo(
-                    name=name,
-                    hasNarration=paths.narration_txt.is_file(),
-                    hasDraft=paths.scene_split_draft.is_file(),
-                    hasScripts=paths.scene_scripts.is_file(),
-                    topic=topic,
-                ),
-            )
-        )
-    result.sort(key=lambda item: item[0], reverse=True)
-    return [info for _, info in result]
+    rows, total = project_index.query(search=search, offset=offset, limit=limit)
+    return [_info_from_row(r) for r in rows], total
+
+
+def get_project(name: str) -> ProjectInfo | None:
+    name = assert_valid_name(name)
+    ensure_workspace()
+    row = project_index.get(name)
+    return None if row is None else _info_from_row(row)
 
 
 def create_project(name: str, narration_text: str) -> ProjectInfo:
@@ -121,6 +122,7 @@ def create_project(name: str, narration_text: str) -> ProjectInfo:
     paths.narration_txt.parent.mkdir(parents=True, exist_ok=True)
     paths.narration_txt.write_text(narration_text.strip() + "\n", encoding="utf-8")
     paths.scenes_dir.mkdir(parents=True, exist_ok=True)
+    project_index.refresh(name)
     return ProjectInfo(
         name=name,
         hasNarration=True,
@@ -136,11 +138,13 @@ def delete_project(name: str) -> None:
     paths = resolve_video_paths(name, config)
     if paths.narration_txt.is_file():
         paths.narration_txt.unlink()
-    import shutil
 
     remotion_dir = paths.scenes_dir.parent
     if remotion_dir.is_dir():
         shutil.rmtree(remotion_dir)
+    # 目录连同 composition.manifest.json 一起删除后，重建注册表以免 Root 引用不存在的模块
+    write_registry(remotion_dir.parent)
+    project_index.refresh(name)
 
 
 def read_draft(name: str) -> dict:
@@ -149,28 +153,203 @@ def read_draft(name: str) -> dict:
     return load_scene_split_draft(paths.scene_split_draft)
 
 
+def _draft_path(name: str) -> Path:
+    name = assert_valid_name(name)
+    path = resolve_video_paths(name, _config()).scene_split_draft
+    if not path.is_file():
+        raise FileNotFoundError(f"场景拆分草稿不存在: {path}")
+    return path
+
+
+def _build_draft_outline(draft: Any, path: Path) -> dict:
+    try:
+        validate_scene_split_draft(draft, path=path)
+        error = None
+    except ScriptValidationError as e:
+        error = str(e)
+    draft = draft if isinstance(draft, dict) else {}
+    scenes = []
+    for scene in _as_list(draft.get("scenes")):
+        scene = scene if isinstance(scene, dict) else {}
+        text = scene.get("text")
+        scenes.append(
+            {
+                "sceneId": scene.get("sceneId"),
+                "sceneName": scene.get("sceneName"),
+                "textLength": len(text) if isinstance(text, str) else 0,
+            }
+        )
+    return {
+        "topic": draft.get("topic"),
+        "sceneCount": len(scenes),
+        "valid": error is None,
+        "error": error,
+        "scenes": scenes,
+    }
+
+
+def read_draft_outline(name: str) -> tuple[dict, str]:
+    """返回 (草稿大纲, 版本)：各场景标识与口播长度、草稿校验状态，不含口播正文。"""
+    path = _draft_path(name)
+    return derive_json(path, "outline", lambda draft: _build_draft_outline(draft, path))
+
+
+def read_draft_scene(name: str, scene_idx: int) -> tuple[dict, str]:
+    """返回 (草稿中的单个场景, 版本)；为缓存共享对象，调用方只读。"""
+    draft, version = read_json_versioned(_draft_path(name))
+    return _pick(draft.get("scenes") if isinstance(draft, dict) else None, scene_idx, "场景"), version
+
+
 def write_draft(name: str, draft: dict) -> dict:
     name = assert_valid_name(name)
     paths = resolve_video_paths(name, _config())
     validate_scene_split_draft(draft, path=paths.scene_split_draft)
     save_scene_split_draft(draft, paths.scene_split_draft)
+    project_index.refresh(name)
     return draft
 
 
 def read_scripts(name: str) -> dict:
+    return read_scripts_versioned(name)[0]
+
+
+def read_scripts_versioned(name: str) -> tuple[dict, str]:
+    """返回 (scripts, 版本)；版本用于增量保存 / 整份保存的并发校验。"""
     name = assert_valid_name(name)
     paths = resolve_video_paths(name, _config())
     if not paths.scene_scripts.is_file():
         raise FileNotFoundError(f"scene-scripts 不存在: {paths.scene_scripts}")
-    with open(paths.scene_scripts, encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, dict):
-        raise ValueError("scene-scripts.json 根节点必须是对象")
-    return data
+    return read_json_versioned(paths.scene_scripts)
+
+
+# ── 按需读取：大纲 / 单场景 / 单 item，基于解析缓存，不整份复制 ──
+
+def _as_list(value: Any) -> list:
+    return value if isinstance(value, list) else []
+
+
+def _build_scripts_outline(
+    data: Any, reuse: dict[int, tuple[Any, list[str]]] | None = None
+) -> tuple[dict, dict[tuple[int, int], list[str]]]:
+    """
+    (大纲, 各 item 的校验告警)；校验在 item 副本上进行，不改动缓存对象。
+    reuse 为 id(item) → (sceneId, 告警)：同一对象且场景未变的 item 直接沿用，不再校验（增量保存后预热）。
+    """
+    data = data if isinstance(data, dict) else {}
+    item_warnings: dict[tuple[int, int], list[str]] = {}
+    scenes = []
+    for s_idx, scene in enumerate(_as_list(data.get("scenes"))):
+        scene = scene if isinstance(scene, dict) else {}
+        scene_id = scene.get("sceneId", "?")
+        items = []
+        for i_idx, item in enumerate(_as_list(scene.get("items"))):
+            warnings: list[str] = []
+            prev = reuse.get(id(item)) if reuse else None
+            if prev is not None and prev[0] == scene_id and isinstance(item, dict):
+                warnings = list(prev[1])
+            elif isinstance(item, dict):
+                validate_and_normalize_item(
+                    copy.deepcopy(item), TEMPLATE_REGISTRY, scene_id=scene_id, warnings=warnings
+                )
+            else:
+                warnings.append(f"[{scene_id}] 第 {i_idx} 个 item 不是对象")
+                item = {}
+            item_warnings[(s_idx, i_idx)] = warnings
+            items.append(
+                {
+                    "template": item.get("template"),
+                    "narrativeType": item.get("narrativeType"),
+                    "order": item.get("order"),
+                    "totalDurationFrames": item.get("totalDurationFrames"),
+                    "warningCount": len(warnings),
+                    "valid": not any(not w.startswith("[ADVISORY]") for w in warnings),
+                }
+            )
+        scenes.append(
+            {
+                "sceneId": scene.get("sceneId"),
+                "sceneName": scene.get("sceneName"),
+                "totalDurationFrames": scene.get("totalDurationFrames"),
+                "itemCount": len(items),
+                "warningCount": sum(i["warningCount"] for i in items),
+                "valid": all(i["valid"] for i in items),
+                "items": items,
+            }
+        )
+    outline = {
+        "topic": data.get("topic"),
+        "fps": data.get("fps"),
+        "sceneCount": len(scenes),
+        "itemCount": sum(s["itemCount"] for s in scenes),
+        "warningCount": sum(s["warningCount"] for s in scenes),
+        "valid": all(s["valid"] for s in scenes),
+        "scenes": scenes,
+    }
+    return outline, item_warnings
 
 
-def write_scripts(name: str, scripts: dict) -> tuple[dict, list[str]]:
-    """validate_and_normalize 后落盘；返回 (normalized, warnings)。校验失败抛 ScriptValidationError。"""
+def _scripts_path(name: str) -> Path:
+    name = assert_valid_name(name)
+    path = resolve_video_paths(name, _config()).scene_scripts
+    if not path.is_file():
+        raise FileNotFoundError(f"scene-scripts 不存在: {path}")
+    return path
+
+
+def _outline_key() -> str:
+    # 校验结果依赖模板注册表：注册表热更新后重新计算
+    return f"outline:{registry_version()}"
+
+
+def _scripts_outline_cached(name: str) -> tuple[tuple[dict, dict], str]:
+    return derive_json(_scripts_path(name), _outline_key(), _build_scripts_outline)
+
+
+def _flatten_warnings(item_warnings: dict[tuple[int, int], list[str]]) -> list[str]:
+    return [w for key in sorted(item_warnings) for w in item_warnings[key]]
+
+
+def read_scripts_outline(name: str) -> tuple[dict, str]:
+    """返回 (大纲, 版本)：场景 / item 的标识、模板、时长与校验状态，不含口播与 param。"""
+    (outline, _), version = _scripts_outline_cached(name)
+    return outline, version
+
+
+def _pick(items: Any, idx: int, what: str) -> Any:
+    items = _as_list(items)
+    if not 0 <= idx < len(items):
+        raise IndexError(f"{what}下标越界: {idx}（共 {len(items)} 个）")
+    return items[idx]
+
+
+def read_script_scene(name: str, scene_idx: int) -> tuple[dict, str]:
+    """返回 (单个场景, 版本)；为缓存共享对象，调用方只读。"""
+    data, version = read_json_versioned(_scripts_path(name))
+    scenes = data.get("scenes") if isinstance(data, dict) else None
+    return _pick(scenes, scene_idx, "场景"), version
+
+
+def read_script_item(name: str, scene_idx: int, item_idx: int) -> tuple[dict, list[str], str]:
+    """返回 (单个 item, 其校验告警, 版本)；item 为缓存共享对象，调用方只读。"""
+    path = _scripts_path(name)
+    (_, item_warnings), version = _scripts_outline_cached(name)
+    data, data_version = read_json_versioned(path)
+    if data_version != version:
+        # 两次读取之间文件被改写：以新内容为准重新取告警
+        (_, item_warnings), version = _scripts_outline_cached(name)
+        data, _ = read_json_versioned(path)
+    scene = _pick(data.get("scenes") if isinstance(data, dict) else None, scene_idx, "场景")
+    item = _pick(scene.get("items") if isinstance(scene, dict) else None, item_idx, "item ")
+    return item, item_warnings.get((scene_idx, item_idx), []), version
+
+
+def write_scripts(
+    name: str, scripts: dict, *, expected_version: str | None = None
+) -> tuple[dict, list[str], str]:
+    """
+    validate_and_normalize 后落盘；返回 (normalized, warnings, 新版本)。
+    expected_version 非空且磁盘已被改写时抛 ScriptVersionConflict。
+    """
     name = assert_valid_name(name)
     paths = resolve_video_paths(name, _config())
     data = json.loads(json.dumps(scripts))
@@ -185,9 +364,93 @@ def write_scripts(name: str, scripts: dict) -> tuple[dict, list[str]]:
     # 但 ScriptValidationError 仅在 validate 抛错时出现（当前函数不抛）。
     _ = hard
     paths.scenes_dir.mkdir(parents=True, exist_ok=True)
-    with open(paths.scene_scripts, "w", encoding="utf-8") as f:
-        json.dump(normalized, f, ensure_ascii=False, indent=2)
-    return normalized, warnings
+    if expected_version is not None:
+        version = write_json(paths.scene_scripts, normalized, expected_version=expected_version)
+    else:
+        version = SceneDocument.from_dict(normalized).save(paths.scene_scripts)
+    project_index.refresh(name)
+    return normalized, warnings, version
+
+
+def _touched_items(before: dict, after: dict) -> list[tuple[int, int, Any, dict]]:
+    """
+    patch 后需要重新校验的 item：(scene 下标, item 下标, sceneId, item)。
+    apply_patch 只复制被改动路径上的容器，未改动的 item 与原文档是同一对象，按 id 即可区分。
+    """
+    scenes_in = before.get("scenes")
+    old_ids = {
+        id(it)
+        for sc in (scenes_in if isinstance(scenes_in, list) else [])
+        if isinstance(sc, dict) and isinstance(sc.get("items"), list)
+        for it in sc["items"]
+    }
+    scenes = after.get("scenes", [])
+    if not isinstance(scenes, list):
+        raise ValueError("scripts.scenes 必须是数组")
+    touched = []
+    for si, scene in enumerate(scenes):
+        if not isinstance(scene, dict):
+            raise ValueError(f"scenes[{si}] 必须是对象")
+        items = scene.get("items", [])
+        if not isinstance(items, list):
+            raise ValueError(f"scenes[{si}].items 必须是数组")
+        for ii, item in enumerate(items):
+            if id(item) in old_ids:
+                continue
+            if not isinstance(item, dict):
+                raise ValueError(f"scenes[{si}].items[{ii}] 必须是对象")
+            touched.append((si, ii, scene.get("sceneId", "?"), item))
+    return touched
+
+
+def patch_scripts(name: str, ops: list[dict], *, expected_version: str) -> dict:
+    """
+    以 JSON Patch（RFC 6902）增量修改 scene-scripts：只按模板 schema 重新校验被改动的 item，原子落盘。
+    expected_version 与磁盘不一致时抛 ScriptVersionConflict；补丁非法抛 JsonPatchError（ValueError）。
+    返回 {version, warnings（保存后整份脚本的告警）, ops（服务端归一化产生的补丁，客户端据此与磁盘保持一致）}。
+    未改动 item 的告警沿用上一版本的缓存结果，不重新校验。
+    """
+    name = assert_valid_name(name)
+    paths = resolve_video_paths(name, _config())
+    if not paths.scene_scripts.is_file():
+        raise FileNotFoundError(f"scene-scripts 不存在: {paths.scene_scripts}")
+    current, version = read_json_versioned(paths.scene_scripts)
+    if version != expected_version:
+        raise ScriptVersionConflict(paths.scene_scripts, expected_version, version)
+    patched = apply_patch(current, ops)
+    if not isinstance(patched, dict):
+        raise ValueError("scene-scripts 根节点必须是对象")
+
+    # 上一版本各 item 的告警（按对象 id），未改动的 item 在新版本中是同一对象
+    (_, old_warnings), _ = derive_json(paths.scene_scripts, _outline_key(), _build_scripts_outline)
+    reuse: dict[int, tuple[Any, list[str]]] = {}
+    for si, scene in enumerate(_as_list(current.get("scenes") if isinstance(current, dict) else None)):
+        scene_id = scene.get("sceneId", "?") if isinstance(scene, dict) else "?"
+        for ii, item in enumerate(_as_list(scene.get("items") if isinstance(scene, dict) else None)):
+            reuse[id(item)] = (scene_id, old_warnings.get((si, ii), []))
+
+    normalize_ops: list[dict] = []
+    for si, ii, scene_id, item in _touched_items(current, patched):
+        param = item.get("param")
+        if isinstance(param, dict):
+            # param 可能仍与缓存共享，归一化会就地删键，先浅拷贝
+            item["param"] = param = dict(param)
+            keys = set(param)
+        item_warnings: list[str] = []
+        validate_and_normalize_item(item, TEMPLATE_REGISTRY, scene_id=scene_id, warnings=item_warnings)
+        reuse[id(item)] = (scene_id, item_warnings)
+        if isinstance(param, dict):
+            for key in sorted(keys - set(param)):
+                normalize_ops.append(
+                    {"op": "remove", "path": format_pointer(["scenes", si, "items", ii, "param", key])}
+                )
+
+    new_version = write_json(paths.scene_scripts, patched, expected_version=version)
+    project_index.refresh(name)
+    (_, item_warnings), _ = derive_json(
+        paths.scene_scripts, _outline_key(), lambda data: _build_scripts_outline(data, reuse)
+    )
+    return {"version": new_version, "warnings": _flatten_warnings(item_warnings), "ops": normalize_ops}
 
 
 def build_sync_preview(scripts: dict) -> dict:
@@ -241,79 +504,218 @@ def apply_sync_from_scripts(
     preview = build_sync_preview(scripts)
     draft = preview["draft"]
     write_draft(name, draft)
-    normalized, warnings = write_scripts(name, scripts)
+    normalized, warnings, version = write_scripts(name, scripts)
     if update_narration:
         paths = resolve_video_paths(name, _config())
         paths.narration_txt.parent.mkdir(parents=True, exist_ok=True)
         paths.narration_txt.write_text(
             preview["narrationText"].rstrip() + "\n", encoding="utf-8"
         )
+        project_index.refresh(name)
     return {
         "draft": draft,
         "scripts": normalized,
         "warnings": warnings,
+        "version": version,
         "narrationUpdated": update_narration,
         "narrationText": preview["narrationText"],
     }
 
 
-def export_zip_bytes(name: str) -> bytes:
-    name = assert_valid_name(name)
+# ZIP 流式导出 / 导入的块大小
+ZIP_CHUNK_SIZE = 1024 * 1024
+# 导入时解压总量上限（防 ZIP 炸弹）
+MAX_IMPORT_BYTES = 4 * 1024 * 1024 * 1024
+# 已压缩的媒体格式以 ZIP_STORED 存入，不再浪费 CPU 做 deflate
+_STORED_SUFFIXES = frozenset({".mp3", ".m4a", ".aac", ".ogg", ".png", ".jpg", ".jpeg", ".webp", ".gif", ".mp4"})
+
+
+class _ChunkSink:
+    """ZipFile 的只追加输出：不提供 seek，zipfile 以数据描述符方式写出，已写字节由生成器取走。"""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._pos = 0
+        self._pending = 0
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._chunks.append(data)
+        self._pos += len(data)
+        self._pending += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        return None
+
+    def pending(self) -> int:
+        """已写出但尚未被 drain 取走的字节数（tell() 是累计位置）。"""
+        return self._pending
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self._pending = 0
+        return data
+
+
+def _export_members(name: str, *, include_media: bool) -> list[tuple[Path, str]]:
+    """(本地文件, ZIP 内路径)；路径与仓库约定一致，导入时原样落位。"""
     paths = resolve_video_paths(name, _config())
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-        if paths.narration_txt.is_file():
-            zf.write(
-                paths.narration_txt,
-                arcname=f"narrations/{name}.txt",
-            )
-        if paths.scene_split_draft.is_file():
-            zf.write(
-                paths.scene_split_draft,
-                arcname=f"src/remotions/{name}/scenes/{paths.scene_split_draft.name}",
-            )
-        if paths.scene_scripts.is_file():
-            zf.write(
-                paths.scene_scripts,
-                arcname=f"src/remotions/{name}/scenes/scene-scripts.json",
-            )
-    return buf.getvalue()
+    members: list[tuple[Path, str]] = []
+    if paths.narration_txt.is_file():
+        members.append((paths.narration_txt, f"narrations/{name}.txt"))
+    if paths.scene_split_draft.is_file():
+        members.append(
+            (paths.scene_split_draft, f"src/remotions/{name}/scenes/{paths.scene_split_draft.name}")
+        )
+    if paths.scene_scripts.is_file():
+        members.append((paths.scene_scripts, f"src/remotions/{name}/scenes/scene-scripts.json"))
+    if include_media:
+        for media_dir, prefix in (
+            (paths.audio_dir, f"public/audio/{name}"),
+            (paths.images_dir, f"public/images/{name}"),
+        ):
+            if not media_dir.is_dir():
+                continue
+            for f in sorted(media_dir.rglob("*")):
+                if f.is_file() and not f.is_symlink():
+                    members.append((f, f"{prefix}/{f.relative_to(media_dir).as_posix()}"))
+    return members
+
+
+def _iter_zip(members: list[tuple[Path, str]]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+        for src, arcname in members:
+            st = src.stat()
+            zinfo = zipfile.ZipInfo.from_file(src, arcname)
+            if src.suffix.lower() in _STORED_SUFFIXES:
+                zinfo.compress_type = zipfile.ZIP_STORED
+            else:
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+            # 输出不可 seek：按源文件大小预判是否需要 zip64
+            with open(src, "rb") as fin, zf.open(
+                zinfo, "w", force_zip64=st.st_size > zipfile.ZIP64_LIMIT // 2
+            ) as fout:
+                while chunk := fin.read(ZIP_CHUNK_SIZE):
+                    fout.write(chunk)
+                    # 压缩器可能暂存数据而没有输出：无待发送字节时不产出空块
+                    if sink.pending():
+                        yield sink.drain()
+            if sink.pending():
+                yield sink.drain()
+    if sink.pending():
+        yield sink.drain()
+
+
+def export_zip_stream(name: str, *, include_media: bool = False) -> Iterator[bytes]:
+    """
+    流式导出 ZIP：返回字节块迭代器，内存只占一个块。工程名非法或没有可导出文件时立即抛 ValueError。
+    include_media 时附带 public/audio/{name}、public/images/{name}（MP3 / PNG 等以 ZIP_STORED 存入）。
+    """
+    name = assert_valid_name(name)
+    members = _export_members(name, include_media=include_media)
+    if not members:
+        raise ValueError(f"工程不存在或没有可导出的文件: {name}")
+    return _iter_zip(members)
 
 
-def import_zip_bytes(data: bytes) -> str:
-    """导入 ZIP，返回工程 name。要求含约定路径文件。"""
+def export_zip_bytes(name: str, *, include_media: bool = False) -> bytes:
+    return b"".join(export_zip_stream(name, include_media=include_media))
+
+
+def _detect_import_name(names: list[str]) -> str:
+    for n in names:
+        n = n.replace("\\", "/")
+        m = re.match(r"^narrations/([^/]+)\.txt$", n) or re.match(r"^src/remotions/([^/]+)/scenes/", n)
+        if m:
+            return assert_valid_name(m.group(1))
+    raise ValueError("ZIP 中未找到 narrations/{name}.txt 或 src/remotions/{name}/scenes/")
+
+
+def _import_target(root: Path, rel: str, name: str) -> Path | None:
+    """
+    ZIP 成员 → 工作区内目标路径；只接受该工程自己的约定路径，其余成员返回 None（忽略）。
+    绝对路径、盘符、`..` 等越界路径抛 ValueError。
+    """
+    rel = rel.replace("\\", "/")
+    parts = rel.split("/")
+    if rel.startswith("/") or re.match(r"^[A-Za-z]:", rel) or any(p in ("..", ".") for p in parts) or "" in parts:
+        raise ValueError(f"ZIP 成员路径非法: {rel!r}")
+    allowed = (
+        rel == f"narrations/{name}.txt"
+        or rel.startswith(f"src/remotions/{name}/")
+        or rel.startswith(f"public/audio/{name}/")
+        or rel.startswith(f"public/images/{name}/")
+    )
+    if not allowed:
+        return None
+    target = (root / rel).resolve()
+    if not target.is_relative_to(root):
+        raise ValueError(f"ZIP 成员路径越界: {rel!r}")
+    return target
+
+
+def import_zip_stream(fileobj: BinaryIO) -> str:
+    """
+    从可 seek 的文件对象（如上传的临时文件）导入 ZIP，返回工程 name。
+    逐成员分块解压到同目录临时文件再原子替换，内存占用与 ZIP 大小无关；
+    先整体校验路径与解压总量，任一成员非法则不写入任何文件。
+    目标工程有未结束的生成任务时抛 RuntimeError；写入期间持有该工程的脚本锁（与 update_json 等写方互斥）。
+    """
     ensure_workspace()
-    root = workspace_root()
-    with zipfile.ZipFile(io.BytesIO(data), "r") as zf:
-        names = zf.namelist()
-        project_name: str | None = None
-        for n in names:
-            m = re.match(r"^narrations/([^/]+)\.txt$", n.replace("\\", "/"))
-            if m:
-                project_name = m.group(1)
-                break
-            m = re.match(
-                r"^src/remotions/([^/]+)/scenes/", n.replace("\\", "/")
-            )
-            if m:
-                project_name = m.group(1)
-                break
-        if not project_name:
-            raise ValueError("ZIP 中未找到 narrations/{name}.txt 或 src/remotions/{name}/scenes/")
-        project_name = assert_valid_name(project_name)
-
-        for info in zf.infolist():
-            if info.is_dir():
+    root = workspace_root().resolve()
+    try:
+        zf = zipfile.ZipFile(fileobj, "r")
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"不是有效的 ZIP 文件: {e}") from e
+    with zf:
+        infos = [i for i in zf.infolist() if not i.is_dir()]
+        project_name = _detect_import_name([i.filename for i in infos])
+
+        plan: list[tuple[zipfile.ZipInfo, Path]] = []
+        total = 0
+        for info in infos:
+            target = _import_target(root, info.filename, project_name)
+            if target is None:
                 continue
-            rel = info.filename.replace("\\", "/")
-            if rel.startswith("narrations/") or rel.startswith("src/remotions/"):
-                target = root / rel
+            if stat.S_ISLNK(info.external_attr >> 16):
+                raise ValueError(f"ZIP 中不允许符号链接: {info.filename!r}")
+            total += info.file_size
+            if total > MAX_IMPORT_BYTES:
+                raise ValueError(f"ZIP 解压后超过上限 {MAX_IMPORT_BYTES // (1024 * 1024)} MB")
+            plan.append((info, target))
+
+        if get_state_backend().list_jobs(statuses=ACTIVE_STATUSES, name=project_name):
+            raise RuntimeError(f"工程 {project_name} 有生成任务在排队或运行，请结束后再导入")
+
+        scripts_path = resolve_video_paths(project_name, _config()).scene_scripts
+        with SCRIPT_STORE.lock(scripts_path):
+            for info, target in plan:
                 target.parent.mkdir(parents=True, exist_ok=True)
-                with zf.open(info) as src, open(target, "wb") as dst:
-                    dst.write(src.read())
+                fd, tmp = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=target.parent)
+                try:
+                    with zf.open(info) as src, os.fdopen(fd, "wb") as dst:
+                        shutil.copyfileobj(src, dst, ZIP_CHUNK_SIZE)
+                    os.replace(tmp, target)
+                except BaseException:
+                    Path(tmp).unlink(missing_ok=True)
+                    raise
+                # scene-scripts / 草稿被替换：丢弃解析缓存
+                SCRIPT_STORE.invalidate(target)
+    project_index.refresh(project_name)
     return project_name
 
 
+def import_zip_bytes(data: bytes) -> str:
+    """导入 ZIP，返回工程 name。要求含约定路径文件。"""
+    return import_zip_stream(io.BytesIO(data))
+
+
 def template_catalog() -> list[dict]:
     items: list[dict] = []
     for name, meta in sorted(TEMPLATE_REGISTRY.items()):
@@ -366,63 +768,173 @@ def _scene_text_for_param(name: str, scene: dict, scene_idx: int) -> str:
     return "".join(parts)
 
 
-def regenerate_item_param(
-    name: str,
-    scripts: dict,
-    scene_idx: int,
-    item_idx: int,
-    *,
-    llm_provider: str | None = None,
-    llm_model: str | None = None,
-) -> dict:
-    """
-    在保留 template 与 content 的前提下，仅重新生成指定 item 的 param。
-    使用调用方传入的 scripts（可为未落盘的编辑中状态），不写盘。
-    """
-    from narrator_pipeline.analysis.stages.param_step import analyze_param_for_item
-    from narrator_pipeline.common.step_llm import create_llm_runtime
-
-    name = assert_valid_name(name)
+def _regen_target(scripts: dict, scene_idx: int, item_idx: int) -> tuple[dict, dict]:
+    """定位 (scene, item) 并校验 item 可做局部参数重生；非法时抛 ValueError。"""
     scenes = scripts.get("scenes")
-    if not isinstance(scenes, list) or scene_idx >= len(scenes):
+    if not isinstance(scenes, list) or not 0 <= scene_idx < len(scenes):
         raise ValueError(f"sceneIdx 越界: {scene_idx}")
     scene = scenes[scene_idx]
     if not isinstance(scene, dict):
         raise ValueError("scene 无效")
     items = scene.get("items")
-    if not isinstance(items, list) or item_idx >= len(items):
+    if not isinstance(items, list) or not 0 <= item_idx < len(items):
         raise ValueError(f"itemIdx 越界: {item_idx}")
     item = items[item_idx]
     if not isinstance(item, dict):
         raise ValueError("item 无效")
-
-    scene_text = _scene_text_for_param(name, scene, scene_idx)
-    item_work = dict(item)
-    content = item_work.get("content")
+    content = item.get("content")
     if not isinstance(content, list) or not any(
         isinstance(ci, dict) and str(ci.get("text", "")).strip() for ci in content
     ):
         raise ValueError("item.content 无有效口播片段，无法局部参数重生")
+    return scene, item
+
+
+# 参数重生占用 provider 名额：与生成任务共用 SCENE_STUDIO_PROVIDER_CONCURRENCY，经共享状态后端跨进程计数。
+# 租约有效期需覆盖单次 LLM 请求；持有进程异常退出时到期自动释放。
+REGEN_LEASE_SEC = 600.0
+REGEN_SLOT_POLL_SEC = 0.2
+
+
+@contextmanager
+def _regen_slot(provider: str, cancel_token: CancelToken | None = None) -> Iterator[None]:
+    caps = provider_concurrency()
+    cap = caps.get(provider, caps.get("*"))
+    if cap is None:
+        yield
+        return
+    backend = get_state_backend()
+    while True:
+        check_cancelled(cancel_token)
+        lease_id = backend.acquire_provider_slot(provider, cap, REGEN_LEASE_SEC)
+        if lease_id is not None:
+            break
+        time.sleep(REGEN_SLOT_POLL_SEC)
+    try:
+        yield
+    finally:
+        backend.release_provider_slot(lease_id)
+
+
+def _regen_param(
+    config: dict,
+    scene_text: str,
+    item: dict,
+    *,
+    llm_provider: str | None,
+    llm_model: str | None,
+    cancel_token: CancelToken | None = None,
+) -> dict:
+    from narrator_pipeline.analysis.stages.param_step import analyze_param_for_item
+    from narrator_pipeline.common.step_llm import create_llm_runtime
 
-    texts = [
+    item_work = dict(item)
+    item_work["text"] = "".join(
         str(ci.get("text", ""))
-        for ci in content
+        for ci in item_work.get("content") or []
         if isinstance(ci, dict) and str(ci.get("text", "")).strip()
-    ]
-    item_work["text"] = "".join(texts)
-
-    config = _config()
-    client, model, _, _ = create_llm_runtime(
-        config, llm_provider=llm_provider, llm_model=llm_model
-    )
-    analyze_param_for_item(
-        client,
-        model,
-        scene_text,
-        item_work,
-        TEMPLATE_REGISTRY,
     )
+    with _regen_slot(resolve_llm_provider(config, llm_provider), cancel_token):
+        check_cancelled(cancel_token)
+        client, model, _, _ = create_llm_runtime(
+            config, llm_provider=llm_provider, llm_model=llm_model, cancel_token=cancel_token
+        )
+        analyze_param_for_item(
+            client,
+            model,
+            scene_text,
+            item_work,
+            TEMPLATE_REGISTRY,
+        )
     param = item_work.get("param")
     if not isinstance(param, dict):
         raise ValueError("局部参数重生未返回有效 param")
+    return param
+
+
+def regenerate_item_param(
+    name: str,
+    scripts: dict,
+    scene_idx: int,
+    item_idx: int,
+    *,
+    llm_provider: str | None = None,
+    llm_model: str | None = None,
+) -> dict:
+    """
+    在保留 template 与 content 的前提下，仅重新生成指定 item 的 param。
+    使用调用方传入的 scripts（可为未落盘的编辑中状态），不写盘。
+    """
+    name = assert_valid_name(name)
+    scene, item = _regen_target(scripts, scene_idx, item_idx)
+    param = _regen_param(
+        _config(),
+        _scene_text_for_param(name, scene, scene_idx),
+        item,
+        llm_provider=llm_provider,
+        llm_model=llm_model,
+    )
     return {"param": param}
+
+
+def iter_regenerate_item_params(
+    name: str,
+    scripts: dict,
+    targets: list[tuple[int, int]],
+    *,
+    llm_provider: str | None = None,
+    llm_model: str | None = None,
+) -> Generator[dict, None, None]:
+    """
+    批量局部参数重生：并发执行（单批 regen_concurrency()，并受 provider 并发上限约束），按完成顺序产出
+    {sceneIdx, itemIdx, param} 或 {sceneIdx, itemIdx, error}；单个 item 失败不影响其余 item。
+    调用方提前关闭生成器（如客户端断开）时取消尚未完成的请求。不写盘。
+    工程名在调用时即校验（非法抛 ValueError），LLM 请求在开始迭代后才发出。
+    """
+    return _iter_regen_results(
+        assert_valid_name(name), scripts, targets, llm_provider=llm_provider, llm_model=llm_model
+    )
+
+
+def _iter_regen_results(
+    name: str,
+    scripts: dict,
+    targets: list[tuple[int, int]],
+    *,
+    llm_provider: str | None,
+    llm_model: str | None,
+) -> Generator[dict, None, None]:
+    config = _config()
+    token = CancelToken()
+    scene_texts: dict[int, str] = {}
+    pending: dict[Future, tuple[int, int]] = {}
+    workers = max(1, min(regen_concurrency(), len(targets)))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="regen-param")
+    try:
+        for scene_idx, item_idx in dict.fromkeys(targets):
+            try:
+                scene, item = _regen_target(scripts, scene_idx, item_idx)
+                if scene_idx not in scene_texts:
+                    scene_texts[scene_idx] = _scene_text_for_param(name, scene, scene_idx)
+            except ValueError as e:
+                yield {"sceneIdx": scene_idx, "itemIdx": item_idx, "error": str(e)}
+                continue
+            future = pool.submit(
+                _regen_param,
+                config,
+                scene_texts[scene_idx],
+                item,
+                llm_provider=llm_provider,
+                llm_model=llm_model,
+                cancel_token=token,
+            )
+            pending[future] = (scene_idx, item_idx)
+        for future in as_completed(pending):
+            scene_idx, item_idx = pending[future]
+            try:
+                yield {"sceneIdx": scene_idx, "itemIdx": item_idx, "param": future.result()}
+            except Exception as e:
+                yield {"sceneIdx": scene_idx, "itemIdx": item_idx, "error": str(e) or type(e).__name__}
+    finally:
+        token.cancel("批量参数重生已中止")
+        pool.shutdown(wait=False, cancel_futures=True)
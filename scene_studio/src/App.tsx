@@ -52,6 +52,7 @@ export default function App() {
   const [current, setCurrent] = useState<string | null>(null);
   const [draft, setDraft] = useState<Record<string, unknown> | null>(null);
   const [scripts, setScripts] = useState<Record<string, unknown> | null>(null);
+  const [scriptsVersion, setScriptsVersion] = useState<string | null>(null);
   const [selected, setSelected] = useState<{
     sceneIdx: number;
     itemIdx: number | null;
@@ -126,6 +127,7 @@ export default function App() {
           } else if (st.phase === "done") {
             const s = await api.getScripts(st.name);
             setScripts(s.scripts);
+            setScriptsVersion(s.version);
             setCurrent(st.name);
             setSelected({ sceneIdx: 0, itemIdx: null });
             setScreen("scripts");
@@ -161,6 +163,7 @@ export default function App() {
     setCurrent(name);
     const s = await api.getScripts(name);
     setScripts(s.scripts);
+    setScriptsVersion(s.version);
     setSelected({ sceneIdx: 0, itemIdx: null });
     setScreen("scripts");
   }
@@ -175,11 +178,11 @@ export default function App() {
 
   async function startGen(name: string) {
     setError(null);
-    const active = await api.activeJob();
+    const active = await api.activeJob(name);
     let force = false;
     if (isJobActive(active.job)) {
       if (
-        !window.confirm("已有生成任务进行中，确认取消并重新生成分镜？")
+        !window.confirm("该工程已有生成任务进行中，确认取消并重新生成分镜？")
       ) {
         return;
       }
@@ -191,14 +194,14 @@ export default function App() {
 
   async function startStep1(name: string) {
     setError(null);
-    const active = await api.activeJob();
+    const active = await api.activeJob(name);
     if (isDraftGenerating(active.job)) {
       throw new Error("正在生成草稿（Step0），不允许生成脚本");
     }
     let force = false;
     if (isJobActive(active.job)) {
       if (
-        !window.confirm("已有生成任务进行中，确认取消并重新生成脚本？")
+        !window.confirm("该工程已有生成任务进行中，确认取消并重新生成脚本？")
       ) {
         return;
       }
@@ -338,6 +341,8 @@ export default function App() {
           name={current}
           scripts={scripts}
           setScripts={setScripts}
+          version={scriptsVersion}
+          setVersion={setScriptsVersion}
           selected={selected}
           setSelected={setSelected}
           tmap={tmap}
@@ -383,6 +388,7 @@ export default function App() {
                 updateNarration,
               );
               setScripts(res.scripts as Record<string, unknown>);
+              setScriptsVersion(res.version as string);
               setDraft(res.draft as Record<string, unknown>);
               setWarnings((res.warnings as string[]) || []);
               setSyncOpen(false);
@@ -1,3 +1,5 @@
+import type { JsonPatchOp } from "./jsonPatch";
+
 const API_BASE = import.meta.env.VITE_API_BASE ?? "";
 
 let token: string | null = localStorage.getItem("scene_studio_token");
@@ -12,6 +14,16 @@ export function getToken() {
   return token;
 }
 
+/** 带 HTTP 状态码的请求错误（如 409 版本冲突） */
+export class ApiError extends Error {
+  status: number;
+
+  constructor(status: number, message: string) {
+    super(message);
+    this.status = status;
+  }
+}
+
 async function postJson<T>(path: string, body: unknown, auth = true): Promise<T> {
   const headers: Record<string, string> = {
     "Content-Type": "application/json",
@@ -33,13 +45,61 @@ async function postJson<T>(path: string, body: unknown, auth = true): Promise<T>
     } catch {
       /* ignore */
     }
-    throw new Error(typeof detail === "string" ? detail : JSON.stringify(detail));
+    throw new ApiError(
+      res.status,
+      typeof detail === "string" ? detail : JSON.stringify(detail),
+    );
   }
   const ct = res.headers.get("content-type") || "";
   if (ct.includes("application/json")) return (await res.json()) as T;
   return undefined as T;
 }
 
+/**
+ * 带 ETag 的 POST（API 全为 POST，浏览器不会缓存）：上次响应与 ETag 存在 localStorage，
+ * 请求时带 If-None-Match，服务端回 304 则直接用本地内容。
+ */
+async function postJsonCached<T>(path: string, body: unknown, cacheKey: string): Promise<T> {
+  if (!token) throw new Error("未登录");
+  const storageKey = `scene_studio_cache:${cacheKey}`;
+  let cached: { etag: string; data: T } | null = null;
+  try {
+    cached = JSON.parse(localStorage.getItem(storageKey) || "null");
+  } catch {
+    cached = null;
+  }
+  const headers: Record<string, string> = {
+    "Content-Type": "application/json",
+    Authorization: `Bearer ${token}`,
+  };
+  if (cached?.etag) headers["If-None-Match"] = cached.etag;
+  const res = await fetch(`${API_BASE}${path}`, {
+    method: "POST",
+    headers,
+    body: JSON.stringify(body ?? {}),
+  });
+  if (res.status === 304 && cached) return cached.data;
+  if (!res.ok) {
+    let detail = res.statusText;
+    try {
+      detail = (await res.json()).detail ?? detail;
+    } catch {
+      /* ignore */
+    }
+    throw new ApiError(res.status, String(detail));
+  }
+  const data = (await res.json()) as T;
+  const etag = res.headers.get("ETag");
+  if (etag) {
+    try {
+      localStorage.setItem(storageKey, JSON.stringify({ etag, data }));
+    } catch {
+      /* 配额不足时只是不缓存 */
+    }
+  }
+  return data;
+}
+
 export type ProjectInfo = {
   name: string;
   hasNarration: boolean;
@@ -67,11 +127,29 @@ export type JobStatus = {
   kind: string;
   status: string;
   phase: string;
+  /** 最近若干行日志；完整日志用 streamJobLogs / jobLogs 按 offset 读取 */
   logs: string[];
+  /** 日志总行数（即续读的下一个 offset） */
+  logCount?: number;
   error: string | null;
   createdAt: string;
+  /** 出队开始运行的时间；排队中为 null */
+  startedAt?: string | null;
   finishedAt: string | null;
   timeoutSec?: number;
+  priority?: number;
+  provider?: string;
+  /** 排队位置（1 起）；不在队列中为 null */
+  queuePosition?: number | null;
+};
+
+export type JobLogLine = { offset: number; ts: string; text: string };
+
+export type RegenParamResult = {
+  sceneIdx: number;
+  itemIdx: number;
+  param?: Record<string, unknown>;
+  error?: string;
 };
 
 export const JOB_TERMINAL_STATUSES = new Set([
@@ -100,8 +178,13 @@ export const api = {
   login: (password: string) =>
     postJson<{ token: string }>("/api/login", { password }, false),
 
-  listProjects: () =>
-    postJson<{ projects: ProjectInfo[] }>("/api/projects/list", {}),
+  /** search 为工程名子串；不传 limit 返回全部 */
+  listProjects: (opts?: { search?: string; offset?: number; limit?: number }) =>
+    postJson<{ projects: ProjectInfo[]; total: number }>("/api/projects/list", {
+      search: opts?.search || null,
+      offset: opts?.offset ?? 0,
+      limit: opts?.limit ?? null,
+    }),
 
   createProject: (name: string, narrationText: string) =>
     postJson<{ project: ProjectInfo }>("/api/projects/create", {
@@ -115,7 +198,8 @@ export const api = {
   getProject: (name: string) =>
     postJson<{ project: ProjectInfo }>("/api/projects/get", { name }),
 
-  exportProject: async (name: string) => {
+  /** includeMedia：附带 public/audio、public/images 下的音频与配图 */
+  exportProject: async (name: string, opts?: { includeMedia?: boolean }) => {
     if (!token) throw new Error("未登录");
     const res = await fetch(`${API_BASE}/api/projects/export`, {
       method: "POST",
@@ -123,7 +207,7 @@ export const api = {
         "Content-Type": "application/json",
         Authorization: `Bearer ${token}`,
       },
-      body: JSON.stringify({ name }),
+      body: JSON.stringify({ name, includeMedia: opts?.includeMedia ?? false }),
     });
     if (!res.ok) throw new Error(await res.text());
     const blob = await res.blob();
@@ -192,8 +276,58 @@ export const api = {
   jobStatus: (jobId: string) =>
     postJson<JobStatus>("/api/jobs/status", { jobId }),
 
-  activeJob: () =>
-    postJson<{ job: JobStatus | null }>("/api/jobs/active", {}),
+  activeJob: (name?: string) =>
+    postJson<{ job: JobStatus | null }>("/api/jobs/active", { name: name ?? null }),
+  listJobs: () => postJson<{ jobs: JobStatus[] }>("/api/jobs/list", {}),
+
+  jobLogs: (jobId: string, offset: number) =>
+    postJson<{ lines: JobLogLine[]; nextOffset: number }>("/api/jobs/logs", {
+      jobId,
+      offset,
+    }),
+
+  /**
+   * SSE 日志流（POST + fetch 读取，以便携带 Bearer）。从 offset 起回调每一行；
+   * 任务结束时正常返回，signal 中止时抛 AbortError。
+   */
+  async streamJobLogs(
+    jobId: string,
+    offset: number,
+    onLine: (line: JobLogLine) => void,
+    signal?: AbortSignal,
+  ): Promise<void> {
+    if (!token) throw new Error("未登录");
+    const res = await fetch(`${API_BASE}/api/jobs/logs/stream`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${token}`,
+      },
+      body: JSON.stringify({ jobId, offset }),
+      signal,
+    });
+    if (!res.ok || !res.body) throw new Error(res.statusText || "日志流连接失败");
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buf = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) return;
+      buf += value;
+      let sep: number;
+      while ((sep = buf.indexOf("\n\n")) >= 0) {
+        const block = buf.slice(0, sep);
+        buf = buf.slice(sep + 2);
+        let event = "message";
+        const data: string[] = [];
+        for (const line of block.split("\n")) {
+          if (line.startsWith("event:")) event = line.slice(6).trim();
+          else if (line.startsWith("data:")) data.push(line.slice(5).trimStart());
+        }
+        if (event === "end") return;
+        if (data.length) onLine(JSON.parse(data.join("\n")) as JobLogLine);
+      }
+    }
+  },
 
   getDraft: (name: string) =>
     postJson<{ draft: Record<string, unknown> }>("/api/draft/get", { name }),
@@ -205,14 +339,23 @@ export const api = {
     }),
 
   getScripts: (name: string) =>
-    postJson<{ scripts: Record<string, unknown> }>("/api/scripts/get", {
-      name,
-    }),
+    postJson<{ scripts: Record<string, unknown>; version: string }>(
+      "/api/scripts/get",
+      { name },
+    ),
 
-  saveScripts: (name: string, scripts: Record<string, unknown>) =>
-    postJson<{ scripts: Record<string, unknown>; warnings: string[] }>(
+  /** version 为读取时的版本：磁盘已被改写时抛 ApiError(409)；不传则无条件覆盖 */
+  saveScripts: (name: string, scripts: Record<string, unknown>, version?: string | null) =>
+    postJson<{ scripts: Record<string, unknown>; warnings: string[]; version: string }>(
       "/api/scripts/save",
-      { name, scripts },
+      { name, scripts, version: version ?? null },
+    ),
+
+  /** 增量保存；warnings 为保存后整份脚本的告警，ops 为服务端归一化产生的补丁 */
+  patchScripts: (name: string, ops: JsonPatchOp[], version: string) =>
+    postJson<{ version: string; warnings: string[]; ops: JsonPatchOp[] }>(
+      "/api/scripts/patch",
+      { name, ops, version },
     ),
 
   syncPreview: (name: string, scripts: Record<string, unknown>, updateNarration: boolean) =>
@@ -229,8 +372,13 @@ export const api = {
       updateNarration,
     }),
 
+  /** 按 ETag 复用本地缓存 */
   listTemplates: () =>
-    postJson<{ templates: TemplateInfo[] }>("/api/templates/list", {}),
+    postJsonCached<{ templates: TemplateInfo[]; version: string }>(
+      "/api/templates/list",
+      {},
+      "templates:full",
+    ),
 
   regenParam: (
     name: string,
@@ -244,4 +392,49 @@ export const api = {
       sceneIdx,
       itemIdx,
     }),
+
+  /** 批量局部参数重生：各 item 并发执行，按完成顺序逐个回调；单个 item 失败以 error 返回，不中断整批 */
+  async regenParams(
+    name: string,
+    scripts: Record<string, unknown>,
+    targets: { sceneIdx: number; itemIdx: number }[],
+    onResult: (r: RegenParamResult) => void,
+    signal?: AbortSignal,
+  ): Promise<{ ok: number; failed: number }> {
+    if (!token) throw new Error("未登录");
+    const res = await fetch(`${API_BASE}/api/scripts/regen-params`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${token}`,
+      },
+      body: JSON.stringify({ name, scripts, targets }),
+      signal,
+    });
+    if (!res.ok || !res.body) {
+      let detail = res.statusText;
+      try {
+        detail = (await res.json()).detail ?? detail;
+      } catch {
+        /* ignore */
+      }
+      throw new ApiError(res.status, String(detail));
+    }
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buf = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) throw new Error("参数重生连接意外中断");
+      buf += value;
+      let sep: number;
+      while ((sep = buf.indexOf("\n")) >= 0) {
+        const line = buf.slice(0, sep).trim();
+        buf = buf.slice(sep + 1);
+        if (!line) continue;
+        const msg = JSON.parse(line);
+        if (msg.done) return { ok: msg.ok, failed: msg.failed };
+        onResult(msg as RegenParamResult);
+      }
+    }
+  },
 };
@@ -0,0 +1,84 @@
+/**
+ * JSON Patch（RFC 6902）：脚本增量保存。
+ * 编辑器状态按不可变方式更新，未改动的子树与上次保存的对象是同一引用，diff 只走改动路径。
+ */
+
+export type JsonPatchOp =
+  | { op: "add" | "replace"; path: string; value: unknown }
+  | { op: "remove"; path: string };
+
+type Json = Record<string, unknown> | unknown[] | string | number | boolean | null;
+
+function escapeToken(key: string): string {
+  return key.replace(/~/g, "~0").replace(/\//g, "~1");
+}
+
+function unescapeToken(token: string): string {
+  return token.replace(/~1/g, "/").replace(/~0/g, "~");
+}
+
+function isObject(v: unknown): v is Record<string, unknown> {
+  return typeof v === "object" && v !== null && !Array.isArray(v);
+}
+
+/** 与 JSON.stringify 一致：值为 undefined 的键视为不存在 */
+function hasKey(o: Record<string, unknown>, k: string): boolean {
+  return Object.prototype.hasOwnProperty.call(o, k) && o[k] !== undefined;
+}
+
+/** 生成把 a 变为 b 的补丁（数组按下标比较，尾部增删）。 */
+export function diffJson(a: unknown, b: unknown, path = "", out: JsonPatchOp[] = []): JsonPatchOp[] {
+  if (a === b) return out;
+  if (Array.isArray(a) && Array.isArray(b)) {
+    const n = Math.min(a.length, b.length);
+    for (let i = 0; i < n; i++) diffJson(a[i], b[i], `${path}/${i}`, out);
+    for (let i = a.length - 1; i >= n; i--) out.push({ op: "remove", path: `${path}/${i}` });
+    for (let i = n; i < b.length; i++) out.push({ op: "add", path: `${path}/-`, value: b[i] });
+    return out;
+  }
+  if (isObject(a) && isObject(b)) {
+    for (const k of Object.keys(a)) {
+      if (hasKey(a, k) && !hasKey(b, k)) out.push({ op: "remove", path: `${path}/${escapeToken(k)}` });
+    }
+    for (const k of Object.keys(b)) {
+      if (!hasKey(b, k)) continue;
+      const p = `${path}/${escapeToken(k)}`;
+      if (hasKey(a, k)) diffJson(a[k], b[k], p, out);
+      else out.push({ op: "add", path: p, value: b[k] });
+    }
+    return out;
+  }
+  out.push({ op: "replace", path, value: b });
+  return out;
+}
+
+function applyAt(node: Json, tokens: string[], op: JsonPatchOp): Json {
+  const [head, ...rest] = tokens;
+  if (Array.isArray(node)) {
+    const next = [...node];
+    const idx = head === "-" ? next.length : Number(head);
+    if (rest.length) next[idx] = applyAt(next[idx] as Json, rest, op);
+    else if (op.op === "remove") next.splice(idx, 1);
+    else if (op.op === "add") next.splice(idx, 0, op.value);
+    else next[idx] = op.value;
+    return next;
+  }
+  if (isObject(node)) {
+    const next = { ...node };
+    if (rest.length) next[head] = applyAt(next[head] as Json, rest, op);
+    else if (op.op === "remove") delete next[head];
+    else next[head] = op.value;
+    return next;
+  }
+  throw new Error(`补丁路径不存在: ${op.path}`);
+}
+
+/** 不可变地应用 add / remove / replace，返回新对象（只复制改动路径上的容器）。 */
+export function applyPatch<T>(doc: T, ops: JsonPatchOp[]): T {
+  let out = doc as unknown as Json;
+  for (const op of ops) {
+    const tokens = op.path === "" ? [] : op.path.slice(1).split("/").map(unescapeToken);
+    out = tokens.length ? applyAt(out, tokens, op) : op.op === "remove" ? null : (op.value as Json);
+  }
+  return out as unknown as T;
+}
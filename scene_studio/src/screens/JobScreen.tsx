@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import type { JobStatus } from "../api";
-import { isJobActive } from "../api";
+import { api, isJobActive } from "../api";
 import { AppShell } from "../components/AppShell";
 
 type Props = {
@@ -14,14 +14,47 @@ type Props = {
 function remainLabel(job: JobStatus): string | null {
   if (job.status !== "running") return null;
   const timeoutSec = job.timeoutSec ?? 600;
-  const created = Date.parse(job.createdAt);
-  if (Number.isNaN(created)) return null;
-  const left = Math.max(0, timeoutSec * 1000 - (Date.now() - created));
+  // 超时从出队开始运行时计，排队时间不算
+  const started = Date.parse(job.startedAt ?? job.createdAt);
+  if (Number.isNaN(started)) return null;
+  const left = Math.max(0, timeoutSec * 1000 - (Date.now() - started));
   const mins = Math.floor(left / 60000);
   const secs = Math.floor((left % 60000) / 1000);
   return `剩余约 ${mins}:${String(secs).padStart(2, "0")}`;
 }
 
+/** 全部日志行：经日志流增量追加（断线后从已收到的行数续读）；流不可用时回退为状态接口的最近若干行 */
+function useJobLogs(job: JobStatus): string[] {
+  const [lines, setLines] = useState<string[] | null>(null);
+  const { jobId } = job;
+  useEffect(() => {
+    const ctrl = new AbortController();
+    const received: string[] = [];
+    setLines(null);
+    (async () => {
+      for (let attempt = 0; attempt < 5 && !ctrl.signal.aborted; attempt++) {
+        try {
+          await api.streamJobLogs(
+            jobId,
+            received.length,
+            (line) => {
+              received.push(line.text);
+              setLines([...received]);
+            },
+            ctrl.signal,
+          );
+          return;
+        } catch {
+          if (ctrl.signal.aborted) return;
+          await new Promise((r) => window.setTimeout(r, 1000 * (attempt + 1)));
+        }
+      }
+    })();
+    return () => ctrl.abort();
+  }, [jobId]);
+  return lines ?? job.logs;
+}
+
 export function JobScreen(props: Props) {
   const { job } = props;
   const running = isJobActive(job);
@@ -38,6 +71,7 @@ export function JobScreen(props: Props) {
     job.status === "cancelled" ||
     job.status === "failed";
   const remain = remainLabel(job);
+  const logs = useJobLogs(job);
 
   return (
     <AppShell
@@ -50,11 +84,20 @@ export function JobScreen(props: Props) {
       <section className="panel">
         <p className="job-phase">
           阶段 <strong>{job.phase}</strong>
-          {running ? <span className="pulse"> · 进行中</span> : null}
+          {job.status === "queued" ? (
+            <span className="pulse">
+              {" "}
+              · 排队中{job.queuePosition ? ` · 第 ${job.queuePosition} 位` : ""}
+            </span>
+          ) : job.status === "cancelling" ? (
+            <span className="pulse"> · 正在取消（等待当前请求中止）</span>
+          ) : running ? (
+            <span className="pulse"> · 进行中</span>
+          ) : null}
           {remain ? <span className="muted"> · {remain}</span> : null}
         </p>
         {job.error ? <pre className="error">{job.error}</pre> : null}
-        <pre className="logs job-logs">{job.logs.join("\n")}</pre>
+        <pre className="logs job-logs">{logs.join("\n")}</pre>
         {job.status === "succeeded" && job.phase === "awaiting_draft_review" ? (
           <button
             type="button"
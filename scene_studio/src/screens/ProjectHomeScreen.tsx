@@ -116,6 +116,18 @@ export function ProjectHomeScreen(props: Props) {
             <strong>导出 ZIP</strong>
             <span className="muted">拉回本机仓库</span>
           </button>
+          <button
+            type="button"
+            className="action-tile"
+            onClick={() =>
+              api
+                .exportProject(p.name, { includeMedia: true })
+                .catch((e) => props.onError(String(e)))
+            }
+          >
+            <strong>导出 ZIP（含媒体）</strong>
+            <span className="muted">附带音频与配图</span>
+          </button>
           <button
             type="button"
             className="action-tile danger-tile"
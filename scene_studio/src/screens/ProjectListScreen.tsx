@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import type { ProjectInfo } from "../api";
 import { api } from "../api";
 import { AppShell } from "../components/AppShell";
@@ -18,8 +18,50 @@ type Props = {
   error: string | null;
 };
 
+const SEARCH_PAGE_SIZE = 30;
+
+/** 按工程名搜索（服务端分页）；search 为空时返回 null，列表用 props.projects */
+function useProjectSearch(search: string, onError: (e: string | null) => void) {
+  const [result, setResult] = useState<{ projects: ProjectInfo[]; total: number } | null>(null);
+  const query = search.trim();
+  useEffect(() => {
+    if (!query) {
+      setResult(null);
+      return;
+    }
+    let stale = false;
+    const id = window.setTimeout(async () => {
+      try {
+        const res = await api.listProjects({ search: query, limit: SEARCH_PAGE_SIZE });
+        if (!stale) setResult(res);
+      } catch (e) {
+        onError(String(e));
+      }
+    }, 250);
+    return () => {
+      stale = true;
+      window.clearTimeout(id);
+    };
+  }, [query, onError]);
+
+  async function loadMore() {
+    if (!result) return;
+    const res = await api.listProjects({
+      search: query,
+      offset: result.projects.length,
+      limit: SEARCH_PAGE_SIZE,
+    });
+    setResult({ projects: [...result.projects, ...res.projects], total: res.total });
+  }
+
+  return { result, loadMore };
+}
+
 export function ProjectListScreen(props: Props) {
   const [creating, setCreating] = useState(false);
+  const [search, setSearch] = useState("");
+  const { result: searchResult, loadMore } = useProjectSearch(search, props.onError);
+  const projects = searchResult ? searchResult.projects : props.projects;
 
   return (
     <AppShell
@@ -122,11 +164,20 @@ export function ProjectListScreen(props: Props) {
           </section>
         ) : null}
 
+        <input
+          type="search"
+          placeholder="搜索工程名"
+          value={search}
+          onChange={(e) => setSearch(e.target.value)}
+        />
+
         <section className="project-list">
-          {props.projects.length === 0 ? (
-            <p className="muted empty-hint">暂无工程，点右上角新建</p>
+          {projects.length === 0 ? (
+            <p className="muted empty-hint">
+              {searchResult ? "没有匹配的工程" : "暂无工程，点右上角新建"}
+            </p>
           ) : null}
-          {props.projects.map((p) => (
+          {projects.map((p) => (
             <button
               type="button"
               className="project-card"
@@ -147,6 +198,15 @@ export function ProjectListScreen(props: Props) {
               </div>
             </button>
           ))}
+          {searchResult && searchResult.projects.length < searchResult.total ? (
+            <button
+              type="button"
+              className="btn-block"
+              onClick={() => loadMore().catch((e) => props.onError(String(e)))}
+            >
+              加载更多（{searchResult.projects.length}/{searchResult.total}）
+            </button>
+          ) : null}
         </section>
       </div>
     </AppShell>
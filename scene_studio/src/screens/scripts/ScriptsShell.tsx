@@ -1,8 +1,9 @@
 import { useEffect, useRef, useState } from "react";
-import { api, type TemplateInfo } from "../../api";
+import { api, ApiError, type TemplateInfo } from "../../api";
 import { AppShell } from "../../components/AppShell";
 import { TemplatePicker } from "../../components/TemplatePicker";
 import { useIsNarrow } from "../../hooks/useIsNarrow";
+import { applyPatch, diffJson } from "../../jsonPatch";
 import { ParamForm } from "../../ParamForm";
 import {
   moveContentAcrossItems,
@@ -19,6 +20,9 @@ type Props = {
   name: string;
   scripts: Record<string, unknown>;
   setScripts: (s: Record<string, unknown>) => void;
+  /** 当前 scripts 对应的磁盘版本（/api/scripts/get 返回） */
+  version: string | null;
+  setVersion: (v: string) => void;
   selected: { sceneIdx: number; itemIdx: number | null };
   setSelected: (s: { sceneIdx: number; itemIdx: number | null }) => void;
   tmap: Map<string, TemplateInfo>;
@@ -47,64 +51,114 @@ export function ScriptsShell(props: Props) {
   const propsRef = useRef(props);
   propsRef.current = props;
   const lastSavedJsonRef = useRef<string | null>(null);
-  const saveSeqRef = useRef(0);
+  // 与磁盘一致的最近一次保存内容及其版本：增量保存以此为基准做 diff
+  const baseRef = useRef(props.scripts);
+  const versionRef = useRef(props.version);
+  const saveChainRef = useRef<Promise<void>>(Promise.resolve());
   const timerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
-  const persistScriptsRef = useRef<(payload: Record<string, unknown>) => Promise<void>>(
-    async () => {},
-  );
+  const persistScriptsRef = useRef<() => Promise<void>>(async () => {});
 
   function scheduleAutosave() {
     if (timerRef.current) clearTimeout(timerRef.current);
     timerRef.current = setTimeout(() => {
       timerRef.current = null;
-      void persistScriptsRef.current(scriptsRef.current);
+      void persistScriptsRef.current();
     }, AUTOSAVE_MS);
   }
 
-  async function persistScripts(payload: Record<string, unknown>) {
+  /** 保存串行执行：每次都基于上一次保存返回的版本，避免自己的两次保存互相 409 */
+  function persistScripts(): Promise<void> {
+    const run = saveChainRef.current.then(saveOnce);
+    saveChainRef.current = run.catch(() => {});
+    return run;
+  }
+  persistScriptsRef.current = persistScripts;
+
+  async function saveOnce() {
+    const payload = scriptsRef.current;
     const sentJson = JSON.stringify(payload);
     if (sentJson === lastSavedJsonRef.current) return;
-    const seq = ++saveSeqRef.current;
     const p = propsRef.current;
     p.onError(null);
     try {
-      const res = await api.saveScripts(p.name, payload);
-      if (seq !== saveSeqRef.current) return;
-      p.setWarnings(res.warnings || []);
-      const currentJson = JSON.stringify(scriptsRef.current);
-      if (currentJson === sentJson) {
-        const savedJson = JSON.stringify(res.scripts);
-        lastSavedJsonRef.current = savedJson;
+      let saved: Record<string, unknown>;
+      let version: string;
+      if (versionRef.current) {
+        const ops = diffJson(baseRef.current, payload);
+        const res = await api.patchScripts(p.name, ops, versionRef.current);
+        saved = applyPatch(payload, res.ops);
+        version = res.version;
+        // 服务端返回整份脚本的告警（未改动的 item 沿用缓存的校验结果），直接替换
+        p.setWarnings(res.warnings || []);
+      } else {
+        const res = await api.saveScripts(p.name, payload);
+        saved = res.scripts;
+        version = res.version;
+        p.setWarnings(res.warnings || []);
+      }
+      baseRef.current = saved;
+      versionRef.current = version;
+      const savedJson = JSON.stringify(saved);
+      lastSavedJsonRef.current = savedJson;
+      p.setVersion(version);
+      if (JSON.stringify(scriptsRef.current) === sentJson) {
         if (savedJson !== sentJson) {
-          p.setScripts(res.scripts);
+          p.setScripts(saved);
         }
       } else {
-        lastSavedJsonRef.current = JSON.stringify(res.scripts);
         scheduleAutosave();
       }
     } catch (e) {
-      if (seq !== saveSeqRef.current) return;
+      if (e instanceof ApiError && e.status === 409) {
+        await reloadAfterConflict(e.message);
+        return;
+      }
+      p.onError(String(e));
+    }
+  }
+
+  /** 其他窗口已保存过：载入磁盘最新版本作为新基准（本次未保存的修改丢弃） */
+  async function reloadAfterConflict(detail: string) {
+    const p = propsRef.current;
+    try {
+      const s = await api.getScripts(p.name);
+      baseRef.current = s.scripts;
+      versionRef.current = s.version;
+      lastSavedJsonRef.current = JSON.stringify(s.scripts);
+      p.setVersion(s.version);
+      p.setScripts(s.scripts);
+      p.onError(`${detail}（已载入最新版本，本次修改未保存）`);
+    } catch (e) {
       p.onError(String(e));
     }
   }
-  persistScriptsRef.current = persistScripts;
 
   async function flushSave() {
     if (timerRef.current) {
       clearTimeout(timerRef.current);
       timerRef.current = null;
     }
-    await persistScripts(scriptsRef.current);
+    await persistScripts();
   }
 
   useEffect(() => {
     lastSavedJsonRef.current = JSON.stringify(scriptsRef.current);
+    baseRef.current = scriptsRef.current;
+    versionRef.current = propsRef.current.version;
     if (timerRef.current) {
       clearTimeout(timerRef.current);
       timerRef.current = null;
     }
   }, [props.name]);
 
+  useEffect(() => {
+    // 外部载入的新内容（打开工程 / 同步确认）：作为新的保存基准；须在下方 scripts 副作用之前执行
+    if (props.version === versionRef.current) return;
+    versionRef.current = props.version;
+    baseRef.current = props.scripts;
+    lastSavedJsonRef.current = JSON.stringify(props.scripts);
+  }, [props.version]);
+
   useEffect(() => {
     if (lastSavedJsonRef.current === null) {
       lastSavedJsonRef.current = JSON.stringify(props.scripts);
@@ -123,7 +177,7 @@ export function ScriptsShell(props: Props) {
         lastSavedJsonRef.current !== null &&
         json !== lastSavedJsonRef.current
       ) {
-        void api.saveScripts(propsRef.current.name, scriptsRef.current);
+        void persistScriptsRef.current();
       }
     };
   }, []);
@@ -212,6 +266,21 @@ export function ScriptsShell(props: Props) {
     ]);
   }
 
+  /** 把重生结果写回最新的编辑状态（期间用户的其他修改保留） */
+  function applyRegenParam(si: number, ii: number, param: Record<string, unknown>) {
+    const latest = scriptsRef.current;
+    const nextScenes = [...((latest.scenes as Scene[]) || [])];
+    const sc = nextScenes[si];
+    if (!sc?.items?.[ii]) return;
+    const nextItems = [...sc.items];
+    nextItems[ii] = { ...nextItems[ii], param };
+    nextScenes[si] = { ...sc, items: nextItems };
+    const next = { ...latest, scenes: nextScenes };
+    // 批量结果可能在两次渲染之间连续到达，先更新 ref 以免互相覆盖
+    scriptsRef.current = next;
+    props.setScripts(next);
+  }
+
   async function onRegenParam(itemIdx: number) {
     const requestScripts = scriptsRef.current;
     setRegenBusy(true);
@@ -223,17 +292,29 @@ export function ScriptsShell(props: Props) {
         sceneIdx,
         itemIdx,
       );
-      const latest = scriptsRef.current;
-      const nextScenes = [...((latest.scenes as Scene[]) || [])];
-      const sc = nextScenes[sceneIdx];
-      if (!sc?.items?.[itemIdx]) return;
-      const nextItems = [...sc.items];
-      nextItems[itemIdx] = {
-        ...nextItems[itemIdx],
-        param: res.param,
-      };
-      nextScenes[sceneIdx] = { ...sc, items: nextItems };
-      props.setScripts({ ...latest, scenes: nextScenes });
+      applyRegenParam(sceneIdx, itemIdx, res.param);
+    } catch (e) {
+      props.onError(String(e));
+    } finally {
+      setRegenBusy(false);
+    }
+  }
+
+  async function onRegenSceneParams() {
+    const si = sceneIdx;
+    const targets = items.map((_, ii) => ({ sceneIdx: si, itemIdx: ii }));
+    if (!targets.length) return;
+    setRegenBusy(true);
+    props.onError(null);
+    const failed: string[] = [];
+    try {
+      await api.regenParams(props.name, scriptsRef.current, targets, (r) => {
+        if (r.param) applyRegenParam(r.sceneIdx, r.itemIdx, r.param);
+        else failed.push(`item ${r.itemIdx + 1}：${r.error || "未知错误"}`);
+      });
+      if (failed.length) {
+        props.onError(`${failed.length} 个 item 参数重生失败\n${failed.join("\n")}`);
+      }
     } catch (e) {
       props.onError(String(e));
     } finally {
@@ -429,6 +510,13 @@ export function ScriptsShell(props: Props) {
                 }}
                 placeholder="sceneName"
               />
+              <button
+                type="button"
+                disabled={regenBusy || !items.length}
+                onClick={onRegenSceneParams}
+              >
+                {regenBusy ? "重生中…" : "本场景参数重生"}
+              </button>
               <button
                 type="button"
                 className="danger"
@@ -0,0 +1,90 @@
+/**
+ * SceneDataRenderer：step4 `--data-mode json` 的通用场景组件。
+ * 场景数据来自 scenes/data/scene{n}.json，跨场景重复的值存放在 scenes/data/pool.json：
+ * - {"$ref": n} → pool[n]（池内条目可再引用其他条目）
+ * - {"$static": path} → staticFile(path)
+ * 数据在场景首次渲染时还原一次（useMemo），生成的 Scene{n}.tsx 只负责 import 数据与所用模板组件。
+ */
+import React, { useMemo } from "react";
+import { AbsoluteFill, Audio, Sequence, staticFile } from "remotion";
+
+export type SceneDataItem = {
+	component: string;
+	durationFrames: number;
+	props: Record<string, unknown>;
+};
+
+export type SceneData = {
+	sceneName?: string;
+	audioSrc?: string;
+	items: SceneDataItem[];
+};
+
+const singleKey = (obj: Record<string, unknown>, key: string): boolean => {
+	const keys = Object.keys(obj);
+	return keys.length === 1 && keys[0] === key;
+};
+
+export function resolveSceneValue(value: unknown, pool: readonly unknown[]): unknown {
+	if (Array.isArray(value)) {
+		return value.map((v) => resolveSceneValue(v, pool));
+	}
+	if (typeof value !== "object" || value === null) {
+		return value;
+	}
+	const obj = value as Record<string, unknown>;
+	if (singleKey(obj, "$ref") && typeof obj.$ref === "number") {
+		return resolveSceneValue(pool[obj.$ref], pool);
+	}
+	if (singleKey(obj, "$static") && typeof obj.$static === "string") {
+		return staticFile(obj.$static);
+	}
+	const out: Record<string, unknown> = {};
+	for (const key of Object.keys(obj)) {
+		out[key] = resolveSceneValue(obj[key], pool);
+	}
+	return out;
+}
+
+export type DataSceneProps = {
+	/** scene{n}.json 原始内容 */
+	data: unknown;
+	/** pool.json 原始内容 */
+	pool: unknown;
+	/** 组件名 → 模板组件（仅包含该场景用到的组件） */
+	components: Record<string, React.FC<never>>;
+};
+
+export const DataScene: React.FC<DataSceneProps> = ({ data, pool, components }) => {
+	const scene = useMemo(
+		() => resolveSceneValue(data, Array.isArray(pool) ? pool : []) as SceneData,
+		[data, pool],
+	);
+	const offsets = useMemo(() => {
+		let from = 0;
+		return scene.items.map((item) => {
+			const start = from;
+			from += item.durationFrames;
+			return start;
+		});
+	}, [scene]);
+
+	return (
+		<AbsoluteFill>
+			{scene.items.map((item, i) => {
+				const Component = components[item.component] as
+					| React.FC<Record<string, unknown>>
+					| undefined;
+				if (!Component) {
+					return null;
+				}
+				return (
+					<Sequence key={i} from={offsets[i]} durationInFrames={item.durationFrames}>
+						<Component {...item.props} />
+					</Sequence>
+				);
+			})}
+			{scene.audioSrc ? <Audio src={scene.audioSrc} /> : null}
+		</AbsoluteFill>
+	);
+};
@@ -31,6 +31,7 @@ export const templateMeta = {
 		"适用：默认叙事底盘；平缓讲事实、下定义、引入话题；单图居中。\n差异：强情绪/震惊句用 TEXT_FOCUS；专业术语卡用 CONCEPT_CARD；多要素同时出现用 PANEL_GRID。\n慎用：需要左右对比或步骤列表时请换 SPLIT_COMPARE / STEP_LIST 等。\n参数：图片始终带呼吸效果；enterEffect 控制入场方式，默认 fadeIn；anchors 可选，showFrom 为 content 下标（非帧数），锚点词会按时间依次出现并保留为列表。",
 	"chinese_name": "单图居中叙事",
 	"image_count": 1,
+	"image_display_box": { "width": 1570, "height": 380 },
 	"param_schema": {
 		"type": "object",
 		"properties": {
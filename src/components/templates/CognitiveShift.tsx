@@ -15,6 +15,7 @@ export const templateMeta = {
 		"适用：强对立翻转「不是...而是...」；用于纠偏、立场重述、定位差异化、观点辩论等场景的核心对句。\n视觉：A 部分（旧说法/常见误解）淡入后变灰并划线；B 部分（新结论/主张）随后高亮弹出。\n参数：notText（被否定的部分）、butText（建立的部分）必须是极简的对比关键词（如：堆功能 vs 抓体验），严禁使用完整长句；可选 butSrc（仅「而是」侧配图）。",
 	"chinese_name": "不是而是对句",
 	"image_count": "0-1",
+	"image_display_box": { "width": 640, "height": 420 },
 	"param_schema": {
 		"type": "object",
 		"properties": {
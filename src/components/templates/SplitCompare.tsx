@@ -37,6 +37,7 @@ export const templateMeta = {
 		"适用：两种方案、两条路径、两方行为对照；口播里常见「你/我…他/对方…」对仗或分号（；）两侧对立叙述。\n差异：明确错/对避坑用 DOS_AND_DONTS；纯数据双指标对比用 STAT_COMPARE；多要素平铺列举用 PANEL_GRID。\n参数：leftLabel/rightLabel 为 2～6 字短语，与左右图语义一致；可选 leftShowFrom/rightShowFrom 为 content 下标（0-based），入场帧取对应条的 startFrame；任一侧省略或索引无效则该侧从 0 帧起。",
 	"chinese_name": "左右分屏对比",
 	"image_count": 2,
+	"image_display_box": { "width": 690, "height": 540 },
 	"param_schema": {
 		"type": "object",
 		"properties": {
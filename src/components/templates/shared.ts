@@ -596,6 +596,8 @@ export interface TemplateMeta {
 	/** 选型 UI 用的中文显示名（功能/形态向） */
 	chinese_name: string;
 	image_count: number | string;
+	/** 配图在 1920×1080 画布上的大致最大显示框（px），供 Step3 选择网格布局与单格宽高比 */
+	image_display_box?: { width: number; height: number };
 	componentExport?: string;
 	/** 根节点须为 type: "object"；必填字段列在 required 中 */
 	param_schema: ParamSchema;
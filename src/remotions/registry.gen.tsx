@@ -0,0 +1,59 @@
+/**
+ * 自动生成，请勿手改：由 narrator_pipeline.codegen.step4 根据 src/remotions/{name}/composition.manifest.json 汇总。
+ */
+import React from "react";
+import { Composition } from "remotion";
+import { 小米营销论, 小米营销论竖屏, 小米营销论Schema, TOTAL_DURATION_小米营销论 } from "./小米营销论/小米营销论";
+import { 小米营销论封面横屏, 小米营销论封面竖屏 } from "./小米营销论/小米营销论CoverStills";
+
+export const GeneratedCompositions: React.FC = () => {
+  return (
+    <>
+      {/* 小米营销论 - 横屏 1920×1080 */}
+      <Composition
+        id="小米营销论"
+        component={小米营销论}
+        durationInFrames={TOTAL_DURATION_小米营销论}
+        fps={30}
+        width={1920}
+        height={1080}
+        schema={小米营销论Schema}
+        defaultProps={{}}
+      />
+
+      {/* 小米营销论竖屏 - 竖屏 1080×1920 */}
+      <Composition
+        id="小米营销论竖屏"
+        component={小米营销论竖屏}
+        durationInFrames={TOTAL_DURATION_小米营销论}
+        fps={30}
+        width={1080}
+        height={1920}
+        schema={小米营销论Schema}
+        defaultProps={{}}
+      />
+
+      {/* 小米营销论封面横屏 - 横屏封面 still 1920×1080 */}
+      <Composition
+        id="小米营销论封面横屏"
+        component={小米营销论封面横屏}
+        durationInFrames={1}
+        fps={30}
+        width={1920}
+        height={1080}
+        defaultProps={{}}
+      />
+
+      {/* 小米营销论封面竖屏 - 3:4 封面 still 1080×1440 */}
+      <Composition
+        id="小米营销论封面竖屏"
+        component={小米营销论封面竖屏}
+        durationInFrames={1}
+        fps={30}
+        width={1080}
+        height={1440}
+        defaultProps={{}}
+      />
+    </>
+  );
+};